@@ -0,0 +1,58 @@
+"""live row composite indexes
+
+Revision ID: 4f1c2a7d9e30
+Revises: 9c6a9f707746
+Create Date: 2026-10-16 09:12:04.118230
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4f1c2a7d9e30'
+down_revision: Union[str, Sequence[str], None] = '9c6a9f707746'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# ix_<table>_id duplicated the primary key index on every table.
+PK_DUPLICATE_INDEXES = [
+    'organizations',
+    'users',
+    'audit_trails',
+    'borrowers',
+    'applications',
+    'communication_logs',
+    'documents',
+]
+
+LIVE_INDEXES = [
+    ('ix_borrowers_org_created_live', 'borrowers', ['organization_id', 'created_at', 'id']),
+    ('ix_applications_org_created_live', 'applications', ['organization_id', 'created_at', 'id']),
+    ('ix_applications_org_status_live', 'applications', ['organization_id', 'application_status']),
+    ('ix_documents_org_created_live', 'documents', ['organization_id', 'created_at', 'id']),
+    ('ix_communication_logs_org_created_live', 'communication_logs', ['organization_id', 'created_at', 'id']),
+    ('ix_audit_trails_org_created_live', 'audit_trails', ['organization_id', 'created_at', 'id']),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for table in PK_DUPLICATE_INDEXES:
+        op.drop_index(op.f(f'ix_{table}_id'), table_name=table)
+    for name, table, columns in LIVE_INDEXES:
+        op.create_index(
+            name, table, columns, unique=False,
+            postgresql_where=sa.text('deleted_at IS NULL'),
+            sqlite_where=sa.text('deleted_at IS NULL'),
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for name, table, columns in reversed(LIVE_INDEXES):
+        op.drop_index(name, table_name=table)
+    for table in reversed(PK_DUPLICATE_INDEXES):
+        op.create_index(op.f(f'ix_{table}_id'), table, ['id'], unique=False)
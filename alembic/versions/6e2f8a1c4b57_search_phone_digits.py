@@ -0,0 +1,42 @@
+"""search phone digits
+
+Revision ID: 6e2f8a1c4b57
+Revises: b4d8f2a61c93
+Create Date: 2026-10-17 09:12:44.107352
+
+SQLite only: rebuilds borrowers_fts as a contentless FTS5 table whose phone
+column holds the phone's digits, the way search_terms reduces phone-like
+queries and the PostgreSQL search_vector indexes them. The external-content
+table indexed the formatted phone, so neither "(555) 123-4567" nor
+"5551234567" found it.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.core import search_ddl
+
+
+# revision identifiers, used by Alembic.
+revision: str = '6e2f8a1c4b57'
+down_revision: Union[str, Sequence[str], None] = 'b4d8f2a61c93'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _replace(version):
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    for statement in search_ddl.drop_ddl('sqlite', 'borrowers') + search_ddl.search_ddl('sqlite', 'borrowers', version=version):
+        op.execute(statement)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    _replace(2)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    _replace(1)
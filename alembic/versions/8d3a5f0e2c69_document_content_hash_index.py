@@ -0,0 +1,30 @@
+"""document content hash index
+
+Revision ID: 8d3a5f0e2c69
+Revises: 6e2f8a1c4b57
+Create Date: 2026-10-17 10:03:27.614820
+
+Backs the reference count LocalStorage.delete runs before removing a blob
+that other documents may share.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8d3a5f0e2c69'
+down_revision: Union[str, Sequence[str], None] = '6e2f8a1c4b57'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_documents_content_sha256', 'documents', ['content_sha256'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_documents_content_sha256', table_name='documents')
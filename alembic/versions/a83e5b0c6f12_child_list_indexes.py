@@ -0,0 +1,40 @@
+"""child list indexes
+
+Revision ID: a83e5b0c6f12
+Revises: 4f1c2a7d9e30
+Create Date: 2026-10-16 10:41:37.502914
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a83e5b0c6f12'
+down_revision: Union[str, Sequence[str], None] = '4f1c2a7d9e30'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+LIVE_INDEXES = [
+    ('ix_documents_application_created_live', 'documents', ['application_id', 'created_at', 'id']),
+    ('ix_communication_logs_application_created_live', 'communication_logs', ['application_id', 'created_at', 'id']),
+    ('ix_communication_logs_borrower_created_live', 'communication_logs', ['borrower_id', 'created_at', 'id']),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for name, table, columns in LIVE_INDEXES:
+        op.create_index(
+            name, table, columns, unique=False,
+            postgresql_where=sa.text('deleted_at IS NULL'),
+            sqlite_where=sa.text('deleted_at IS NULL'),
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for name, table, columns in reversed(LIVE_INDEXES):
+        op.drop_index(name, table_name=table)
@@ -0,0 +1,233 @@
+"""compact column types
+
+Revision ID: b4d8f2a61c93
+Revises: d2e6a9c4f817
+Create Date: 2026-10-17 00:41:06.538194
+
+Moves borrowers.income_annual to numeric and borrowers.date_of_birth to
+date, and the low-cardinality string columns to native enums on PostgreSQL.
+
+Online on PostgreSQL: each column gets a typed shadow column, kept current
+for concurrent writes by a BEFORE INSERT OR UPDATE trigger while existing
+rows are backfilled in id-range batches, each committed on its own
+(app.core.online_migration). The replacement indexes are built CONCURRENTLY,
+and the final swap (drop the old column, rename the shadow) is a catalog-only
+change. Rerunning after an interruption picks up where the run stopped. On SQLite the enum
+columns stay VARCHAR and only the borrowers columns are rebuilt.
+
+Values that would not convert are reported before anything is changed.
+"""
+import re
+from datetime import date
+from decimal import Decimal
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.core import online_migration, pipeline_summary_ddl
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b4d8f2a61c93'
+down_revision: Union[str, Sequence[str], None] = 'd2e6a9c4f817'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH_SIZE = 10000
+
+ENUMS = {
+    'application_status': ('draft', 'submitted', 'processing', 'underwriting', 'approved', 'closed', 'denied', 'withdrawn'),
+    'user_role': ('loan_officer', 'processor', 'underwriter', 'admin'),
+    'message_channel': ('email', 'sms', 'portal', 'phone'),
+    'message_sender_type': ('user', 'borrower', 'ai'),
+    'message_type': ('text',),
+    'storage_provider': ('local', 's3'),
+}
+
+# table -> [(column, enum type or None, new type)]
+COLUMNS = {
+    'borrowers': [('income_annual', None, 'numeric'), ('date_of_birth', None, 'date')],
+    'applications': [('application_status', 'application_status', 'application_status')],
+    'users': [('role', 'user_role', 'user_role')],
+    'communication_logs': [
+        ('channel', 'message_channel', 'message_channel'),
+        ('sender_type', 'message_sender_type', 'message_sender_type'),
+        ('message_type', 'message_type', 'message_type'),
+    ],
+    'documents': [('storage_provider', 'storage_provider', 'storage_provider')],
+}
+
+# Indexes on converted columns, rebuilt on the shadow column before the swap.
+INDEXES = {
+    'applications': [
+        ('ix_applications_application_status', 'application_status__new', None),
+        ('ix_applications_org_status_live', 'organization_id, application_status__new', 'deleted_at IS NULL'),
+    ],
+}
+
+INCOME = re.compile(r'^\s*\$?\s*(-?[0-9][0-9,]*(?:\.[0-9]+)?)\s*$')
+INCOME_SQL = r'^\s*\$?\s*(-?[0-9][0-9,]*(?:\.[0-9]+)?)\s*$'
+ISO_DATE = re.compile(r'^\s*([0-9]{4}-[0-9]{2}-[0-9]{2})\s*$')
+ISO_DATE_SQL = r'^\s*([0-9]{4}-[0-9]{2}-[0-9]{2})\s*$'
+
+def _convert(column, enum, value):
+    # Python twin of _convert_sql, used for the pre-check and on SQLite.
+    if value is None or not str(value).strip():
+        return None
+    value = str(value)
+    if column == 'income_annual':
+        match = INCOME.match(value)
+        if match is None:
+            raise ValueError(value)
+        return Decimal(match.group(1).replace(',', ''))
+    if column == 'date_of_birth':
+        match = ISO_DATE.match(value)
+        if match is None:
+            raise ValueError(value)
+        return date.fromisoformat(match.group(1))
+    if value not in ENUMS[enum]:
+        raise ValueError(value)
+    return value
+
+
+def _convert_sql(column, enum, source):
+    if column == 'income_annual':
+        return f"CAST(replace(substring({source} from '{INCOME_SQL}'), ',', '') AS numeric)"
+    if column == 'date_of_birth':
+        return f"CAST(substring({source} from '{ISO_DATE_SQL}') AS date)"
+    return f"CAST(nullif(btrim({source}), '') AS {enum})"
+
+
+def _precheck(conn):
+    problems = []
+    for table, columns in COLUMNS.items():
+        for column, enum, _ in columns:
+            for (value,) in conn.execute(sa.text(f'SELECT DISTINCT {column} FROM {table} WHERE {column} IS NOT NULL')):
+                try:
+                    _convert(column, enum, value)
+                except ValueError:
+                    problems.append(f'{table}.{column}: {value!r}')
+    if problems:
+        raise RuntimeError(
+            'values that cannot be converted; fix or NULL them (or add the enum '
+            'labels here) and rerun:\n  ' + '\n  '.join(problems[:50])
+        )
+
+
+def _id_batches(conn, table):
+    low, high = conn.execute(sa.text(f'SELECT min(id), max(id) FROM {table}')).one()
+    if low is None:
+        return
+    for start in range(low, high + 1, BATCH_SIZE):
+        yield start, start + BATCH_SIZE
+
+
+def _pg_upgrade(conn):
+    # Everything up to the swap is idempotent, since an interrupted run has
+    # already committed it.
+    existing = set(conn.execute(sa.text('SELECT typname FROM pg_type')).scalars())
+    for name, labels in ENUMS.items():
+        if name not in existing:
+            values = ', '.join(f"'{label}'" for label in labels)
+            op.execute(f'CREATE TYPE {name} AS ENUM ({values})')
+    for table, columns in COLUMNS.items():
+        assignments = []
+        for column, enum, new_type in columns:
+            op.execute(f'ALTER TABLE {table} ADD COLUMN IF NOT EXISTS {column}__new {new_type}')
+            assignments.append(f'NEW.{column}__new := {_convert_sql(column, enum, f"NEW.{column}")};')
+        op.execute(
+            f'CREATE OR REPLACE FUNCTION {table}_compact_sync() RETURNS trigger LANGUAGE plpgsql AS $$ '
+            f'BEGIN {" ".join(assignments)} RETURN NEW; END $$'
+        )
+        op.execute(f'DROP TRIGGER IF EXISTS {table}_compact_sync ON {table}')
+        op.execute(
+            f'CREATE TRIGGER {table}_compact_sync BEFORE INSERT OR UPDATE ON {table} '
+            f'FOR EACH ROW EXECUTE FUNCTION {table}_compact_sync()'
+        )
+
+    # The first backfill commits the columns and triggers, so new writes are
+    # converted from then on; each batch is its own short transaction, and a
+    # rerun after an interruption resumes where it stopped.
+    for table, columns in COLUMNS.items():
+        sets = ', '.join(f'{column}__new = {_convert_sql(column, enum, column)}' for column, enum, _ in columns)
+        online_migration.backfill(
+            f'compact_column_types_{table}', table,
+            f'UPDATE {table} SET {sets} WHERE id >= :start AND id < :end',
+            batch_size=BATCH_SIZE,
+        )
+    for table, indexes in INDEXES.items():
+        for name, columns, where in indexes:
+            online_migration.create_index_concurrently(f'{name}__new', table, columns, where=where)
+
+    for table, columns in COLUMNS.items():
+        op.execute(f'DROP TRIGGER {table}_compact_sync ON {table}')
+        op.execute(f'DROP FUNCTION {table}_compact_sync()')
+        for column, _, _ in columns:
+            op.execute(f'ALTER TABLE {table} DROP COLUMN {column}')
+            op.execute(f'ALTER TABLE {table} RENAME COLUMN {column}__new TO {column}')
+        for name, _, _ in INDEXES.get(table, ()):
+            op.execute(f'ALTER INDEX {name}__new RENAME TO {name}')
+    # The summary trigger function compares application_status as text.
+    op.execute(pipeline_summary_ddl.PG_FUNCTION[2])
+
+
+def _sqlite_upgrade(conn):
+    # SQLite can't change a column's type, but can add, drop and rename
+    # columns. The enum columns are VARCHAR either way; just clear blanks.
+    for column in ('income_annual', 'date_of_birth'):
+        op.execute(f'ALTER TABLE borrowers ADD COLUMN {column}__new {dict(income_annual="NUMERIC", date_of_birth="DATE")[column]}')
+    for start, end in _id_batches(conn, 'borrowers'):
+        rows = conn.execute(
+            sa.text('SELECT id, income_annual, date_of_birth FROM borrowers WHERE id >= :start AND id < :end'),
+            {'start': start, 'end': end},
+        ).all()
+        params = [
+            {
+                'id': row.id,
+                'income': None if (income := _convert('income_annual', None, row.income_annual)) is None else str(income),
+                'dob': None if (dob := _convert('date_of_birth', None, row.date_of_birth)) is None else dob.isoformat(),
+            }
+            for row in rows
+        ]
+        if params:
+            conn.execute(
+                sa.text('UPDATE borrowers SET income_annual__new = CAST(:income AS NUMERIC), date_of_birth__new = :dob WHERE id = :id'),
+                params,
+            )
+    for column in ('income_annual', 'date_of_birth'):
+        op.execute(f'ALTER TABLE borrowers DROP COLUMN {column}')
+        op.execute(f'ALTER TABLE borrowers RENAME COLUMN {column}__new TO {column}')
+    for table, columns in COLUMNS.items():
+        for column, enum, _ in columns:
+            if enum is not None:
+                op.execute(f"UPDATE {table} SET {column} = NULL WHERE trim({column}) = ''")
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    conn = op.get_bind()
+    _precheck(conn)
+    if conn.dialect.name == 'postgresql':
+        _pg_upgrade(conn)
+    elif conn.dialect.name == 'sqlite':
+        _sqlite_upgrade(conn)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    conn = op.get_bind()
+    online_migration.reset_checkpoints(*(f'compact_column_types_{table}' for table in COLUMNS))
+    if conn.dialect.name == 'postgresql':
+        # Offline: ALTER COLUMN TYPE rewrites each table under an exclusive lock.
+        for table, columns in COLUMNS.items():
+            for column, _, _ in columns:
+                op.execute(f'ALTER TABLE {table} ALTER COLUMN {column} TYPE varchar USING {column}::text')
+        for name in ENUMS:
+            op.execute(f'DROP TYPE {name}')
+    elif conn.dialect.name == 'sqlite':
+        for column in ('income_annual', 'date_of_birth'):
+            op.execute(f'ALTER TABLE borrowers ADD COLUMN {column}__old VARCHAR')
+            op.execute(f'UPDATE borrowers SET {column}__old = CAST({column} AS TEXT)')
+            op.execute(f'ALTER TABLE borrowers DROP COLUMN {column}')
+            op.execute(f'ALTER TABLE borrowers RENAME COLUMN {column}__old TO {column}')
@@ -0,0 +1,134 @@
+"""partition logs and audit trails
+
+Revision ID: c5d7e1f08a24
+Revises: a83e5b0c6f12
+Create Date: 2026-10-16 13:05:51.733410
+
+"""
+from datetime import date, datetime
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c5d7e1f08a24'
+down_revision: Union[str, Sequence[str], None] = 'a83e5b0c6f12'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+MONTHS_AHEAD = 3
+
+# Partitioned tables need the partition key in every unique constraint, so
+# the primary key becomes (id, created_at); ids still come from the original
+# sequence and stay unique.
+TABLES = {
+    'communication_logs': {
+        'foreign_keys': [
+            ('organization_id', 'organizations'),
+            ('application_id', 'applications'),
+            ('borrower_id', 'borrowers'),
+            ('sender_user_id', 'users'),
+        ],
+        'indexes': [
+            ('ix_communication_logs_org_created_live', ['organization_id', 'created_at', 'id']),
+            ('ix_communication_logs_application_created_live', ['application_id', 'created_at', 'id']),
+            ('ix_communication_logs_borrower_created_live', ['borrower_id', 'created_at', 'id']),
+        ],
+    },
+    'audit_trails': {
+        'foreign_keys': [
+            ('organization_id', 'organizations'),
+            ('user_id', 'users'),
+        ],
+        'indexes': [
+            ('ix_audit_trails_org_created_live', ['organization_id', 'created_at', 'id']),
+        ],
+    },
+}
+
+
+def _add_months(value, months):
+    index = value.year * 12 + value.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _months(conn, table):
+    first = conn.execute(sa.text(f'SELECT min(created_at) FROM {table}')).scalar()
+    today = datetime.utcnow().date()
+    month = date((first or today).year, (first or today).month, 1)
+    last = _add_months(date(today.year, today.month, 1), MONTHS_AHEAD)
+    while month <= last:
+        yield month
+        month = _add_months(month, 1)
+
+
+def _create_indexes(table, spec):
+    for name, columns in spec['indexes']:
+        op.create_index(
+            name, table, columns, unique=False,
+            postgresql_where=sa.text('deleted_at IS NULL'),
+        )
+
+
+def _drop_indexes(table, spec):
+    for name, _ in spec['indexes']:
+        op.drop_index(name, table_name=table)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    conn = op.get_bind()
+    if conn.dialect.name != 'postgresql':
+        return
+    for table, spec in TABLES.items():
+        old = f'{table}_unpartitioned'
+        _drop_indexes(table, spec)
+        op.execute(f'UPDATE {table} SET created_at = now() WHERE created_at IS NULL')
+        op.execute(f'ALTER TABLE {table} RENAME TO {old}')
+        op.execute(f'ALTER TABLE {old} RENAME CONSTRAINT {table}_pkey TO {old}_pkey')
+        op.execute(
+            f'CREATE TABLE {table} (LIKE {old} INCLUDING DEFAULTS) '
+            f'PARTITION BY RANGE (created_at)'
+        )
+        op.execute(f'ALTER TABLE {table} ALTER COLUMN created_at SET NOT NULL')
+        op.execute(f'ALTER TABLE {table} ADD CONSTRAINT {table}_pkey PRIMARY KEY (id, created_at)')
+        for column, referred in spec['foreign_keys']:
+            op.create_foreign_key(
+                f'{table}_{column}_fkey', table, referred, [column], ['id'],
+            )
+        for month in _months(conn, old):
+            op.execute(
+                f"CREATE TABLE {table}_y{month.year:04d}m{month.month:02d} PARTITION OF {table} "
+                f"FOR VALUES FROM ('{month.isoformat()}') TO ('{_add_months(month, 1).isoformat()}')"
+            )
+        op.execute(f'CREATE TABLE {table}_default PARTITION OF {table} DEFAULT')
+        op.execute(f'INSERT INTO {table} SELECT * FROM {old}')
+        op.execute(f'ALTER SEQUENCE {table}_id_seq OWNED BY {table}.id')
+        op.execute(f'DROP TABLE {old}')
+        _create_indexes(table, spec)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    conn = op.get_bind()
+    if conn.dialect.name != 'postgresql':
+        return
+    for table, spec in TABLES.items():
+        old = f'{table}_partitioned'
+        _drop_indexes(table, spec)
+        op.execute(f'ALTER TABLE {table} RENAME TO {old}')
+        op.execute(f'ALTER TABLE {old} RENAME CONSTRAINT {table}_pkey TO {old}_pkey')
+        op.execute(f'CREATE TABLE {table} (LIKE {old} INCLUDING DEFAULTS)')
+        op.execute(f'ALTER TABLE {table} ALTER COLUMN created_at DROP NOT NULL')
+        op.execute(f'ALTER TABLE {table} ADD CONSTRAINT {table}_pkey PRIMARY KEY (id)')
+        for column, referred in spec['foreign_keys']:
+            op.execute(f'ALTER TABLE {old} DROP CONSTRAINT {table}_{column}_fkey')
+            op.create_foreign_key(
+                f'{table}_{column}_fkey', table, referred, [column], ['id'],
+            )
+        op.execute(f'INSERT INTO {table} SELECT * FROM {old}')
+        op.execute(f'ALTER SEQUENCE {table}_id_seq OWNED BY {table}.id')
+        op.execute(f'DROP TABLE {old} CASCADE')
+        _create_indexes(table, spec)
@@ -0,0 +1,40 @@
+"""migration checkpoints
+
+Revision ID: d2e6a9c4f817
+Revises: a7c3e5f19b42
+Create Date: 2026-10-17 01:58:37.720416
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd2e6a9c4f817'
+down_revision: Union[str, Sequence[str], None] = 'a7c3e5f19b42'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'migration_checkpoints',
+        sa.Column('name', sa.String(), nullable=False),
+        sa.Column('table_name', sa.String(), nullable=False),
+        sa.Column('next_key', sa.BigInteger(), nullable=True),
+        sa.Column('end_key', sa.BigInteger(), nullable=True),
+        sa.Column('rows_done', sa.BigInteger(), server_default=sa.text('0'), nullable=False),
+        sa.Column('batches_done', sa.BigInteger(), server_default=sa.text('0'), nullable=False),
+        sa.Column('started_at', sa.DateTime(), server_default=sa.text('now()'), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), server_default=sa.text('now()'), nullable=True),
+        sa.Column('finished_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('name'),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('migration_checkpoints')
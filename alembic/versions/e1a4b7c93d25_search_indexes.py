@@ -0,0 +1,36 @@
+"""search indexes
+
+Revision ID: e1a4b7c93d25
+Revises: c5d7e1f08a24
+Create Date: 2026-10-16 21:14:08.261730
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.core import search_ddl
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e1a4b7c93d25'
+down_revision: Union[str, Sequence[str], None] = 'c5d7e1f08a24'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    dialect = op.get_bind().dialect.name
+    for table in search_ddl.TABLES:
+        for statement in search_ddl.search_ddl(dialect, table, version=1):
+            op.execute(statement)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    dialect = op.get_bind().dialect.name
+    for table in reversed(search_ddl.TABLES):
+        for statement in search_ddl.drop_ddl(dialect, table):
+            op.execute(statement)
@@ -0,0 +1,54 @@
+"""application status counts
+
+Revision ID: f3b9d2a6c471
+Revises: e1a4b7c93d25
+Create Date: 2026-10-16 22:47:19.084512
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.core import pipeline_summary_ddl
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f3b9d2a6c471'
+down_revision: Union[str, Sequence[str], None] = 'e1a4b7c93d25'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+POPULATE = """
+INSERT INTO application_status_counts (organization_id, status, count, sum_amount)
+SELECT organization_id, coalesce(application_status, ''), count(*), coalesce(sum(loan_amount), 0)
+FROM applications WHERE deleted_at IS NULL
+GROUP BY 1, 2
+"""
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'application_status_counts',
+        sa.Column('organization_id', sa.BigInteger(), nullable=False),
+        sa.Column('status', sa.String(), nullable=False),
+        sa.Column('count', sa.BigInteger(), server_default=sa.text('0'), nullable=False),
+        sa.Column('sum_amount', sa.Numeric(), server_default=sa.text('0'), nullable=False),
+        sa.ForeignKeyConstraint(['organization_id'], ['organizations.id']),
+        sa.PrimaryKeyConstraint('organization_id', 'status'),
+    )
+    dialect = op.get_bind().dialect.name
+    if dialect == 'postgresql':
+        # No writes may land between populating and the triggers taking over.
+        op.execute('LOCK TABLE applications IN SHARE MODE')
+    for statement in pipeline_summary_ddl.trigger_ddl(dialect, version=1):
+        op.execute(statement)
+    op.execute(POPULATE)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for statement in pipeline_summary_ddl.drop_ddl(op.get_bind().dialect.name):
+        op.execute(statement)
+    op.drop_table('application_status_counts')
@@ -0,0 +1,60 @@
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+from app.core.config import settings, _async_url
+from app.core.database import replica_engines
+from app.core.pool_metrics import pool_metrics, MeteredAsyncAdaptedQueuePool
+from app.core.query_metrics import query_metrics
+from app.core.replicas import ReplicaSet, RoutingSession
+
+ASYNC_DATABASE_URL = settings.async_database_url
+
+def async_engine_options(settings):
+    options = {
+        "echo": settings.echo,
+        "insertmanyvalues_page_size": settings.insertmanyvalues_page_size,
+    }
+    if settings.is_sqlite:
+        return options
+    options.update(
+        poolclass=MeteredAsyncAdaptedQueuePool,
+        pool_size=settings.pool_size,
+        max_overflow=settings.max_overflow,
+        pool_timeout=settings.pool_timeout,
+        pool_recycle=settings.pool_recycle,
+        pool_pre_ping=settings.pool_pre_ping,
+        pool_use_lifo=settings.pool_use_lifo,
+    )
+    if settings.async_database_url.startswith("postgresql+asyncpg"):
+        options["connect_args"] = {
+            "server_settings": {"statement_timeout": str(settings.statement_timeout_ms)},
+        }
+    return options
+
+async_engine = create_async_engine(ASYNC_DATABASE_URL, **async_engine_options(settings))
+pool_metrics.attach(async_engine.sync_engine)
+query_metrics.attach(async_engine.sync_engine)
+
+async_replica_engines = [create_async_engine(_async_url(url), **async_engine_options(settings)) for url in settings.replica_urls]
+for async_replica_engine in async_replica_engines:
+    pool_metrics.attach(async_replica_engine.sync_engine)
+    query_metrics.attach(async_replica_engine.sync_engine)
+# Lag is checked through the sync replica engines; an async engine can't
+# run the probe from inside get_bind. get_bind runs on the event loop, so the
+# probes run on a background thread rather than blocking it.
+async_replicas = ReplicaSet(
+    [async_replica_engine.sync_engine for async_replica_engine in async_replica_engines],
+    max_lag=settings.replica_max_lag_seconds,
+    check_interval=settings.replica_check_interval_seconds,
+    probe_engines=replica_engines,
+    background=True,
+)
+
+# expire_on_commit=False: an expired attribute would need an implicit lazy
+# load, which AsyncSession cannot do outside an await.
+AsyncSessionLocal = async_sessionmaker(
+    async_engine, autoflush=False, expire_on_commit=False,
+    sync_session_class=RoutingSession, replicas=async_replicas,
+)
+
+async def async_get_db():
+    async with AsyncSessionLocal() as db:
+        yield db
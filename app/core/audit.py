@@ -0,0 +1,192 @@
+import json
+import logging
+import queue
+import threading
+from datetime import datetime, timezone
+from sqlalchemy import event, insert, inspect
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.models.audit_trail import AuditTrail
+from app.repositories.copy_loader import BufferedLoader
+
+logger = logging.getLogger(__name__)
+
+SYNC = "sync"
+ASYNC = "async"
+MODES = (SYNC, ASYNC)
+
+INLINE = "inline"
+DROP = "drop"
+OVERFLOW_POLICIES = (INLINE, DROP)
+
+AUDIT_COLUMNS = [
+    "organization_id", "user_id", "entity_type", "entity_id",
+    "action", "old_value", "new_value", "created_at",
+]
+IGNORED_COLUMNS = {"created_at", "updated_at"}
+
+def set_audit_user(session: Session, user_id: int | None):
+    session.info["audit_user_id"] = user_id
+
+def _dump(values):
+    return json.dumps(values, default=str, sort_keys=True) if values else None
+
+def _organization_id(obj):
+    if obj.__table__.name == "organizations":
+        return obj.id
+    return getattr(obj, "organization_id", None)
+
+def _entry(session, obj, action, old, new, now):
+    return {
+        "organization_id": _organization_id(obj),
+        "user_id": session.info.get("audit_user_id"),
+        "entity_type": obj.__table__.name,
+        "entity_id": obj.id,
+        "action": action,
+        "old_value": _dump(old),
+        "new_value": _dump(new),
+        "created_at": now,
+    }
+
+def _column_attrs(obj):
+    state = inspect(obj)
+    return [
+        (attr.key, state.attrs[attr.key])
+        for attr in state.mapper.column_attrs
+        if attr.key not in IGNORED_COLUMNS
+    ]
+
+def collect_entries(session: Session):
+    # Runs in after_flush: inserted rows have their ids by then and
+    # attribute history hasn't been reset yet.
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    entries = []
+    for obj in session.new:
+        if isinstance(obj, AuditTrail):
+            continue
+        new = {key: attr.value for key, attr in _column_attrs(obj) if attr.value is not None}
+        entries.append(_entry(session, obj, "create", None, new, now))
+    for obj in session.dirty:
+        if isinstance(obj, AuditTrail) or not session.is_modified(obj, include_collections=False):
+            continue
+        old, new = {}, {}
+        for key, attr in _column_attrs(obj):
+            history = attr.history
+            if history.has_changes():
+                old[key] = history.deleted[0] if history.deleted else None
+                new[key] = history.added[0] if history.added else None
+        if not new:
+            continue
+        soft_deleted = "deleted_at" in new and old["deleted_at"] is None and new["deleted_at"] is not None
+        action = "soft_delete" if soft_deleted else "update"
+        entries.append(_entry(session, obj, action, old, new, now))
+    for obj in session.deleted:
+        if isinstance(obj, AuditTrail):
+            continue
+        old = {key: attr.value for key, attr in _column_attrs(obj) if attr.value is not None}
+        entries.append(_entry(session, obj, "delete", old, None, now))
+    return [entry for entry in entries if entry["organization_id"] is not None]
+
+class AuditRecorder:
+    """Writes AuditTrail rows for every flushed change on a sessionmaker.
+
+    sync: entries are inserted on the session's own connection during the
+    flush, so they commit or roll back with the change itself.
+
+    async: entries are held until the transaction commits (and dropped on
+    rollback), then queued to a BufferedLoader whose worker thread inserts
+    them in batches on its own connection. The committing request never
+    waits on audit inserts; entries still queued when the process dies are
+    lost. Entries that don't fit in the queue (max_pending), that arrive
+    while the loader is unavailable, or whose batch the loader failed to
+    write after retrying are handled by the overflow policy: inline inserts
+    them directly (on the committing thread, or the loader's for failed
+    batches), so nothing is lost but that caller pays for the insert; drop
+    logs and discards them. Either way they are counted in overflows.
+    """
+
+    def __init__(self, engine, mode: str = ASYNC, overflow: str = INLINE, **loader_options):
+        if mode not in MODES:
+            raise ValueError(f"unknown audit mode: {mode!r}")
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"unknown audit overflow policy: {overflow!r}")
+        self.engine = engine
+        self.mode = mode
+        self.overflow = overflow
+        self.overflows = 0
+        self._overflows_lock = threading.Lock()
+        self._loader_options = loader_options
+        self.loader = None
+        self._target = None
+
+    def install(self, target=Session):
+        if self.mode == ASYNC:
+            self.loader = BufferedLoader(
+                self.engine, AuditTrail, columns=AUDIT_COLUMNS, on_failure=self._overflowed, **self._loader_options
+            )
+        self._target = target
+        event.listen(target, "after_flush", self._after_flush)
+        event.listen(target, "after_commit", self._after_commit)
+        event.listen(target, "after_soft_rollback", self._after_soft_rollback)
+        return self
+
+    def uninstall(self):
+        if self._target is not None:
+            event.remove(self._target, "after_flush", self._after_flush)
+            event.remove(self._target, "after_commit", self._after_commit)
+            event.remove(self._target, "after_soft_rollback", self._after_soft_rollback)
+            self._target = None
+        if self.loader is not None:
+            self.loader.close()
+            self.loader = None
+
+    def _after_flush(self, session, flush_context):
+        entries = collect_entries(session)
+        if not entries:
+            return
+        if self.mode == SYNC:
+            session.connection().execute(insert(AuditTrail.__table__), entries)
+        else:
+            session.info.setdefault("audit_pending", []).extend(entries)
+
+    def _after_commit(self, session):
+        entries = session.info.pop("audit_pending", None)
+        if not entries:
+            return
+        overflowed = []
+        for index, entry in enumerate(entries):
+            try:
+                self.loader.put(entry, block=False)
+            except queue.Full:
+                overflowed.append(entry)
+            except RuntimeError:
+                # The loader is closed or its worker is gone; nothing more
+                # can be queued.
+                logger.warning("audit loader unavailable", exc_info=True)
+                overflowed.extend(entries[index:])
+                break
+        if overflowed:
+            self._overflowed(overflowed)
+
+    def _overflowed(self, entries):
+        # Entries the loader couldn't take, or whose batch it failed to
+        # write. The business transaction is already committed; don't fail
+        # it because the audit writer is unhealthy.
+        with self._overflows_lock:
+            self.overflows += len(entries)
+        if self.overflow == DROP:
+            logger.warning("dropping %d audit entries", len(entries))
+            return
+        try:
+            with self.engine.begin() as connection:
+                connection.execute(insert(AuditTrail.__table__), entries)
+        except Exception:
+            logger.exception("dropping %d audit entries", len(entries))
+
+    def _after_soft_rollback(self, session, previous_transaction):
+        if not session.in_transaction():
+            session.info.pop("audit_pending", None)
+
+def install_audit(engine, target=Session, mode: str = settings.audit_mode,
+                  overflow: str = settings.audit_overflow, **loader_options):
+    return AuditRecorder(engine, mode, overflow, **loader_options).install(target)
@@ -0,0 +1,113 @@
+import os
+from dataclasses import dataclass
+from dotenv import load_dotenv
+from sqlalchemy.engine import make_url
+
+load_dotenv()
+
+def _env_int(name, default):
+    value = os.getenv(name)
+    return int(value) if value not in (None, "") else default
+
+def _env_list(name):
+    value = os.getenv(name) or ""
+    return tuple(item.strip() for item in value.split(",") if item.strip())
+
+def _env_bool(name, default):
+    value = os.getenv(name)
+    if value in (None, ""):
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+_ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+def _async_url(url):
+    if not url:
+        return url
+    url = make_url(url)
+    drivername = _ASYNC_DRIVERS.get(url.get_backend_name(), url.drivername)
+    return url.set(drivername=drivername).render_as_string(hide_password=False)
+
+@dataclass(frozen=True)
+class Settings:
+    database_url: str
+    async_database_url: str = None
+    replica_urls: tuple = ()
+    # Replicas further behind than this are skipped; it is also how long a
+    # session keeps reading from the primary after it wrote.
+    replica_max_lag_seconds: int = 5
+    replica_check_interval_seconds: int = 1
+    pool_size: int = 10
+    max_overflow: int = 20
+    pool_timeout: int = 30
+    # Recycle before Postgres/pgbouncer idle timeouts close the socket for us.
+    pool_recycle: int = 1800
+    pool_pre_ping: bool = True
+    pool_use_lifo: bool = True
+    statement_timeout_ms: int = 30000
+    insertmanyvalues_page_size: int = 1000
+    # psycopg2 only: "values_only" or "values_plus_batch" (execute_values /
+    # execute_batch for INSERT and UPDATE/DELETE executemany respectively).
+    executemany_mode: str = "values_plus_batch"
+    executemany_batch_page_size: int = 100
+    echo: bool = False
+    identity_cache_size: int = 10000
+    identity_cache_ttl: int = 60
+    # "async" (batched background writer) or "sync" (same transaction).
+    audit_mode: str = "async"
+    # What async mode does with entries when its queue is full: "inline"
+    # (insert them on the committing thread) or "drop".
+    audit_overflow: str = "inline"
+    slow_query_ms: int = 500
+    # "off", "plan" or "analyze"; EXPLAIN output is appended to slow-query logs.
+    slow_query_explain: str = "off"
+    # 0 disables the /metrics and /metrics.json scrape endpoint.
+    metrics_port: int = 0
+    # Document bytes; see app.core.storage.
+    storage_provider: str = "local"
+    storage_root: str = "storage"
+    storage_chunk_size: int = 1024 * 1024
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            database_url=os.getenv("DATABASE_URL"),
+            async_database_url=os.getenv("ASYNC_DATABASE_URL") or _async_url(os.getenv("DATABASE_URL")),
+            replica_urls=_env_list("DATABASE_REPLICA_URLS"),
+            replica_max_lag_seconds=_env_int("DB_REPLICA_MAX_LAG_SECONDS", cls.replica_max_lag_seconds),
+            replica_check_interval_seconds=_env_int("DB_REPLICA_CHECK_INTERVAL_SECONDS", cls.replica_check_interval_seconds),
+            pool_size=_env_int("DB_POOL_SIZE", cls.pool_size),
+            max_overflow=_env_int("DB_MAX_OVERFLOW", cls.max_overflow),
+            pool_timeout=_env_int("DB_POOL_TIMEOUT", cls.pool_timeout),
+            pool_recycle=_env_int("DB_POOL_RECYCLE", cls.pool_recycle),
+            pool_pre_ping=_env_bool("DB_POOL_PRE_PING", cls.pool_pre_ping),
+            pool_use_lifo=_env_bool("DB_POOL_USE_LIFO", cls.pool_use_lifo),
+            statement_timeout_ms=_env_int("DB_STATEMENT_TIMEOUT_MS", cls.statement_timeout_ms),
+            insertmanyvalues_page_size=_env_int("DB_INSERTMANYVALUES_PAGE_SIZE", cls.insertmanyvalues_page_size),
+            executemany_mode=os.getenv("DB_EXECUTEMANY_MODE", cls.executemany_mode),
+            executemany_batch_page_size=_env_int("DB_EXECUTEMANY_BATCH_PAGE_SIZE", cls.executemany_batch_page_size),
+            echo=_env_bool("DB_ECHO", cls.echo),
+            identity_cache_size=_env_int("IDENTITY_CACHE_SIZE", cls.identity_cache_size),
+            identity_cache_ttl=_env_int("IDENTITY_CACHE_TTL", cls.identity_cache_ttl),
+            audit_mode=os.getenv("AUDIT_MODE", cls.audit_mode),
+            audit_overflow=os.getenv("AUDIT_OVERFLOW", cls.audit_overflow),
+            slow_query_ms=_env_int("DB_SLOW_QUERY_MS", cls.slow_query_ms),
+            slow_query_explain=os.getenv("DB_SLOW_QUERY_EXPLAIN", cls.slow_query_explain),
+            metrics_port=_env_int("METRICS_PORT", cls.metrics_port),
+            storage_provider=os.getenv("STORAGE_PROVIDER", cls.storage_provider),
+            storage_root=os.getenv("STORAGE_ROOT", cls.storage_root),
+            storage_chunk_size=_env_int("STORAGE_CHUNK_SIZE", cls.storage_chunk_size),
+        )
+
+    @property
+    def is_sqlite(self):
+        return make_url(self.database_url).get_backend_name() == "sqlite"
+
+    @property
+    def is_psycopg2(self):
+        return make_url(self.database_url).get_driver_name() == "psycopg2"
+
+settings = Settings.from_env()
@@ -1,18 +1,72 @@
-import os
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, BigInteger, Integer
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql import functions
 from sqlalchemy.orm import sessionmaker, declarative_base, Session
-from dotenv import load_dotenv
+from app.core.config import settings
+from app.core.pool_metrics import pool_metrics, MeteredQueuePool
+from app.core.query_metrics import query_metrics, start_metrics_server
+from app.core.replicas import ReplicaSet, RoutingSession
 
-load_dotenv()
+DATABASE_URL = settings.database_url
 
-DATABASE_URL = os.getenv("DATABASE_URL")
+def engine_options(settings):
+    options = {
+        "echo": settings.echo,
+        "insertmanyvalues_page_size": settings.insertmanyvalues_page_size,
+    }
+    if settings.is_sqlite:
+        # SQLite picks its own pool class; the QueuePool sizing knobs don't apply.
+        return options
+    options.update(
+        poolclass=MeteredQueuePool,
+        pool_size=settings.pool_size,
+        max_overflow=settings.max_overflow,
+        pool_timeout=settings.pool_timeout,
+        pool_recycle=settings.pool_recycle,
+        pool_pre_ping=settings.pool_pre_ping,
+        pool_use_lifo=settings.pool_use_lifo,
+    )
+    if settings.is_psycopg2:
+        options.update(
+            executemany_mode=settings.executemany_mode,
+            executemany_batch_page_size=settings.executemany_batch_page_size,
+            connect_args={"options": f"-c statement_timeout={settings.statement_timeout_ms}"},
+        )
+    return options
 
-engine = create_engine(DATABASE_URL)
+engine = create_engine(DATABASE_URL, **engine_options(settings))
+pool_metrics.attach(engine)
+query_metrics.slow_query_ms = settings.slow_query_ms
+query_metrics.explain = settings.slow_query_explain
+query_metrics.attach(engine)
+if settings.metrics_port:
+    start_metrics_server(settings.metrics_port, pool=engine.pool)
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+replica_engines = [create_engine(url, **engine_options(settings)) for url in settings.replica_urls]
+for replica_engine in replica_engines:
+    pool_metrics.attach(replica_engine)
+    query_metrics.attach(replica_engine)
+replicas = ReplicaSet(
+    replica_engines,
+    max_lag=settings.replica_max_lag_seconds,
+    check_interval=settings.replica_check_interval_seconds,
+)
+
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine, class_=RoutingSession, replicas=replicas)
 
 Base = declarative_base()
 
+# SQLite only autoincrements INTEGER PRIMARY KEY columns, so local SQLite
+# databases (benchmarks, tests) need the narrower type for ids.
+BigIntegerPK = BigInteger().with_variant(Integer, "sqlite")
+
+# SQLite keeps timestamps as text and compares them as strings, so now() has
+# to produce the same microsecond format SQLAlchemy binds datetimes with;
+# CURRENT_TIMESTAMP would sort before an equal bound value.
+@compiles(functions.now, "sqlite")
+def _sqlite_now(element, compiler, **kw):
+    return "strftime('%Y-%m-%d %H:%M:%f000', 'now')"
+
 def get_db():
     db: Session = SessionLocal()
     try:
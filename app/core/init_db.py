@@ -0,0 +1,14 @@
+from app.core.database import Base, engine
+from app.models.organization import Organization
+from app.models.user import User
+from app.models.communication_log import CommunicationLog
+from app.models.audit_trail import AuditTrail
+from app.models.application import Application
+from app.models.borrower import Borrower
+from app.models.document import Document
+
+def init_db(bind=engine):
+    Base.metadata.create_all(bind=bind)
+
+def drop_db(bind=engine):
+    Base.metadata.drop_all(bind=bind)
@@ -0,0 +1,274 @@
+import argparse
+import logging
+import sys
+import time
+from contextlib import contextmanager
+from alembic import op
+from sqlalchemy import Engine, delete, func, inspect, select, text, update, insert
+from sqlalchemy.sql.elements import TextClause
+from app.core.database import engine
+from app.models.migration_checkpoint import MigrationCheckpoint
+
+logger = logging.getLogger(__name__)
+
+# Helpers for migrations that must not hold locks for long on big tables.
+# Inside a migration script:
+#
+#     from app.core import online_migration
+#
+#     def upgrade():
+#         op.add_column("applications", sa.Column("loan_amount_cents", sa.BigInteger()))
+#         online_migration.backfill(
+#             "applications_loan_amount_cents", "applications",
+#             "UPDATE applications SET loan_amount_cents = loan_amount * 100 "
+#             "WHERE id >= :start AND id < :end",
+#             throttle=online_migration.Throttle(rows_per_second=20000, max_replica_lag=10),
+#         )
+#         online_migration.create_index_concurrently(
+#             "ix_applications_loan_amount_cents", "applications", "loan_amount_cents")
+#
+# Both commit the migration's transaction so far (alembic's autocommit
+# block) and then work in short transactions of their own, so run the
+# schema changes they depend on before them and keep the rest of the
+# revision idempotent. Rerunning an interrupted revision resumes the
+# backfill from its checkpoint and skips indexes already built.
+
+DEFAULT_BATCH_SIZE = 5000
+
+_PG_REPLICATION_LAG = "SELECT coalesce(max(EXTRACT(EPOCH FROM replay_lag)), 0) FROM pg_stat_replication"
+
+def replication_lag(connection):
+    # Seconds the slowest standby is behind, measured on the primary, so it
+    # covers every standby (not just the ones the application reads from).
+    # replay_lag is NULL once a standby has caught up.
+    if connection.dialect.name != "postgresql":
+        return 0.0
+    return float(connection.exec_driver_sql(_PG_REPLICATION_LAG).scalar())
+
+class Throttle:
+    """Paces batches to a target rate and waits out replication lag.
+
+    After each batch, wait() sleeps as long as needed to keep the run at or
+    under rows_per_second, then, if max_replica_lag is set, polls the lag
+    every poll_interval seconds until it is back under the limit.
+    """
+
+    def __init__(self, rows_per_second: float | None = None, max_replica_lag: float | None = None,
+                 poll_interval: float = 1.0, probe=replication_lag, clock=time.monotonic, sleep=time.sleep):
+        self.rows_per_second = rows_per_second
+        self.max_replica_lag = max_replica_lag
+        self.poll_interval = poll_interval
+        self.probe = probe
+        self.clock = clock
+        self.sleep = sleep
+        self._started = None
+        self._rows = 0
+        self.slept = 0.0
+
+    def _pause(self, seconds):
+        self.sleep(seconds)
+        self.slept += seconds
+
+    def _lag(self, connection):
+        # The probe autobegins a transaction on the caller's connection; end
+        # it, so the next batch can begin() and no snapshot is held while
+        # pausing.
+        idle = not connection.in_transaction()
+        try:
+            return self.probe(connection)
+        finally:
+            if idle and connection.in_transaction():
+                connection.rollback()
+
+    def wait(self, connection, rows: int):
+        now = self.clock()
+        if self._started is None:
+            self._started = now
+        self._rows += rows
+        if self.rows_per_second:
+            ahead = self._rows / self.rows_per_second - (now - self._started)
+            if ahead > 0:
+                self._pause(ahead)
+        if self.max_replica_lag is not None:
+            while (lag := self._lag(connection)) > self.max_replica_lag:
+                logger.info("replication lag %.1fs over %.1fs, pausing", lag, self.max_replica_lag)
+                self._pause(self.poll_interval)
+
+@contextmanager
+def _outside_transaction(bind):
+    # In a migration, commit what the revision did so far and hand out the
+    # migration's connection in autocommit mode; otherwise use bind as given.
+    if bind is not None:
+        yield bind
+        return
+    with op.get_context().autocommit_block():
+        yield op.get_bind()
+
+def _engine(bind):
+    return getattr(bind, "engine", bind)
+
+def ensure_checkpoint_table(bind):
+    MigrationCheckpoint.__table__.create(bind, checkfirst=True)
+
+def reset_checkpoints(*names: str, bind=None):
+    """Forget backfills by name, so they run again from the start.
+
+    For downgrades: a revision that is downgraded and upgraded again would
+    otherwise find its backfills finished. bind defaults to the running
+    migration's connection, in its transaction.
+    """
+    if bind is None:
+        bind = op.get_bind()
+    if not inspect(bind).has_table(MigrationCheckpoint.__tablename__):
+        return 0
+    checkpoints = MigrationCheckpoint.__table__
+    stmt = delete(checkpoints).where(checkpoints.c.name.in_(names))
+    if isinstance(bind, Engine):
+        with bind.begin() as conn:
+            return conn.execute(stmt).rowcount
+    return bind.execute(stmt).rowcount
+
+def _batch_end(conn, table, key, start, end_key, batch_size):
+    # Keyset chunking: the batch ends before the (batch_size + 1)th key, so
+    # gaps in the ids don't make for empty or oversized batches.
+    stmt = text(
+        f"SELECT {key} FROM {table} WHERE {key} >= :start AND {key} <= :end_key "
+        f"ORDER BY {key} LIMIT 1 OFFSET :offset"
+    )
+    following = conn.execute(stmt, {"start": start, "end_key": end_key, "offset": batch_size}).scalar()
+    return following if following is not None else end_key + 1
+
+def _start(db, name, table, key):
+    checkpoints = MigrationCheckpoint.__table__
+    by_name = select(checkpoints).where(checkpoints.c.name == name)
+    with db.begin() as conn:
+        checkpoint = conn.execute(by_name).first()
+        if checkpoint is None:
+            low, high = conn.execute(text(f"SELECT min({key}), max({key}) FROM {table}")).one()
+            conn.execute(insert(checkpoints).values(name=name, table_name=table, next_key=low, end_key=high))
+            checkpoint = conn.execute(by_name).first()
+        return checkpoint
+
+def backfill(name: str, table: str, statement, *, key: str = "id", batch_size: int = DEFAULT_BATCH_SIZE,
+             throttle: Throttle | None = None, lock_timeout_ms: int | None = None, bind=None):
+    """Run statement over table in key-ranged batches, one transaction each.
+
+    statement is SQL (a string or text()) with :start and :end bind
+    parameters bounding the batch as start <= key < end, or a callable
+    (connection, start, end) returning the number of rows it changed. Keys
+    are integers; the range is fixed when the run first starts, so rows
+    inserted later must be handled by the writer (e.g. a trigger).
+
+    Progress is saved in migration_checkpoints under name in the same
+    transaction as each batch: rerunning after an interruption continues
+    with the next batch, and rerunning a finished backfill does nothing.
+    lock_timeout_ms (PostgreSQL) makes a batch that can't get its row locks
+    in time fail rather than queue other writers behind it. bind defaults to
+    the running migration's connection. Returns the rows changed this run.
+    """
+    if isinstance(statement, str):
+        statement = text(statement)
+    if isinstance(statement, TextClause):
+        sql = statement
+
+        def statement(conn, start, end):
+            return conn.execute(sql, {"start": start, "end": end}).rowcount
+    checkpoints = MigrationCheckpoint.__table__
+    rows = 0
+    with _outside_transaction(bind) as outer:
+        db = _engine(outer)
+        ensure_checkpoint_table(db)
+        checkpoint = _start(db, name, table, key)
+        if checkpoint.finished_at is not None:
+            logger.info("backfill %s already finished", name)
+            return 0
+        start, end_key = checkpoint.next_key, checkpoint.end_key
+        if checkpoint.batches_done:
+            logger.info("backfill %s resuming at %s %s", name, key, start)
+        begun = time.monotonic()
+        with db.connect() as conn:
+            while start is not None and start <= end_key:
+                with conn.begin():
+                    if lock_timeout_ms and conn.dialect.name == "postgresql":
+                        conn.exec_driver_sql(f"SET LOCAL lock_timeout = {int(lock_timeout_ms)}")
+                    end = _batch_end(conn, table, key, start, end_key, batch_size)
+                    changed = statement(conn, start, end) or 0
+                    conn.execute(
+                        update(checkpoints)
+                        .where(checkpoints.c.name == name)
+                        .values(
+                            next_key=end,
+                            rows_done=checkpoints.c.rows_done + changed,
+                            batches_done=checkpoints.c.batches_done + 1,
+                            updated_at=func.now(),
+                        )
+                    )
+                rows += changed
+                start = end
+                if throttle is not None:
+                    throttle.wait(conn, changed)
+            with conn.begin():
+                conn.execute(update(checkpoints).where(checkpoints.c.name == name).values(finished_at=func.now(), updated_at=func.now()))
+    logger.info("backfill %s done: %s rows in %.1fs", name, rows, time.monotonic() - begun)
+    return rows
+
+def _index_state(conn, name):
+    # None if absent, else whether PostgreSQL considers it valid; a failed
+    # CREATE INDEX CONCURRENTLY leaves an invalid index behind.
+    return conn.execute(text(
+        "SELECT i.indisvalid FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid "
+        "WHERE c.relname = :name AND pg_table_is_visible(c.oid)"
+    ), {"name": name}).scalar()
+
+def create_index_concurrently(name: str, table: str, columns: str, *, where: str | None = None,
+                              unique: bool = False, bind=None):
+    """CREATE INDEX CONCURRENTLY outside the migration's transaction.
+
+    columns is the index's column list or expressions as SQL. An index of
+    that name left invalid by an interrupted build is dropped and rebuilt;
+    a valid one is kept. Other databases get a plain CREATE INDEX IF NOT
+    EXISTS.
+    """
+    unique_sql = "UNIQUE " if unique else ""
+    where_sql = f" WHERE {where}" if where else ""
+    with _outside_transaction(bind) as outer:
+        with _engine(outer).connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            if conn.dialect.name != "postgresql":
+                conn.execute(text(f"CREATE {unique_sql}INDEX IF NOT EXISTS {name} ON {table} ({columns}){where_sql}"))
+                return
+            state = _index_state(conn, name)
+            if state:
+                logger.info("index %s already exists", name)
+                return
+            if state is not None:
+                logger.info("dropping invalid index %s left by an earlier build", name)
+                conn.execute(text(f"DROP INDEX CONCURRENTLY {name}"))
+            conn.execute(text(f"CREATE {unique_sql}INDEX CONCURRENTLY {name} ON {table} ({columns}){where_sql}"))
+
+def drop_index_concurrently(name: str, *, bind=None):
+    with _outside_transaction(bind) as outer:
+        with _engine(outer).connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            concurrently = "CONCURRENTLY " if conn.dialect.name == "postgresql" else ""
+            conn.execute(text(f"DROP INDEX {concurrently}IF EXISTS {name}"))
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Inspect or reset batched backfill checkpoints.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("status", help="list checkpoints")
+    reset = commands.add_parser("reset", help="forget a checkpoint so the backfill starts over")
+    reset.add_argument("name")
+    args = parser.parse_args(argv)
+    ensure_checkpoint_table(engine)
+    if args.command == "reset":
+        deleted = reset_checkpoints(args.name, bind=engine)
+        print(f"reset {args.name}" if deleted else f"no checkpoint named {args.name}")
+        return 0 if deleted else 1
+    checkpoints = MigrationCheckpoint.__table__
+    with engine.connect() as conn:
+        for row in conn.execute(select(checkpoints).order_by(checkpoints.c.started_at)):
+            state = "done" if row.finished_at else f"next {row.next_key} of {row.end_key}"
+            print(f"{row.name}: {row.table_name}, {row.rows_done} rows in {row.batches_done} batches, {state}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
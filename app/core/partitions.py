@@ -0,0 +1,110 @@
+import argparse
+import logging
+import re
+from datetime import date, datetime
+from sqlalchemy import text
+from app.core.database import engine
+
+logger = logging.getLogger(__name__)
+
+# Range-partitioned by month on created_at; see the
+# partition_logs_and_audit_trails migration.
+PARTITIONED_TABLES = ("communication_logs", "audit_trails")
+ARCHIVE_SCHEMA = "archive"
+
+_PARTITION_NAME = re.compile(r"^(?P<table>\w+)_y(?P<year>\d{4})m(?P<month>\d{2})$")
+
+def month_start(value: date) -> date:
+    return date(value.year, value.month, 1)
+
+def add_months(value: date, months: int) -> date:
+    index = value.year * 12 + value.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+def partition_name(table: str, month: date) -> str:
+    return f"{table}_y{month.year:04d}m{month.month:02d}"
+
+def create_partition(conn, table: str, month: date):
+    month = month_start(month)
+    conn.execute(text(
+        f"CREATE TABLE IF NOT EXISTS {partition_name(table, month)} PARTITION OF {table} "
+        f"FOR VALUES FROM ('{month.isoformat()}') TO ('{add_months(month, 1).isoformat()}')"
+    ))
+
+def list_partitions(conn, table: str):
+    rows = conn.execute(text(
+        "SELECT c.relname FROM pg_inherits i "
+        "JOIN pg_class c ON c.oid = i.inhrelid "
+        "JOIN pg_class p ON p.oid = i.inhparent "
+        "WHERE p.relname = :table AND p.relnamespace = 'public'::regnamespace"
+    ), {"table": table}).scalars()
+    partitions = {}
+    for name in rows:
+        match = _PARTITION_NAME.match(name)
+        if match and match["table"] == table:
+            partitions[date(int(match["year"]), int(match["month"]), 1)] = name
+    return dict(sorted(partitions.items()))
+
+def is_partition(name: str) -> bool:
+    match = _PARTITION_NAME.match(name)
+    if match:
+        return match["table"] in PARTITIONED_TABLES
+    return any(name == f"{table}_default" for table in PARTITIONED_TABLES)
+
+def include_object(obj, name, type_, reflected, compare_to):
+    # Alembic autogenerate hook. The partitions only exist in the database
+    # (the maintenance command creates them), so they are never proposed for
+    # dropping. The parents' (id, created_at) primary key isn't compared
+    # either: autogenerate leaves primary keys alone, and the models keep
+    # the single-column id.
+    return not (type_ == "table" and reflected and is_partition(name))
+
+def ensure_partitions(conn, table: str, months_ahead: int = 3, today: date | None = None):
+    # Pre-create next months' partitions so inserts never land in the
+    # default partition; a non-empty default makes adding a partition for
+    # that range fail.
+    current = month_start(today or datetime.utcnow().date())
+    created = []
+    existing = list_partitions(conn, table)
+    for offset in range(months_ahead + 1):
+        month = add_months(current, offset)
+        if month not in existing:
+            create_partition(conn, table, month)
+            created.append(partition_name(table, month))
+    return created
+
+def detach_old_partitions(conn, table: str, retain_months: int = 24, today: date | None = None,
+                          archive_schema: str = ARCHIVE_SCHEMA):
+    # Detached partitions move to the archive schema as ordinary tables, where
+    # they can be dumped and dropped without touching the live table.
+    cutoff = add_months(month_start(today or datetime.utcnow().date()), -retain_months)
+    detached = []
+    conn.execute(text(f"CREATE SCHEMA IF NOT EXISTS {archive_schema}"))
+    for month, name in list_partitions(conn, table).items():
+        if add_months(month, 1) > cutoff:
+            continue
+        conn.execute(text(f"ALTER TABLE {table} DETACH PARTITION {name}"))
+        conn.execute(text(f"ALTER TABLE {name} SET SCHEMA {archive_schema}"))
+        detached.append(name)
+    return detached
+
+def maintain(bind=engine, months_ahead: int = 3, retain_months: int = 24, today: date | None = None):
+    report = {}
+    for table in PARTITIONED_TABLES:
+        with bind.begin() as conn:
+            created = ensure_partitions(conn, table, months_ahead, today)
+            detached = detach_old_partitions(conn, table, retain_months, today)
+        report[table] = {"created": created, "detached": detached}
+        logger.info("%s: created %s, detached %s", table, created, detached)
+    return report
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Create upcoming and archive expired monthly partitions.")
+    parser.add_argument("--months-ahead", type=int, default=3)
+    parser.add_argument("--retain-months", type=int, default=24)
+    args = parser.parse_args(argv)
+    for table, changes in maintain(months_ahead=args.months_ahead, retain_months=args.retain_months).items():
+        print(f"{table}: created {changes['created'] or '-'}, detached {changes['detached'] or '-'}")
+
+if __name__ == "__main__":
+    main()
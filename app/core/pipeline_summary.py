@@ -0,0 +1,123 @@
+import argparse
+import logging
+import sys
+from contextlib import contextmanager
+from decimal import Decimal
+from sqlalchemy import Connection, event, func, select, delete, insert, literal_column, cast, String
+from app.core.database import Base, engine
+from app.core.pipeline_summary_ddl import trigger_ddl
+from app.models.application import Application
+from app.models.application_status_count import ApplicationStatusCount
+
+logger = logging.getLogger(__name__)
+
+# application_status_counts holds count and sum(loan_amount) of live
+# (deleted_at IS NULL) applications per (organization_id, status). Triggers
+# on applications apply deltas, so every write path is covered: the
+# repositories, ORM attribute changes, bulk inserts, COPY and the set-based
+# soft deletes and cascades. On PostgreSQL they are statement-level triggers
+# over transition tables, so a 10k-row bulk insert costs one aggregate, not
+# 10k upserts; upserts run in key order so concurrent writers lock summary
+# rows in the same order. The trigger DDL is versioned in
+# app.core.pipeline_summary_ddl; see the application_status_counts migration.
+
+def install_triggers(connection):
+    for statement in trigger_ddl(connection.dialect.name):
+        connection.exec_driver_sql(statement)
+
+@event.listens_for(Base.metadata, "after_create")
+def _after_create(metadata, connection, **kw):
+    names = {table.name for table in kw.get("tables") or ()}
+    if {"applications", "application_status_counts"} & names:
+        install_triggers(connection)
+
+def _live_aggregate(org_id: int | None = None):
+    # An inline literal keeps the grouped and selected expressions identical;
+    # the cast because '' is not a label of the application_status enum.
+    status = func.coalesce(cast(Application.application_status, String), literal_column("''"))
+    stmt = (
+        select(
+            Application.organization_id,
+            status.label("status"),
+            func.count().label("count"),
+            func.coalesce(func.sum(Application.loan_amount), 0).label("sum_amount"),
+        )
+        .where(Application.deleted_at.is_(None))
+        .group_by(Application.organization_id, status)
+    )
+    if org_id is not None:
+        stmt = stmt.where(Application.organization_id == org_id)
+    return stmt
+
+def _lock(conn):
+    # Blocks application writes (not reads) until the rebuild commits, so no
+    # trigger delta lands between the delete and the re-aggregate.
+    if conn.dialect.name == "postgresql":
+        conn.exec_driver_sql("LOCK TABLE applications IN SHARE MODE")
+
+def rebuild(bind=engine, org_id: int | None = None):
+    summary = ApplicationStatusCount.__table__
+    with bind.begin() as conn:
+        _lock(conn)
+        stmt = delete(summary)
+        if org_id is not None:
+            stmt = stmt.where(summary.c.organization_id == org_id)
+        conn.execute(stmt)
+        aggregate = _live_aggregate(org_id)
+        rows = conn.execute(
+            insert(summary).from_select(["organization_id", "status", "count", "sum_amount"], aggregate)
+        ).rowcount
+    logger.info("rebuilt application_status_counts: %s rows", rows)
+    return rows
+
+def _amount(value):
+    # SQLite sums Numeric as floating point; compare to the cent.
+    return Decimal(str(value or 0)).quantize(Decimal("0.01"))
+
+@contextmanager
+def _connected(bind):
+    # A Connection is used as given, in its transaction, so check() also sees
+    # writes that aren't committed yet (e.g. in a test).
+    if isinstance(bind, Connection):
+        yield bind
+        return
+    with bind.connect() as conn:
+        yield conn
+
+def check(bind=engine, org_id: int | None = None):
+    """(organization_id, status, summary, fresh) for every key that differs."""
+    summary = ApplicationStatusCount.__table__
+    with _connected(bind) as conn:
+        stmt = select(summary.c.organization_id, summary.c.status, summary.c.count, summary.c.sum_amount)
+        if org_id is not None:
+            stmt = stmt.where(summary.c.organization_id == org_id)
+        kept = {(r.organization_id, r.status): (r.count, _amount(r.sum_amount)) for r in conn.execute(stmt)}
+        fresh = {(r.organization_id, r.status): (r.count, _amount(r.sum_amount)) for r in conn.execute(_live_aggregate(org_id))}
+    zero = (0, _amount(0))
+    return [
+        (key[0], key[1], kept.get(key, zero), fresh.get(key, zero))
+        for key in sorted(kept.keys() | fresh.keys())
+        if kept.get(key, zero) != fresh.get(key, zero)
+    ]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Rebuild or verify application_status_counts.")
+    parser.add_argument("command", choices=("rebuild", "check", "reconcile"),
+                        help="reconcile rebuilds only when check finds drift")
+    parser.add_argument("--org", type=int, default=None, help="limit to one organization")
+    args = parser.parse_args(argv)
+    if args.command == "rebuild":
+        print(f"rebuilt {rebuild(org_id=args.org)} rows")
+        return 0
+    drift = check(org_id=args.org)
+    for org, status, kept, fresh in drift:
+        print(f"org {org} status {status!r}: summary {kept[0]} / {kept[1]}, actual {fresh[0]} / {fresh[1]}")
+    if args.command == "check":
+        print(f"{len(drift)} mismatched row(s)")
+        return 1 if drift else 0
+    if drift:
+        print(f"rebuilt {rebuild(org_id=args.org)} rows")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
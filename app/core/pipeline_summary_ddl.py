@@ -0,0 +1,117 @@
+# Trigger DDL for application_status_counts, by version. The migrations
+# install the version they shipped and app.core.pipeline_summary installs
+# CURRENT from create_all, so both read the same text. A released version is
+# frozen: changing the triggers means a new version here plus a migration
+# that installs it, never an edit to an old one.
+#
+#   1  application_status is varchar (application_status_counts migration)
+#   2  application_status is an enum, cast to text (compact_column_types)
+
+CURRENT = 2
+
+# Frozen template; only the status expression differs between versions.
+_PG_FUNCTION = """
+CREATE OR REPLACE FUNCTION application_status_counts_apply() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        INSERT INTO application_status_counts AS s (organization_id, status, count, sum_amount)
+        SELECT organization_id, coalesce({status}, ''), count(*), coalesce(sum(loan_amount), 0)
+        FROM new_rows WHERE deleted_at IS NULL
+        GROUP BY 1, 2 ORDER BY 1, 2
+        ON CONFLICT (organization_id, status) DO UPDATE
+        SET count = s.count + EXCLUDED.count, sum_amount = s.sum_amount + EXCLUDED.sum_amount;
+    ELSIF TG_OP = 'DELETE' THEN
+        INSERT INTO application_status_counts AS s (organization_id, status, count, sum_amount)
+        SELECT organization_id, coalesce({status}, ''), -count(*), -coalesce(sum(loan_amount), 0)
+        FROM old_rows WHERE deleted_at IS NULL
+        GROUP BY 1, 2 ORDER BY 1, 2
+        ON CONFLICT (organization_id, status) DO UPDATE
+        SET count = s.count + EXCLUDED.count, sum_amount = s.sum_amount + EXCLUDED.sum_amount;
+    ELSE
+        INSERT INTO application_status_counts AS s (organization_id, status, count, sum_amount)
+        SELECT organization_id, status, sum(n), sum(amount)
+        FROM (
+            SELECT organization_id, coalesce({status}, '') AS status, 1 AS n, coalesce(loan_amount, 0) AS amount
+            FROM new_rows WHERE deleted_at IS NULL
+            UNION ALL
+            SELECT organization_id, coalesce({status}, ''), -1, -coalesce(loan_amount, 0)
+            FROM old_rows WHERE deleted_at IS NULL
+        ) delta
+        GROUP BY 1, 2 HAVING sum(n) <> 0 OR sum(amount) <> 0 ORDER BY 1, 2
+        ON CONFLICT (organization_id, status) DO UPDATE
+        SET count = s.count + EXCLUDED.count, sum_amount = s.sum_amount + EXCLUDED.sum_amount;
+    END IF;
+    RETURN NULL;
+END
+$$
+"""
+
+PG_FUNCTION = {
+    1: _PG_FUNCTION.format(status="application_status"),
+    2: _PG_FUNCTION.format(status="application_status::text"),
+}
+
+# Statement-level over transition tables, which can't be shared by a trigger
+# on several events. Unchanged since version 1.
+PG_TRIGGERS = [
+    ("insert", "INSERT", "REFERENCING NEW TABLE AS new_rows"),
+    ("update", "UPDATE", "REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows"),
+    ("delete", "DELETE", "REFERENCING OLD TABLE AS old_rows"),
+]
+
+SQLITE_COLUMNS = "organization_id, application_status, loan_amount, deleted_at"
+
+# Row-level only on SQLite; the two UPDATE triggers each apply one side.
+# Unchanged since version 1 (the column stays VARCHAR there).
+SQLITE_TRIGGERS = [
+    ("ai", "INSERT", "new", "+"),
+    ("ad", "DELETE", "old", "-"),
+    ("au_old", f"UPDATE OF {SQLITE_COLUMNS}", "old", "-"),
+    ("au_new", f"UPDATE OF {SQLITE_COLUMNS}", "new", "+"),
+]
+
+def _pg_ddl(version):
+    statements = [PG_FUNCTION[version]]
+    for name, event_name, referencing in PG_TRIGGERS:
+        statements.append(f"DROP TRIGGER IF EXISTS applications_status_counts_{name} ON applications")
+        statements.append(
+            f"CREATE TRIGGER applications_status_counts_{name} AFTER {event_name} ON applications "
+            f"{referencing} FOR EACH STATEMENT EXECUTE FUNCTION application_status_counts_apply()"
+        )
+    return statements
+
+def _sqlite_trigger(name, event_name, row, sign):
+    status = f"coalesce({row}.application_status, '')"
+    return (
+        f"CREATE TRIGGER IF NOT EXISTS applications_status_counts_{name} AFTER {event_name} ON applications "
+        f"WHEN {row}.deleted_at IS NULL BEGIN "
+        f"INSERT OR IGNORE INTO application_status_counts (organization_id, status, count, sum_amount) "
+        f"VALUES ({row}.organization_id, {status}, 0, 0); "
+        f"UPDATE application_status_counts SET count = count {sign} 1, "
+        f"sum_amount = sum_amount {sign} coalesce({row}.loan_amount, 0) "
+        f"WHERE organization_id = {row}.organization_id AND status = {status}; END"
+    )
+
+def _sqlite_ddl(version):
+    return [_sqlite_trigger(*trigger) for trigger in SQLITE_TRIGGERS]
+
+_DDL = {
+    "postgresql": _pg_ddl,
+    "sqlite": _sqlite_ddl,
+}
+
+def trigger_ddl(dialect: str, version: int = CURRENT):
+    """Statements that install (or replace) the triggers for a dialect."""
+    if version not in PG_FUNCTION:
+        raise ValueError(f"unknown pipeline summary DDL version: {version!r}")
+    return _DDL[dialect](version) if dialect in _DDL else []
+
+def drop_ddl(dialect: str):
+    if dialect == "postgresql":
+        return [
+            *(f"DROP TRIGGER IF EXISTS applications_status_counts_{name} ON applications" for name, _, _ in PG_TRIGGERS),
+            "DROP FUNCTION IF EXISTS application_status_counts_apply()",
+        ]
+    if dialect == "sqlite":
+        return [f"DROP TRIGGER IF EXISTS applications_status_counts_{name}" for name, _, _, _ in SQLITE_TRIGGERS]
+    return []
@@ -0,0 +1,116 @@
+import threading
+import time
+from sqlalchemy import event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+# Snapshot fields that only ever increase; the rest are current or peak values.
+POOL_COUNTERS = frozenset({
+    "connects", "checkouts", "checkins", "invalidations", "timeouts",
+    "wait_seconds_total", "hold_seconds_total",
+})
+
+class PoolMetrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.connects = 0
+            self.checkouts = 0
+            self.checkins = 0
+            self.invalidations = 0
+            self.timeouts = 0
+            self.checked_out = 0
+            self.max_checked_out = 0
+            self.wait_seconds_total = 0.0
+            self.wait_seconds_max = 0.0
+            self.hold_seconds_total = 0.0
+            self.hold_seconds_max = 0.0
+
+    def record_wait(self, seconds):
+        with self._lock:
+            self.wait_seconds_total += seconds
+            self.wait_seconds_max = max(self.wait_seconds_max, seconds)
+
+    def record_timeout(self):
+        with self._lock:
+            self.timeouts += 1
+
+    def attach(self, engine):
+        event.listen(engine.pool, "connect", self._on_connect)
+        event.listen(engine.pool, "checkout", self._on_checkout)
+        event.listen(engine.pool, "checkin", self._on_checkin)
+        event.listen(engine.pool, "invalidate", self._on_invalidate)
+
+    def _on_connect(self, dbapi_connection, connection_record):
+        with self._lock:
+            self.connects += 1
+
+    def _on_checkout(self, dbapi_connection, connection_record, connection_proxy):
+        connection_record.info["checked_out_at"] = time.perf_counter()
+        with self._lock:
+            self.checkouts += 1
+            self.checked_out += 1
+            self.max_checked_out = max(self.max_checked_out, self.checked_out)
+
+    def _on_checkin(self, dbapi_connection, connection_record):
+        started = connection_record.info.pop("checked_out_at", None)
+        with self._lock:
+            self.checkins += 1
+            self.checked_out = max(self.checked_out - 1, 0)
+            if started is not None:
+                held = time.perf_counter() - started
+                self.hold_seconds_total += held
+                self.hold_seconds_max = max(self.hold_seconds_max, held)
+
+    def _on_invalidate(self, dbapi_connection, connection_record, exception):
+        with self._lock:
+            self.invalidations += 1
+
+    def snapshot(self, pool=None):
+        with self._lock:
+            data = {
+                "connects": self.connects,
+                "checkouts": self.checkouts,
+                "checkins": self.checkins,
+                "invalidations": self.invalidations,
+                "timeouts": self.timeouts,
+                "checked_out": self.checked_out,
+                "max_checked_out": self.max_checked_out,
+                "wait_seconds_total": self.wait_seconds_total,
+                "wait_seconds_max": self.wait_seconds_max,
+                "wait_seconds_avg": self.wait_seconds_total / self.checkouts if self.checkouts else 0.0,
+                "hold_seconds_total": self.hold_seconds_total,
+                "hold_seconds_max": self.hold_seconds_max,
+                "hold_seconds_avg": self.hold_seconds_total / self.checkins if self.checkins else 0.0,
+            }
+        if pool is not None and isinstance(pool, QueuePool):
+            data["pool_size"] = pool.size()
+            data["pool_checked_in"] = pool.checkedin()
+            data["pool_overflow"] = pool.overflow()
+        return data
+
+pool_metrics = PoolMetrics()
+
+class _Metered:
+    # The pool events fire only once a connection has been handed out, so the
+    # time spent queueing for a free slot is measured around connect() itself.
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            return super().connect()
+        except PoolTimeoutError:
+            pool_metrics.record_timeout()
+            raise
+        finally:
+            pool_metrics.record_wait(time.perf_counter() - start)
+
+class MeteredQueuePool(_Metered, QueuePool):
+    pass
+
+class MeteredAsyncAdaptedQueuePool(_Metered, AsyncAdaptedQueuePool):
+    # For async engines; connect() runs in SQLAlchemy's greenlet, so the wait
+    # measured is the time the coroutine spent awaiting a connection.
+    pass
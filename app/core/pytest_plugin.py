@@ -0,0 +1,36 @@
+# Fixtures over app.core.test_db. Enable with `pytest -p app.core.pytest_plugin`
+# or `pytest_plugins = ["app.core.pytest_plugin"]` in a conftest.py:
+#
+#     def test_create(db_session):
+#         org = organization_repository.create_organization(db_session, ...)
+#         db_session.commit()
+#
+# TEST_DATABASE_URL picks the database (see app.core.test_db).
+
+import pytest
+from app.core.test_db import async_rollback_session, async_savepoint_engine, clone_database, drop_clone, rollback_session
+
+@pytest.fixture(scope="session")
+def db_engine():
+    """An engine on this run's (or xdist worker's) clone of the test schema."""
+    engine = clone_database()
+    yield engine
+    drop_clone(engine)
+
+@pytest.fixture
+def db_session(db_engine):
+    """A Session whose writes are rolled back after the test."""
+    with rollback_session(db_engine) as session:
+        yield session
+
+@pytest.fixture(scope="session")
+def async_db_engine(db_engine):
+    engine = async_savepoint_engine(db_engine)
+    yield engine
+    engine.sync_engine.dispose()
+
+@pytest.fixture
+async def async_db_session(async_db_engine):
+    # Needs an async test runner (e.g. pytest-asyncio in auto mode).
+    async with async_rollback_session(async_db_engine) as session:
+        yield session
@@ -0,0 +1,372 @@
+import contextvars
+import functools
+import inspect
+import json
+import logging
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from sqlalchemy import event
+from app.core.pool_metrics import POOL_COUNTERS, pool_metrics
+
+logger = logging.getLogger("app.sql.slow")
+
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+MAX_STATEMENTS = 1000
+OTHER_STATEMENT = "<other>"
+
+_current_function = contextvars.ContextVar("current_repository_function", default=None)
+
+_PLACEHOLDER = r"(?:\?|%s|%\(\w+\)s|\$\d+|:\w+|\d+(?:\.\d+)?|'(?:[^']|'')*')"
+_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_PARAM_LIST = re.compile(r"\(\s*" + _PLACEHOLDER + r"(?:\s*,\s*" + _PLACEHOLDER + r")*\s*\)")
+_ROW_LIST = re.compile(r"\(\.\.\.\)(?:\s*,\s*\(\.\.\.\))+")
+_WHITESPACE = re.compile(r"\s+")
+_SELECT = re.compile(r"\s*select\b", re.IGNORECASE)
+
+# Statements come out of SQLAlchemy's compiled cache, so the same string is
+# normalized over and over; expanding IN lists and insertmanyvalues batches are
+# what would otherwise give every call its own label.
+@functools.lru_cache(maxsize=4096)
+def normalize(statement):
+    statement = _WHITESPACE.sub(" ", statement).strip()
+    statement = _PARAM_LIST.sub("(...)", statement)
+    statement = _ROW_LIST.sub("(...)", statement)
+    return _LITERALS.sub("?", statement)
+
+class Histogram:
+    __slots__ = ("counts", "count", "sum", "max")
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds):
+        index = 0
+        while index < len(BUCKETS) and seconds > BUCKETS[index]:
+            index += 1
+        self.counts[index] += 1
+        self.count += 1
+        self.sum += seconds
+        self.max = max(self.max, seconds)
+
+    def cumulative(self):
+        total = 0
+        for bound, count in zip(BUCKETS + (float("inf"),), self.counts):
+            total += count
+            yield bound, total
+
+    def snapshot(self):
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "max": self.max,
+            "avg": self.sum / self.count if self.count else 0.0,
+            "buckets": {_format_bound(bound): total for bound, total in self.cumulative()},
+        }
+
+class _Stats:
+    __slots__ = ("latency", "rows", "statements", "errors")
+
+    def __init__(self):
+        self.latency = Histogram()
+        self.rows = 0
+        self.statements = 0
+        self.errors = 0
+
+    def snapshot(self):
+        data = self.latency.snapshot()
+        data.update(rows=self.rows, statements=self.statements, errors=self.errors)
+        return data
+
+class QueryMetrics:
+    def __init__(self, slow_query_ms=500, explain="off"):
+        self._lock = threading.Lock()
+        self.slow_query_ms = slow_query_ms
+        # "off", "plan" (EXPLAIN) or "analyze" (EXPLAIN ANALYZE, plain SELECTs only).
+        self.explain = explain
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.statements = {}
+            self.functions = {}
+            self.slow_queries = 0
+            self.compiled_cache = {}
+
+    def attach(self, engine):
+        event.listen(engine, "before_cursor_execute", self._before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", self._after_cursor_execute)
+        event.listen(engine, "handle_error", self._handle_error)
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_start_time"].pop()
+        # Only rows written by INSERT/UPDATE/DELETE: for a SELECT (or anything
+        # with RETURNING) rowcount is -1 or 0 on SQLite and meaningless for a
+        # streamed result, and the rows haven't been fetched yet at this point.
+        rows = 0
+        if cursor.description is None and cursor.rowcount is not None and cursor.rowcount > 0:
+            rows = cursor.rowcount
+        key = normalize(statement)
+        function = _current_function.get()
+        # How SQLAlchemy got the compiled form: "cache_hit", "cache_miss",
+        # "no_cache_key" (textual SQL, uncacheable constructs), ...
+        cache = context.cache_hit.name.lower() if context is not None else "no_cache_key"
+        with self._lock:
+            self.compiled_cache[cache] = self.compiled_cache.get(cache, 0) + 1
+            stats = self._statement_stats(key)
+            stats.latency.observe(elapsed)
+            stats.statements += 1
+            stats.rows += rows
+            if function is not None:
+                self._function_stats(function).statements += 1
+        if elapsed * 1000 >= self.slow_query_ms:
+            self._log_slow(conn, cursor, statement, parameters, executemany, key, function, elapsed)
+
+    def _handle_error(self, exception_context):
+        conn = exception_context.connection
+        if conn is None or not conn.info.get("query_start_time"):
+            return
+        conn.info["query_start_time"].pop()
+        if exception_context.statement is None:
+            return
+        with self._lock:
+            self._statement_stats(normalize(exception_context.statement)).errors += 1
+
+    def _statement_stats(self, key):
+        stats = self.statements.get(key)
+        if stats is None:
+            if len(self.statements) >= MAX_STATEMENTS:
+                key = OTHER_STATEMENT
+            stats = self.statements.setdefault(key, _Stats())
+        return stats
+
+    def _function_stats(self, name):
+        stats = self.functions.get(name)
+        if stats is None:
+            stats = self.functions[name] = _Stats()
+        return stats
+
+    def _log_slow(self, conn, cursor, statement, parameters, executemany, key, function, elapsed):
+        with self._lock:
+            self.slow_queries += 1
+        plan = None
+        if self.explain != "off" and not executemany and not conn.dialect.is_async:
+            plan = self._explain(conn, cursor, statement, parameters)
+        logger.warning(
+            "slow query %.1fms function=%s statement=%s%s",
+            elapsed * 1000, function, key, f"\n{plan}" if plan else "",
+        )
+
+    def _explain(self, conn, cursor, statement, parameters):
+        # Runs on the raw DBAPI connection so no cursor events fire for it, and
+        # inside the same transaction so it sees the same snapshot. Postgres
+        # gets a savepoint so a failing EXPLAIN can't abort the caller's work.
+        if conn.dialect.name == "sqlite":
+            prefix, savepoint = "EXPLAIN QUERY PLAN ", False
+        elif conn.dialect.name == "postgresql":
+            prefix, savepoint = self._postgresql_explain(statement), True
+        else:
+            return None
+        explain_cursor = cursor.connection.cursor()
+        try:
+            if savepoint:
+                explain_cursor.execute("SAVEPOINT query_metrics_explain")
+            try:
+                explain_cursor.execute(prefix + statement, parameters)
+                plan = "\n".join(" ".join(str(column) for column in row) for row in explain_cursor.fetchall())
+            except Exception as exc:
+                if savepoint:
+                    explain_cursor.execute("ROLLBACK TO SAVEPOINT query_metrics_explain")
+                return f"EXPLAIN failed: {exc}"
+            if savepoint:
+                explain_cursor.execute("ROLLBACK TO SAVEPOINT query_metrics_explain")
+                explain_cursor.execute("RELEASE SAVEPOINT query_metrics_explain")
+            return plan
+        finally:
+            explain_cursor.close()
+
+    def _postgresql_explain(self, statement):
+        # ANALYZE executes the statement a second time, so it is kept to plain
+        # SELECTs. A WITH can hide an INSERT/UPDATE/DELETE in any of its
+        # parts and only gets the plan; either way the savepoint is rolled
+        # back afterwards.
+        if self.explain == "analyze" and _SELECT.match(statement):
+            return "EXPLAIN (ANALYZE, BUFFERS) "
+        return "EXPLAIN "
+
+    def record_call(self, name, seconds, rows, failed):
+        with self._lock:
+            stats = self._function_stats(name)
+            stats.latency.observe(seconds)
+            stats.rows += rows
+            stats.errors += failed
+
+    def snapshot(self, pool=None):
+        with self._lock:
+            return {
+                "statements": {key: stats.snapshot() for key, stats in self.statements.items()},
+                "functions": {name: stats.snapshot() for name, stats in self.functions.items()},
+                "slow_queries": self.slow_queries,
+                "compiled_cache": dict(self.compiled_cache),
+                "pool": pool_metrics.snapshot(pool),
+            }
+
+    def to_json(self, pool=None):
+        return json.dumps(self.snapshot(pool), indent=2, default=str)
+
+    def to_prometheus(self, pool=None):
+        data = self.snapshot(pool)
+        lines = []
+        _histogram(lines, "app_sql_statement_seconds", "Statement latency by normalized SQL.", "statement", self.statements, self._lock)
+        _counter(lines, "app_sql_statement_rows_total", "Rows written by INSERT/UPDATE/DELETE per normalized SQL.", "statement", data["statements"], "rows")
+        _counter(lines, "app_sql_statement_errors_total", "Failed executions per normalized SQL.", "statement", data["statements"], "errors")
+        _histogram(lines, "app_repository_call_seconds", "Repository function latency.", "function", self.functions, self._lock)
+        _counter(lines, "app_repository_statements_total", "Statements issued per repository function.", "function", data["functions"], "statements")
+        _counter(lines, "app_repository_rows_total", "Rows returned per repository function.", "function", data["functions"], "rows")
+        _counter(lines, "app_repository_errors_total", "Repository calls that raised.", "function", data["functions"], "errors")
+        lines.append("# TYPE app_sql_slow_queries_total counter")
+        lines.append(f"app_sql_slow_queries_total {data['slow_queries']}")
+        lines.append("# HELP app_sql_compiled_cache_total Executions by SQLAlchemy compiled-cache outcome.")
+        lines.append("# TYPE app_sql_compiled_cache_total counter")
+        for outcome, count in data["compiled_cache"].items():
+            lines.append(f'app_sql_compiled_cache_total{{outcome="{outcome}"}} {count}')
+        for name, value in data["pool"].items():
+            if name in POOL_COUNTERS:
+                metric = name if name.endswith("_total") else f"{name}_total"
+                lines.append(f"# TYPE app_db_pool_{metric} counter")
+            else:
+                metric = name
+                lines.append(f"# TYPE app_db_pool_{metric} gauge")
+            lines.append(f"app_db_pool_{metric} {value}")
+        return "\n".join(lines) + "\n"
+
+def _format_bound(bound):
+    return "+Inf" if bound == float("inf") else repr(bound)
+
+def _escape(value):
+    return value.replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+def _histogram(lines, metric, help_text, label, stats_by_key, lock):
+    lines.append(f"# HELP {metric} {help_text}")
+    lines.append(f"# TYPE {metric} histogram")
+    with lock:
+        for key, stats in stats_by_key.items():
+            labels = f'{label}="{_escape(key)}"'
+            for bound, total in stats.latency.cumulative():
+                lines.append(f'{metric}_bucket{{{labels},le="{_format_bound(bound)}"}} {total}')
+            lines.append(f"{metric}_sum{{{labels}}} {stats.latency.sum}")
+            lines.append(f"{metric}_count{{{labels}}} {stats.latency.count}")
+
+def _counter(lines, metric, help_text, label, snapshots, field):
+    lines.append(f"# HELP {metric} {help_text}")
+    lines.append(f"# TYPE {metric} counter")
+    for key, data in snapshots.items():
+        lines.append(f'{metric}{{{label}="{_escape(key)}"}} {data[field]}')
+
+def _result_rows(result):
+    if result is None:
+        return 0
+    if isinstance(result, bool):
+        return int(result)
+    if isinstance(result, int):
+        return result
+    if isinstance(result, dict):
+        values = list(result.values())
+        return sum(values) if all(isinstance(value, int) for value in values) else len(values)
+    # Page and ApplicationBundle are NamedTuples, so they are told apart
+    # from plain tuples first.
+    items = getattr(result, "items", None)
+    if isinstance(items, list):
+        return len(items)
+    if hasattr(result, "_fields"):
+        # A bundle counts its entity and the rows of its child lists; cursors
+        # and other scalars aren't rows.
+        return sum(
+            len(value) if isinstance(value, list) else 1
+            for value in result
+            if value is not None and not isinstance(value, (str, bytes, int, float))
+        )
+    if isinstance(result, (list, tuple, set)):
+        return len(result)
+    return 1
+
+def instrument(fn, metrics=None):
+    name = f"{fn.__module__.rsplit('.', 1)[-1]}.{fn.__name__}"
+
+    if inspect.iscoroutinefunction(fn):
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            token = _current_function.set(name)
+            start = time.perf_counter()
+            result, failed = None, True
+            try:
+                result = await fn(*args, **kwargs)
+                failed = False
+                return result
+            finally:
+                (metrics or query_metrics).record_call(name, time.perf_counter() - start, _result_rows(result), failed)
+                _current_function.reset(token)
+    else:
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            token = _current_function.set(name)
+            start = time.perf_counter()
+            result, failed = None, True
+            try:
+                result = fn(*args, **kwargs)
+                failed = False
+                return result
+            finally:
+                (metrics or query_metrics).record_call(name, time.perf_counter() - start, _result_rows(result), failed)
+                _current_function.reset(token)
+    return wrapper
+
+def instrument_module(namespace):
+    # Wraps the public functions a repository module defines (not the ones it
+    # imports); generators are skipped since only their creation would be timed.
+    for name, value in list(namespace.items()):
+        if (
+            not name.startswith("_")
+            and inspect.isfunction(value)
+            and value.__module__ == namespace["__name__"]
+            and not inspect.isgeneratorfunction(value)
+            and not inspect.isasyncgenfunction(value)
+        ):
+            namespace[name] = instrument(value)
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    metrics = None
+    pool = None
+
+    def do_GET(self):
+        if self.path.rstrip("/") == "/metrics":
+            body, content_type = self.metrics.to_prometheus(self.pool), "text/plain; version=0.0.4"
+        elif self.path.rstrip("/") == "/metrics.json":
+            body, content_type = self.metrics.to_json(self.pool), "application/json"
+        else:
+            self.send_error(404)
+            return
+        payload = body.encode()
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+def start_metrics_server(port, host="127.0.0.1", metrics=None, pool=None):
+    handler = type("MetricsHandler", (_MetricsHandler,), {"metrics": metrics or query_metrics, "pool": pool})
+    server = ThreadingHTTPServer((host, port), handler)
+    threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True).start()
+    return server
+
+query_metrics = QueryMetrics()
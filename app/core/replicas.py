@@ -0,0 +1,137 @@
+import itertools
+import logging
+import threading
+import time
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+# Zero while the replica has replayed everything it received; otherwise the
+# age of the last replayed transaction. Comparing LSNs first keeps an idle
+# (but fully caught up) replica from looking stale. Not a standby: 0.
+_PG_LAG_SQL = """
+SELECT CASE
+    WHEN NOT pg_is_in_recovery() THEN 0
+    WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+    ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+END
+"""
+
+def replica_lag(connection):
+    if connection.dialect.name != "postgresql":
+        return 0.0
+    return float(connection.exec_driver_sql(_PG_LAG_SQL).scalar())
+
+class ReplicaSet:
+    """Round-robin over replica engines, skipping ones that lag too far.
+
+    Lag is probed at most every check_interval seconds per replica, on
+    probe_engines when given (the async replicas are probed through their
+    sync twins). A replica whose probe fails counts as unhealthy until the
+    next check. With background=True a due probe runs on its own thread and
+    choose() goes with the last known lag, so it never blocks (for event
+    loops); a replica counts as unhealthy until its first probe is back.
+    """
+
+    def __init__(self, engines, max_lag: float = 5.0, check_interval: float = 1.0,
+                 probe=replica_lag, probe_engines=None, clock=time.monotonic, background: bool = False):
+        self.engines = list(engines)
+        self.probe_engines = list(probe_engines) if probe_engines is not None else self.engines
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+        self.probe = probe
+        self.clock = clock
+        self.background = background
+        self._counter = itertools.count()
+        self._lags = [None] * len(self.engines)
+        self._checked_at = [None] * len(self.engines)
+        self._locks = [threading.Lock() for _ in self.engines]
+
+    def __bool__(self):
+        return bool(self.engines)
+
+    def choose(self):
+        for _ in range(len(self.engines)):
+            index = next(self._counter) % len(self.engines)
+            if self._healthy(index):
+                return self.engines[index]
+        return None
+
+    def _healthy(self, index):
+        checked_at = self._checked_at[index]
+        due = checked_at is None or self.clock() - checked_at >= self.check_interval
+        # Only one caller probes; the others go with the last known lag.
+        if due and self._locks[index].acquire(blocking=False):
+            if self.background:
+                threading.Thread(target=self._refresh, args=(index,), name="replica-lag-probe", daemon=True).start()
+            else:
+                self._refresh(index)
+        lag = self._lags[index]
+        return lag is not None and lag <= self.max_lag
+
+    def _refresh(self, index):
+        # Called with the replica's lock held; releases it.
+        try:
+            self._lags[index] = self._measure(index)
+            self._checked_at[index] = self.clock()
+        finally:
+            self._locks[index].release()
+
+    def _measure(self, index):
+        try:
+            with self.probe_engines[index].connect() as connection:
+                return self.probe(connection)
+        except Exception:
+            logger.warning("replica %s lag check failed", self.engines[index].url, exc_info=True)
+            return None
+
+    def status(self):
+        return [
+            {"url": engine.url.render_as_string(hide_password=True), "lag": lag, "healthy": lag is not None and lag <= self.max_lag}
+            for engine, lag in zip(self.engines, self._lags)
+        ]
+
+class RoutingSession(Session):
+    """Sends plain SELECTs to a replica and everything else to the primary.
+
+    The primary (the session's bind) gets writes, SELECT ... FOR UPDATE,
+    textual statements, anything during flush, and every statement in a
+    transaction after its first write. Once a transaction that wrote ends,
+    reads stay on the primary for replicas.max_lag seconds, so a replica
+    that is allowed to lag can't hide the session's own writes. One replica
+    is picked per transaction. session.execute(..., bind_arguments={"primary":
+    True}) forces the primary for a single statement.
+    """
+
+    def __init__(self, *args, replicas: ReplicaSet | None = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.replicas = replicas
+        self._replica = None
+        self._wrote = False
+        self._primary_until = 0.0
+
+    def get_bind(self, mapper=None, *, clause=None, **kw):
+        primary = super().get_bind(mapper, clause=clause, **kw)
+        if not self.replicas or kw.get("primary"):
+            return primary
+        if self._flushing or not _is_plain_select(clause):
+            self._wrote = True
+            return primary
+        if self._wrote or time.monotonic() < self._primary_until:
+            return primary
+        if self._replica is None:
+            self._replica = self.replicas.choose()
+        return self._replica or primary
+
+def _is_plain_select(clause):
+    return getattr(clause, "is_select", False) and getattr(clause, "_for_update_arg", None) is None
+
+@event.listens_for(RoutingSession, "after_transaction_end")
+def _after_transaction_end(session, transaction):
+    if transaction.parent is not None:
+        return
+    if session._wrote and session.replicas:
+        session._primary_until = time.monotonic() + session.replicas.max_lag
+    session._wrote = False
+    session._replica = None
@@ -0,0 +1,54 @@
+import re
+from sqlalchemy import event
+from app.core.database import Base
+from app.core.search_ddl import BORROWER_NAME_SQL, TABLES, fts_table, search_ddl
+
+# Search columns live outside the ORM models: they are derived from other
+# columns, never written by the application and never worth hydrating. On
+# PostgreSQL they are generated tsvector columns with GIN indexes (plus a
+# pg_trgm index for fuzzy name matching); on SQLite they are FTS5 tables kept
+# in sync by triggers. The DDL is versioned in app.core.search_ddl; see the
+# search_indexes and search_phone_digits migrations.
+
+def create_search_indexes(connection, tables=TABLES):
+    for table in tables:
+        for statement in search_ddl(connection.dialect.name, table):
+            connection.exec_driver_sql(statement)
+
+def drop_search_indexes(connection, tables=TABLES):
+    # The generated columns and their indexes go with the PostgreSQL tables;
+    # only the SQLite FTS tables outlive theirs.
+    if connection.dialect.name != "sqlite":
+        return
+    for table in tables:
+        connection.exec_driver_sql(f"DROP TABLE IF EXISTS {fts_table(table)}")
+
+def _tables(kw):
+    return [table.name for table in kw.get("tables") or () if table.name in TABLES]
+
+@event.listens_for(Base.metadata, "after_create")
+def _after_create(metadata, connection, **kw):
+    create_search_indexes(connection, _tables(kw))
+
+@event.listens_for(Base.metadata, "before_drop")
+def _before_drop(metadata, connection, **kw):
+    drop_search_indexes(connection, _tables(kw))
+
+_TERM = re.compile(r"[\w@.+-]+")
+_PHONE = re.compile(r"[\d\s().+-]*\d{3}[\d\s().+-]*")
+
+def search_terms(q: str):
+    # Something that only looks like a phone number is searched as its
+    # digits, matching how the phone is indexed.
+    q = (q or "").strip()
+    if _PHONE.fullmatch(q):
+        return [re.sub(r"\D", "", q)]
+    return [term.strip(".-+") for term in _TERM.findall(q) if term.strip(".-+")]
+
+def prefix_tsquery(terms) -> str:
+    # Input for to_tsquery: every term must match, each as a prefix so
+    # partially typed names and emails still find the row.
+    return " & ".join(f"'{term}':*" for term in terms)
+
+def fts5_query(terms) -> str:
+    return " ".join('"' + term.replace('"', '""') + '"*' for term in terms)
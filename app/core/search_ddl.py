@@ -0,0 +1,140 @@
+# Search column and index DDL, by version. The migrations install the
+# version they shipped and app.core.search installs CURRENT from create_all,
+# so both read the same text. A released version is frozen: a change means a
+# new version here plus a migration that installs it, never an edit to an
+# old one.
+#
+#   1  tsvector columns with GIN indexes on PostgreSQL; external-content FTS5
+#      tables on SQLite (search_indexes migration)
+#   2  SQLite borrowers_fts contentless, indexing the phone as digits
+#      (search_phone_digits migration)
+
+CURRENT = 2
+
+TABLES = ("borrowers", "communication_logs")
+
+BORROWER_NAME_SQL = "lower(coalesce(first_name, '') || ' ' || coalesce(last_name, ''))"
+
+# Unchanged since version 1. Phones are indexed as bare digits so
+# "(555) 123-4567" and "5551234567" find the same borrower; adding a column to
+# the partitioned communication_logs adds it to every partition.
+_PG = {
+    "borrowers": [
+        "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+        "ALTER TABLE borrowers ADD COLUMN IF NOT EXISTS search_vector tsvector GENERATED ALWAYS AS ("
+        "to_tsvector('simple', coalesce(first_name, '') || ' ' || coalesce(last_name, '') || ' ' "
+        "|| coalesce(email, '') || ' ' || regexp_replace(coalesce(phone, ''), '\\D', '', 'g'))) STORED",
+        "CREATE INDEX IF NOT EXISTS ix_borrowers_search_vector_live ON borrowers "
+        "USING gin (search_vector) WHERE deleted_at IS NULL",
+        f"CREATE INDEX IF NOT EXISTS ix_borrowers_name_trgm_live ON borrowers "
+        f"USING gin (({BORROWER_NAME_SQL}) gin_trgm_ops) WHERE deleted_at IS NULL",
+    ],
+    "communication_logs": [
+        "ALTER TABLE communication_logs ADD COLUMN IF NOT EXISTS search_vector tsvector GENERATED ALWAYS AS ("
+        "to_tsvector('english', coalesce(message, ''))) STORED",
+        "CREATE INDEX IF NOT EXISTS ix_communication_logs_search_vector_live ON communication_logs "
+        "USING gin (search_vector) WHERE deleted_at IS NULL",
+    ],
+}
+
+_PG_DROP = {
+    "borrowers": [
+        "DROP INDEX IF EXISTS ix_borrowers_name_trgm_live",
+        "DROP INDEX IF EXISTS ix_borrowers_search_vector_live",
+        "ALTER TABLE borrowers DROP COLUMN IF EXISTS search_vector",
+    ],
+    "communication_logs": [
+        "DROP INDEX IF EXISTS ix_communication_logs_search_vector_live",
+        "ALTER TABLE communication_logs DROP COLUMN IF EXISTS search_vector",
+    ],
+}
+
+def fts_table(table: str) -> str:
+    return f"{table}_fts"
+
+def _digits(expression):
+    # SQLite has no regexp_replace; strips the separators search_terms
+    # accepts in a phone number.
+    for char in " ().+-":
+        expression = f"replace({expression}, '{char}', '')"
+    return expression
+
+def _as_is(*names):
+    return {name: f"{{row}}.{name}" for name in names}
+
+def _triggers(table, columns):
+    # columns maps each source column to the expression indexed for it, with
+    # {row} standing for new/old/the table.
+    fts = fts_table(table)
+    column_list = ", ".join(columns)
+
+    def values(row):
+        return ", ".join(expression.format(row=row) for expression in columns.values())
+    return values, [
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {table} BEGIN "
+        f"INSERT INTO {fts}(rowid, {column_list}) VALUES (new.id, {values('new')}); END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {table} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, {column_list}) VALUES ('delete', old.id, {values('old')}); END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE OF {column_list} ON {table} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, {column_list}) VALUES ('delete', old.id, {values('old')}); "
+        f"INSERT INTO {fts}(rowid, {column_list}) VALUES (new.id, {values('new')}); END",
+    ]
+
+def _external_fts5(table, columns):
+    # Reads column values back from the table, so it can only index them as
+    # they are stored.
+    fts = fts_table(table)
+    _, triggers = _triggers(table, columns)
+    return [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5({', '.join(columns)}, "
+        f"content='{table}', content_rowid='id', tokenize='unicode61')",
+        *triggers,
+        f"INSERT INTO {fts}({fts}) VALUES ('rebuild')",
+    ]
+
+def _contentless_fts5(table, columns):
+    # A column can index a derived value (a phone's digits) instead of the
+    # table's own; a match only needs the rowid back.
+    fts = fts_table(table)
+    column_list = ", ".join(columns)
+    values, triggers = _triggers(table, columns)
+    return [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5({column_list}, "
+        f"content='', tokenize='unicode61')",
+        *triggers,
+        # Indexes whatever the table already holds; a no-op on an empty one.
+        f"INSERT INTO {fts}({fts}) VALUES ('delete-all')",
+        f"INSERT INTO {fts}(rowid, {column_list}) SELECT id, {values(table)} FROM {table}",
+    ]
+
+_BORROWER_COLUMNS = _as_is("first_name", "last_name", "email", "phone")
+
+_SQLITE = {
+    1: {
+        "borrowers": _external_fts5("borrowers", _BORROWER_COLUMNS),
+        "communication_logs": _external_fts5("communication_logs", _as_is("message")),
+    },
+    2: {
+        # Phones as bare digits, like the PostgreSQL search_vector.
+        "borrowers": _contentless_fts5("borrowers", {**_BORROWER_COLUMNS, "phone": _digits("{row}.phone")}),
+        "communication_logs": _external_fts5("communication_logs", _as_is("message")),
+    },
+}
+
+def search_ddl(dialect: str, table: str, version: int = CURRENT):
+    """Statements that add a table's search column/index (or FTS table)."""
+    if version not in _SQLITE:
+        raise ValueError(f"unknown search DDL version: {version!r}")
+    if dialect == "postgresql":
+        return list(_PG[table])
+    if dialect == "sqlite":
+        return list(_SQLITE[version][table])
+    return []
+
+def drop_ddl(dialect: str, table: str):
+    if dialect == "postgresql":
+        return list(_PG_DROP[table])
+    if dialect == "sqlite":
+        fts = fts_table(table)
+        return [*(f"DROP TRIGGER IF EXISTS {fts}_{suffix}" for suffix in ("au", "ad", "ai")), f"DROP TABLE IF EXISTS {fts}"]
+    return []
@@ -0,0 +1,255 @@
+import asyncio
+import hashlib
+import mmap
+import os
+import tempfile
+from functools import lru_cache
+from typing import NamedTuple
+from sqlalchemy import func, select
+from app.core.config import settings
+from app.models.document import Document
+from app.models.enums import StorageProvider
+
+# Document bytes live outside the database, addressed by their SHA-256: a
+# blob's key is derived from its content, so uploading the same file twice
+# stores it once and a stored blob never changes. Documents keep
+# (storage_provider, storage_url, content_sha256, file_size); the provider
+# picks the backend and storage_url is the backend-relative key.
+
+DEFAULT_CHUNK_SIZE = 1024 * 1024
+
+class StoredBlob(NamedTuple):
+    provider: str
+    url: str
+    sha256: str
+    size: int
+
+class BlobNotFound(LookupError):
+    pass
+
+def iter_chunks(source, chunk_size: int = DEFAULT_CHUNK_SIZE):
+    """Chunks from a binary file object, or the iterable of bytes as given."""
+    if hasattr(source, "read"):
+        while chunk := source.read(chunk_size):
+            yield chunk
+    elif isinstance(source, (bytes, bytearray, memoryview)):
+        yield source
+    else:
+        yield from source
+
+def _mapped(fh, start, end):
+    # Maps only the pages covering [start, end); mmap offsets must be
+    # multiples of the allocation granularity. Returns (map, start in map).
+    base = start - start % mmap.ALLOCATIONGRANULARITY
+    return mmap.mmap(fh.fileno(), end - base, offset=base, access=mmap.ACCESS_READ), start - base
+
+def _byte_range(size, start, end):
+    # end is exclusive, as in slicing; None means to the end of the blob.
+    end = size if end is None else min(end, size)
+    if start < 0 or start > end:
+        raise ValueError(f"invalid range {start}-{end} for a {size} byte blob")
+    return start, end
+
+class LocalStorage:
+    """Content-addressed blobs under root/sha256/ab/cd/<digest>.
+
+    Uploads are streamed into a temporary file in the same directory tree
+    while being hashed, then renamed into place, so readers never see a
+    partial blob and a crash leaves at most a stray temporary file. Ranged
+    reads stream from an mmap (iter_range) or stay in the kernel via
+    sendfile (send_range), so no whole file is held in Python memory.
+    """
+    provider = StorageProvider.LOCAL
+
+    def __init__(self, root: str, chunk_size: int = DEFAULT_CHUNK_SIZE):
+        self.root = os.path.abspath(root)
+        self.chunk_size = chunk_size
+        self._tmp = os.path.join(self.root, "tmp")
+
+    def key(self, digest: str):
+        return f"sha256/{digest[:2]}/{digest[2:4]}/{digest}"
+
+    def path(self, url: str):
+        path = os.path.normpath(os.path.join(self.root, url))
+        if not path.startswith(self.root + os.sep):
+            raise ValueError(f"storage url {url!r} escapes the storage root")
+        return path
+
+    def _begin(self):
+        os.makedirs(self._tmp, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self._tmp)
+        return os.fdopen(fd, "wb"), tmp_path
+
+    def _commit(self, fh, tmp_path, digest, size):
+        try:
+            fh.flush()
+            os.fsync(fh.fileno())
+        finally:
+            fh.close()
+        url = self.key(digest.hexdigest())
+        path = self.path(url)
+        if os.path.exists(path):
+            # Already stored; identical content by construction.
+            os.unlink(tmp_path)
+        else:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            os.chmod(tmp_path, 0o444)
+            os.replace(tmp_path, path)
+        return StoredBlob(self.provider, url, digest.hexdigest(), size)
+
+    def _abort(self, fh, tmp_path):
+        fh.close()
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+
+    def save(self, source):
+        fh, tmp_path = self._begin()
+        digest, size = hashlib.sha256(), 0
+        try:
+            for chunk in iter_chunks(source, self.chunk_size):
+                digest.update(chunk)
+                fh.write(chunk)
+                size += len(chunk)
+        except BaseException:
+            self._abort(fh, tmp_path)
+            raise
+        return self._commit(fh, tmp_path, digest, size)
+
+    async def async_save(self, source):
+        # Accepts an async iterable of bytes (e.g. a request body) as well as
+        # anything save() takes; disk writes run in a worker thread so a slow
+        # disk doesn't stall the event loop.
+        if not hasattr(source, "__aiter__"):
+            return await asyncio.to_thread(self.save, source)
+        fh, tmp_path = await asyncio.to_thread(self._begin)
+        digest, size = hashlib.sha256(), 0
+        try:
+            async for chunk in source:
+                digest.update(chunk)
+                await asyncio.to_thread(fh.write, chunk)
+                size += len(chunk)
+        except BaseException:
+            self._abort(fh, tmp_path)
+            raise
+        return await asyncio.to_thread(self._commit, fh, tmp_path, digest, size)
+
+    def exists(self, url: str):
+        return os.path.exists(self.path(url))
+
+    def size(self, url: str):
+        try:
+            return os.stat(self.path(url)).st_size
+        except FileNotFoundError:
+            raise BlobNotFound(url) from None
+
+    def open(self, url: str):
+        try:
+            return open(self.path(url), "rb")
+        except FileNotFoundError:
+            raise BlobNotFound(url) from None
+
+    def read_range(self, url: str, start: int = 0, end: int | None = None):
+        """Bytes [start, end) of the blob in one buffer.
+
+        For small ranges (a PDF viewer's byte-range requests) a positional
+        read beats setting up a mapping; stream larger ones with iter_range.
+        """
+        with self.open(url) as fh:
+            size = os.fstat(fh.fileno()).st_size
+            start, end = _byte_range(size, start, end)
+            return os.pread(fh.fileno(), end - start, start)
+
+    def iter_range(self, url: str, start: int = 0, end: int | None = None):
+        """Bytes [start, end) as chunk_size pieces; pages are mapped, not read."""
+        with self.open(url) as fh:
+            size = os.fstat(fh.fileno()).st_size
+            start, end = _byte_range(size, start, end)
+            if start == end:
+                return
+            mm, skip = _mapped(fh, start, end)
+            with mm:
+                for offset in range(skip, skip + end - start, self.chunk_size):
+                    yield mm[offset:min(offset + self.chunk_size, skip + end - start)]
+
+    def send_range(self, url: str, out, start: int = 0, end: int | None = None):
+        """Copy bytes [start, end) to a socket or file descriptor in the kernel.
+
+        Uses socket.sendfile() for sockets and os.sendfile() for descriptors
+        (falling back to plain reads where the platform lacks it). Returns
+        the number of bytes sent.
+        """
+        with self.open(url) as fh:
+            size = os.fstat(fh.fileno()).st_size
+            start, end = _byte_range(size, start, end)
+            count = end - start
+            if count == 0:
+                return 0
+            if hasattr(out, "sendfile"):
+                return out.sendfile(fh, offset=start, count=count)
+            out_fd = out if isinstance(out, int) else out.fileno()
+            sent = 0
+            try:
+                while sent < count:
+                    n = os.sendfile(out_fd, fh.fileno(), start + sent, count - sent)
+                    if n == 0:
+                        break
+                    sent += n
+            except (AttributeError, OSError):
+                for chunk in self.iter_range(url, start + sent, end):
+                    # os.write may take only part of a chunk (pipes,
+                    # non-blocking descriptors); send the rest before moving on.
+                    view = memoryview(chunk)
+                    while view:
+                        written = os.write(out_fd, view)
+                        sent += written
+                        view = view[written:]
+            return sent
+
+    def delete(self, session, url: str):
+        """Remove the blob unless a document still references it.
+
+        Blobs are shared between documents with the same content, so this
+        counts documents rows with its digest first, soft-deleted ones
+        included (they can be restored), across every tenant. Call it once
+        the transaction that dropped the last reference has committed.
+        Returns whether the blob was removed.
+        """
+        if _references(session, self.provider, url):
+            return False
+        return self._unlink(url)
+
+    async def async_delete(self, session, url: str):
+        if await session.run_sync(_references, self.provider, url):
+            return False
+        return await asyncio.to_thread(self._unlink, url)
+
+    def _unlink(self, url):
+        try:
+            os.unlink(self.path(url))
+        except FileNotFoundError:
+            return False
+        return True
+
+def _references(session, provider, url):
+    # On the connection rather than through the ORM, so a tenant session's
+    # scoping can't hide another organization's documents.
+    documents = Document.__table__
+    digest = url.rsplit("/", 1)[-1]
+    stmt = select(func.count()).select_from(documents).where(
+        documents.c.content_sha256 == digest,
+        documents.c.storage_provider == provider,
+    )
+    return session.connection().scalar(stmt)
+
+BACKENDS = {
+    LocalStorage.provider: lambda: LocalStorage(settings.storage_root, settings.storage_chunk_size),
+}
+
+@lru_cache(maxsize=None)
+def get_storage(provider: str | None = None):
+    provider = provider or settings.storage_provider
+    try:
+        factory = BACKENDS[provider]
+    except KeyError:
+        raise ValueError(f"unknown storage provider {provider!r}; expected one of {sorted(BACKENDS)}") from None
+    return factory()
@@ -0,0 +1,76 @@
+from sqlalchemy import event
+from sqlalchemy.orm import Session, with_loader_criteria
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.database import SessionLocal
+from app.models import Organization, User, Borrower, Application, Document, CommunicationLog, AuditTrail
+
+TENANT_KEY = "organization_id"
+
+TENANT_MODELS = (User, Borrower, Application, Document, CommunicationLog, AuditTrail)
+
+def tenant_session(org_id: int, factory=SessionLocal, **kwargs) -> Session:
+    return factory(info={TENANT_KEY: org_id}, **kwargs)
+
+def async_tenant_session(org_id: int, factory=None, **kwargs) -> AsyncSession:
+    if factory is None:
+        from app.core.async_database import AsyncSessionLocal as factory
+    return factory(info={TENANT_KEY: org_id}, **kwargs)
+
+def current_tenant(session) -> int | None:
+    return session.info.get(TENANT_KEY)
+
+def get_tenant_db(org_id: int):
+    db = tenant_session(org_id)
+    try:
+        yield db
+    finally:
+        db.close()
+
+def _criteria(org_id, include_deleted):
+    # The lambdas are cached by SQLAlchemy with org_id pulled out as a bound
+    # parameter, so every tenant shares one compiled statement. Leading with
+    # organization_id lets the planner use the ix_<table>_org_* indexes, and
+    # deleted_at IS NULL matches their partial predicate.
+    if include_deleted:
+        options = [with_loader_criteria(model, lambda cls: cls.organization_id == org_id, include_aliases=True) for model in TENANT_MODELS]
+        options.append(with_loader_criteria(Organization, lambda cls: cls.id == org_id, include_aliases=True))
+    else:
+        options = [
+            with_loader_criteria(model, lambda cls: (cls.organization_id == org_id) & cls.deleted_at.is_(None), include_aliases=True)
+            for model in TENANT_MODELS
+        ]
+        options.append(with_loader_criteria(Organization, lambda cls: (cls.id == org_id) & cls.deleted_at.is_(None), include_aliases=True))
+    return options
+
+@event.listens_for(Session, "do_orm_execute")
+def _scope_to_tenant(orm_execute_state):
+    # Covers SELECTs and ORM-enabled UPDATE/DELETE. Relationship loads are
+    # skipped here because they inherit the criteria from the statement that
+    # loaded their parent, and column refreshes of an already loaded object
+    # are left alone. Pass
+    # execution_options(include_deleted=True) to see soft-deleted rows of
+    # the same tenant.
+    org_id = orm_execute_state.session.info.get(TENANT_KEY)
+    if org_id is None or orm_execute_state.is_column_load or orm_execute_state.is_relationship_load:
+        return
+    if not (orm_execute_state.is_select or orm_execute_state.is_update or orm_execute_state.is_delete):
+        return
+    include_deleted = orm_execute_state.execution_options.get("include_deleted", False)
+    orm_execute_state.statement = orm_execute_state.statement.options(*_criteria(org_id, include_deleted))
+
+@event.listens_for(Session, "before_flush")
+def _stamp_tenant(session, flush_context, instances):
+    # New rows default to the session's tenant; rows pointed at another one
+    # are refused rather than silently written across tenants.
+    org_id = session.info.get(TENANT_KEY)
+    if org_id is None:
+        return
+    for obj in list(session.new) + list(session.dirty):
+        if not isinstance(obj, TENANT_MODELS):
+            continue
+        if obj.organization_id is None:
+            obj.organization_id = org_id
+        elif obj.organization_id != org_id:
+            raise ValueError(
+                f"{type(obj).__name__} for organization {obj.organization_id} in a session scoped to {org_id}"
+            )
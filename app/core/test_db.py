@@ -1,5 +1,311 @@
-from sqlalchemy import inspect
-from app.core.database import engine
+import argparse
+import hashlib
+import os
+import shutil
+import sys
+import tempfile
+import uuid
+from contextlib import asynccontextmanager, contextmanager
+from pathlib import Path
+from dotenv import load_dotenv
 
-inspector = inspect(engine)
-print(inspector.get_table_names())
+load_dotenv()
+
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL") or "sqlite:///" + os.path.join(tempfile.gettempdir(), "db_practice_test.db")
+
+# The app's engine is built from DATABASE_URL on import. Tests don't use it,
+# but it has to parse, so it defaults to the test database.
+os.environ.setdefault("DATABASE_URL", TEST_DATABASE_URL)
+
+from alembic.config import Config
+from alembic.script import ScriptDirectory
+from sqlalchemy import create_engine, event, inspect, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import NullPool, StaticPool
+from sqlalchemy.schema import CreateIndex, CreateTable
+from app.core.config import _async_url
+from app.core.database import Base
+from app.core.init_db import init_db
+import app.core.pipeline_summary
+import app.core.pipeline_summary_ddl
+import app.core.search
+import app.core.search_ddl
+
+# Databases for tests, without replaying the alembic chain each time.
+#
+# The schema is built once with create_all (which also runs the search and
+# pipeline summary DDL hooks) into a template and stamped with the alembic
+# head, the way a squashed baseline revision would leave it. Templates are
+# named after a fingerprint of the schema, so they are reused across runs
+# until a model or a revision changes. Each run then clones its own database
+# from the template: CREATE DATABASE ... TEMPLATE on PostgreSQL, a file copy
+# on SQLite. Within the clone, rollback_session() runs a test in a
+# transaction that is rolled back at the end; the code under test can
+# commit, which only releases a SAVEPOINT.
+#
+#     engine = clone_database()
+#     with rollback_session(engine) as session:
+#         organization_repository.create_organization(session, ...)
+#     drop_clone(engine)
+#
+# app.core.pytest_plugin wraps this up as fixtures. Tables are created as the
+# models declare them, so communication_logs and audit_trails aren't
+# partitioned here.
+
+ALEMBIC_INI = Path(__file__).resolve().parents[2] / "alembic.ini"
+
+# Modules whose after_create hooks add DDL create_all doesn't show in the
+# table definitions, and the modules that DDL comes from.
+_DDL_HOOKS = (app.core.search, app.core.search_ddl, app.core.pipeline_summary, app.core.pipeline_summary_ddl)
+
+def alembic_head():
+    config = Config(str(ALEMBIC_INI))
+    config.set_main_option("script_location", str(ALEMBIC_INI.parent / "alembic"))
+    return ScriptDirectory.from_config(config).get_current_head()
+
+def schema_fingerprint(dialect) -> str:
+    digest = hashlib.sha256(alembic_head().encode())
+    for table in Base.metadata.sorted_tables:
+        digest.update(str(CreateTable(table).compile(dialect=dialect)).encode())
+        for index in sorted(table.indexes, key=lambda index: index.name):
+            digest.update(str(CreateIndex(index).compile(dialect=dialect)).encode())
+    for module in _DDL_HOOKS:
+        digest.update(Path(module.__file__).read_bytes())
+    return digest.hexdigest()[:12]
+
+def _stamp(connection, revision):
+    connection.exec_driver_sql("CREATE TABLE IF NOT EXISTS alembic_version (version_num VARCHAR(32) NOT NULL PRIMARY KEY)")
+    connection.exec_driver_sql("DELETE FROM alembic_version")
+    connection.execute(text("INSERT INTO alembic_version (version_num) VALUES (:revision)"), {"revision": revision})
+
+def build_schema(bind):
+    init_db(bind)
+    with bind.begin() as conn:
+        _stamp(conn, alembic_head())
+
+def _savepoints(engine):
+    # pysqlite starts transactions on its own and doesn't know about
+    # SAVEPOINT, so releasing one would commit the test's transaction. Let
+    # SQLAlchemy emit BEGIN itself instead.
+    if engine.dialect.name != "sqlite":
+        return engine
+
+    @event.listens_for(engine, "connect")
+    def _connect(dbapi_connection, connection_record):
+        dbapi_connection.isolation_level = None
+
+    @event.listens_for(engine, "begin")
+    def _begin(conn):
+        conn.exec_driver_sql("BEGIN")
+    return engine
+
+def savepoint_engine(url, **kw):
+    return _savepoints(create_engine(url, **kw))
+
+def _is_memory(url):
+    return url.database in (None, "", ":memory:")
+
+def _run_suffix():
+    # One clone per pytest-xdist worker, and per process otherwise.
+    return os.getenv("PYTEST_XDIST_WORKER") or f"{os.getpid()}_{uuid.uuid4().hex[:6]}"
+
+# SQLite
+
+def _sqlite_template(url, fingerprint):
+    path = Path(url.database)
+    template = path.with_name(f"{path.stem}.template-{fingerprint}{path.suffix}")
+    if template.exists():
+        return template
+    # Built under a temporary name and renamed, so a concurrent or interrupted
+    # run never leaves a half-built template behind.
+    building = template.with_name(f"{template.name}.{uuid.uuid4().hex[:8]}")
+    engine = create_engine(url.set(database=str(building)), poolclass=NullPool)
+    try:
+        build_schema(engine)
+    finally:
+        engine.dispose()
+    os.replace(building, template)
+    return template
+
+def _sqlite_clone(url, fingerprint):
+    if _is_memory(url):
+        engine = savepoint_engine(url, poolclass=StaticPool)
+        build_schema(engine)
+        return engine
+    template = _sqlite_template(url, fingerprint)
+    path = Path(url.database)
+    clone = path.with_name(f"{path.stem}.{_run_suffix()}{path.suffix}")
+    shutil.copyfile(template, clone)
+    return savepoint_engine(url.set(database=str(clone)))
+
+def _sqlite_templates(url):
+    path = Path(url.database)
+    return sorted(path.parent.glob(f"{path.stem}.template-*{path.suffix}"))
+
+# PostgreSQL
+
+def _maintenance_engine(url):
+    return create_engine(url.set(database="postgres"), isolation_level="AUTOCOMMIT", poolclass=NullPool)
+
+def _database_exists(conn, name):
+    return conn.execute(text("SELECT 1 FROM pg_database WHERE datname = :name"), {"name": name}).scalar() is not None
+
+def _pg_template(url, fingerprint, maintenance):
+    template = f"{url.database}_template_{fingerprint}"
+    with maintenance.connect() as conn:
+        # Serialises concurrent runs building the same template.
+        conn.execute(text("SELECT pg_advisory_lock(hashtext(:name))"), {"name": template})
+        try:
+            if _database_exists(conn, template):
+                return template
+            building = f"{template}_building"
+            conn.exec_driver_sql(f'DROP DATABASE IF EXISTS "{building}"')
+            conn.exec_driver_sql(f'CREATE DATABASE "{building}"')
+            engine = create_engine(url.set(database=building), poolclass=NullPool)
+            try:
+                build_schema(engine)
+            finally:
+                engine.dispose()
+            conn.exec_driver_sql(f'ALTER DATABASE "{building}" RENAME TO "{template}"')
+            conn.exec_driver_sql(f'ALTER DATABASE "{template}" WITH IS_TEMPLATE true')
+            return template
+        finally:
+            conn.execute(text("SELECT pg_advisory_unlock(hashtext(:name))"), {"name": template})
+
+def _pg_clone(url, fingerprint):
+    maintenance = _maintenance_engine(url)
+    try:
+        template = _pg_template(url, fingerprint, maintenance)
+        clone = f"{url.database}_{_run_suffix()}"
+        with maintenance.connect() as conn:
+            conn.exec_driver_sql(f'DROP DATABASE IF EXISTS "{clone}" WITH (FORCE)')
+            conn.exec_driver_sql(f'CREATE DATABASE "{clone}" TEMPLATE "{template}"')
+    finally:
+        maintenance.dispose()
+    return savepoint_engine(url.set(database=clone))
+
+def _pg_templates(conn, url):
+    return conn.execute(
+        text("SELECT datname FROM pg_database WHERE datname LIKE :pattern ORDER BY datname"),
+        {"pattern": f"{url.database}\\_template\\_%"},
+    ).scalars().all()
+
+CLONES = {
+    "sqlite": _sqlite_clone,
+    "postgresql": _pg_clone,
+}
+
+def clone_database(url: str = TEST_DATABASE_URL):
+    """An engine on a fresh copy of the test schema, for this run only.
+
+    url names the database the templates and clones are derived from; it is
+    never written to itself. In-memory SQLite has nothing to copy, so the
+    schema is built there directly.
+    """
+    url = make_url(url)
+    backend = url.get_backend_name()
+    if backend not in CLONES:
+        raise ValueError(f"unsupported test database backend: {backend}")
+    return CLONES[backend](url, schema_fingerprint(url.get_dialect()()))
+
+def drop_clone(engine):
+    url = engine.url
+    engine.dispose()
+    if url.get_backend_name() == "sqlite":
+        if not _is_memory(url):
+            Path(url.database).unlink(missing_ok=True)
+        return
+    maintenance = _maintenance_engine(url)
+    try:
+        with maintenance.connect() as conn:
+            conn.exec_driver_sql(f'DROP DATABASE IF EXISTS "{url.database}" WITH (FORCE)')
+    finally:
+        maintenance.dispose()
+
+def drop_templates(url: str = TEST_DATABASE_URL, keep_current: bool = True):
+    """Drop the templates of older schemas (or all of them); returns their names."""
+    url = make_url(url)
+    current = schema_fingerprint(url.get_dialect()())
+    dropped = []
+    if url.get_backend_name() == "sqlite":
+        for template in _sqlite_templates(url):
+            if keep_current and template.name.endswith(f"template-{current}{template.suffix}"):
+                continue
+            template.unlink()
+            dropped.append(template.name)
+        return dropped
+    maintenance = _maintenance_engine(url)
+    try:
+        with maintenance.connect() as conn:
+            for name in _pg_templates(conn, url):
+                if keep_current and name.endswith(current):
+                    continue
+                conn.exec_driver_sql(f'ALTER DATABASE "{name}" WITH IS_TEMPLATE false')
+                conn.exec_driver_sql(f'DROP DATABASE "{name}"')
+                dropped.append(name)
+    finally:
+        maintenance.dispose()
+    return dropped
+
+@contextmanager
+def rollback_session(bind, **session_options):
+    """A Session in a transaction that is rolled back when the block exits.
+
+    commit() and rollback() inside the block act on a SAVEPOINT, so code
+    that manages its own transactions runs unchanged and nothing it writes
+    outlives the block. Work done through a different connection (e.g. a
+    function given the engine as bind) is not covered; pass it
+    session.connection() instead.
+    """
+    with bind.connect() as connection:
+        transaction = connection.begin()
+        session = Session(bind=connection, join_transaction_mode="create_savepoint", **session_options)
+        try:
+            yield session
+        finally:
+            session.close()
+            if transaction.is_active:
+                transaction.rollback()
+
+def async_savepoint_engine(engine, **kw):
+    # An async engine on the same database as a clone's sync engine.
+    async_engine = create_async_engine(_async_url(engine.url.render_as_string(hide_password=False)), **kw)
+    _savepoints(async_engine.sync_engine)
+    return async_engine
+
+@asynccontextmanager
+async def async_rollback_session(bind, **session_options):
+    async with bind.connect() as connection:
+        transaction = await connection.begin()
+        session = AsyncSession(bind=connection, join_transaction_mode="create_savepoint", **session_options)
+        try:
+            yield session
+        finally:
+            await session.close()
+            if transaction.is_active:
+                await transaction.rollback()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Manage the template databases tests are cloned from.")
+    parser.add_argument("--url", default=TEST_DATABASE_URL, help="test database URL (default: TEST_DATABASE_URL)")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("build", help="build the template for the current schema and list its tables")
+    drop = commands.add_parser("drop-templates", help="drop templates of older schemas")
+    drop.add_argument("--all", action="store_true", help="drop the current schema's template as well")
+    args = parser.parse_args(argv)
+    if args.command == "drop-templates":
+        for name in drop_templates(args.url, keep_current=not args.all):
+            print(f"dropped {name}")
+        return 0
+    engine = clone_database(args.url)
+    try:
+        print(f"schema {schema_fingerprint(engine.dialect)}, alembic head {alembic_head()}")
+        print(inspect(engine).get_table_names())
+    finally:
+        drop_clone(engine)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,18 @@
+# Relationships refer to each other by class name, so every model has to be
+# registered before the first mapper configuration; importing any one model
+# module goes through here and pulls in the rest.
+from app.models.organization import Organization
+from app.models.user import User
+from app.models.borrower import Borrower
+from app.models.application import Application
+from app.models.document import Document
+from app.models.communication_log import CommunicationLog
+from app.models.audit_trail import AuditTrail
+from app.models.application_status_count import ApplicationStatusCount
+from app.models.migration_checkpoint import MigrationCheckpoint
+from app.models.enums import ApplicationStatus, UserRole, MessageChannel, SenderType, MessageType, StorageProvider
+
+# Register the search columns/FTS tables and the pipeline summary triggers
+# with create_all and drop_all.
+import app.core.search
+import app.core.pipeline_summary
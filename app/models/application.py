@@ -1,11 +1,13 @@
-from sqlalchemy import Column, BigInteger, String, DateTime, Numeric, ForeignKey
+from sqlalchemy import Column, BigInteger, String, DateTime, Numeric, ForeignKey, Index, text
+from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
-from app.core.database import Base
+from app.core.database import Base, BigIntegerPK
+from app.models.enums import ApplicationStatus, enum_column_type
 
 class Application(Base):
     __tablename__ = "applications"
 
-    id = Column(BigInteger, primary_key=True, index=True)
+    id = Column(BigIntegerPK, primary_key=True)
     organization_id = Column(BigInteger, ForeignKey("organizations.id"), nullable=False, index=True)
     borrower_id = Column(BigInteger, ForeignKey("borrowers.id"), nullable=False, index=True)
     loan_officer_id = Column(BigInteger, ForeignKey("users.id"), nullable=True)
@@ -20,7 +22,26 @@ class Application(Base):
     property_country = Column(String)
     employment_income_annual = Column(Numeric)
     employment_status = Column(String)
-    application_status = Column(String, index=True)
+    application_status = Column(enum_column_type(ApplicationStatus, "application_status"), index=True)
     created_at = Column(DateTime, server_default=func.now())
     updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
     deleted_at = Column(DateTime, nullable=True)
+
+    organization = relationship("Organization", back_populates="applications")
+    borrower = relationship("Borrower", back_populates="applications")
+    loan_officer = relationship("User", foreign_keys=[loan_officer_id])
+    documents = relationship("Document", back_populates="application")
+    communication_logs = relationship("CommunicationLog", back_populates="application")
+
+    __table_args__ = (
+        Index(
+            "ix_applications_org_created_live", "organization_id", "created_at", "id",
+            postgresql_where=text("deleted_at IS NULL"),
+            sqlite_where=text("deleted_at IS NULL"),
+        ),
+        Index(
+            "ix_applications_org_status_live", "organization_id", "application_status",
+            postgresql_where=text("deleted_at IS NULL"),
+            sqlite_where=text("deleted_at IS NULL"),
+        ),
+    )
@@ -0,0 +1,16 @@
+from sqlalchemy import Column, BigInteger, String, Numeric, ForeignKey, text
+from app.core.database import Base
+
+class ApplicationStatusCount(Base):
+    """Live applications per organization and status, kept current by triggers.
+
+    Applications without a status are counted under "". Written only by the
+    triggers in app.core.pipeline_summary; rebuild there if it drifts.
+    """
+
+    __tablename__ = "application_status_counts"
+
+    organization_id = Column(BigInteger, ForeignKey("organizations.id"), primary_key=True)
+    status = Column(String, primary_key=True)
+    count = Column(BigInteger, nullable=False, server_default=text("0"))
+    sum_amount = Column(Numeric, nullable=False, server_default=text("0"))
@@ -1,11 +1,16 @@
-from sqlalchemy import Column, BigInteger, String, DateTime, ForeignKey
+from sqlalchemy import Column, BigInteger, String, DateTime, ForeignKey, Index, text
+from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
-from app.core.database import Base
+from app.core.database import Base, BigIntegerPK
 
 class AuditTrail(Base):
     __tablename__ = "audit_trails"
 
-    id = Column(BigInteger, primary_key=True, index=True)
+    # The partition migration makes the PostgreSQL primary key (id, created_at),
+    # as a partitioned table's must include the partition key. id alone stays
+    # unique (one sequence feeds every partition), so the model maps it as the
+    # identity; app.core.partitions.include_object keeps autogenerate quiet.
+    id = Column(BigIntegerPK, primary_key=True)
     organization_id = Column(BigInteger, ForeignKey("organizations.id"), nullable=False)
     user_id = Column(BigInteger, ForeignKey("users.id"), nullable=True)
     entity_type = Column(String, nullable=False) 
@@ -13,5 +18,17 @@ class AuditTrail(Base):
     action = Column(String)
     old_value = Column(String)
     new_value = Column(String)
-    created_at = Column(DateTime, server_default=func.now())
+    # Partition key (monthly ranges on PostgreSQL), so never NULL.
+    created_at = Column(DateTime, server_default=func.now(), nullable=False)
     deleted_at = Column(DateTime, nullable=True)
+
+    organization = relationship("Organization")
+    user = relationship("User")
+
+    __table_args__ = (
+        Index(
+            "ix_audit_trails_org_created_live", "organization_id", "created_at", "id",
+            postgresql_where=text("deleted_at IS NULL"),
+            sqlite_where=text("deleted_at IS NULL"),
+        ),
+    )
@@ -1,11 +1,12 @@
-from sqlalchemy import Column, BigInteger, String, DateTime, ForeignKey
+from sqlalchemy import Column, BigInteger, String, Date, DateTime, Numeric, ForeignKey, Index, text
+from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
-from app.core.database import Base
+from app.core.database import Base, BigIntegerPK
 
 class Borrower(Base):
     __tablename__ = "borrowers"
 
-    id = Column(BigInteger, primary_key=True, index=True)
+    id = Column(BigIntegerPK, primary_key=True)
     organization_id = Column(BigInteger, ForeignKey("organizations.id"), nullable=False)
     email = Column(String)
     phone = Column(String)
@@ -17,13 +18,27 @@ class Borrower(Base):
     state = Column(String)
     postal_code = Column(String)
     country = Column(String)
-    date_of_birth = Column(String)
+    date_of_birth = Column(Date)
     credit_score = Column(BigInteger)
     credit_report_url = Column(String)
     ssn_last_4 = Column(String)
-    income_annual = Column(String)
+    income_annual = Column(Numeric)
     employment_status = Column(String)
     linked_user = Column(BigInteger, ForeignKey("users.id"), nullable=True)
     created_at = Column(DateTime, server_default=func.now())
     updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
     deleted_at = Column(DateTime, nullable=True)
+
+    organization = relationship("Organization", back_populates="borrowers")
+    user = relationship("User", foreign_keys=[linked_user])
+    applications = relationship("Application", back_populates="borrower")
+    documents = relationship("Document", back_populates="borrower")
+    communication_logs = relationship("CommunicationLog", back_populates="borrower")
+
+    __table_args__ = (
+        Index(
+            "ix_borrowers_org_created_live", "organization_id", "created_at", "id",
+            postgresql_where=text("deleted_at IS NULL"),
+            sqlite_where=text("deleted_at IS NULL"),
+        ),
+    )
@@ -1,20 +1,50 @@
-from sqlalchemy import Column, BigInteger, String, DateTime, ForeignKey
+from sqlalchemy import Column, BigInteger, String, DateTime, ForeignKey, Index, text
+from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
-from app.core.database import Base
+from app.core.database import Base, BigIntegerPK
+from app.models.enums import MessageChannel, MessageType, SenderType, enum_column_type
 
 class CommunicationLog(Base):
     __tablename__ = "communication_logs"
 
-    id = Column(BigInteger, primary_key=True, index=True)
+    # The partition migration makes the PostgreSQL primary key (id, created_at),
+    # as a partitioned table's must include the partition key. id alone stays
+    # unique (one sequence feeds every partition), so the model maps it as the
+    # identity; app.core.partitions.include_object keeps autogenerate quiet.
+    id = Column(BigIntegerPK, primary_key=True)
     organization_id = Column(BigInteger, ForeignKey("organizations.id"), nullable=False)
     application_id = Column(BigInteger, ForeignKey("applications.id"), nullable=True)
     borrower_id = Column(BigInteger, ForeignKey("borrowers.id"), nullable=True)
     sender_user_id = Column(BigInteger, ForeignKey("users.id"), nullable=True)
-    sender_type = Column(String)
+    sender_type = Column(enum_column_type(SenderType, "message_sender_type"))
     message = Column(String)
-    message_type = Column(String)
-    channel = Column(String)  
+    message_type = Column(enum_column_type(MessageType, "message_type"))
+    channel = Column(enum_column_type(MessageChannel, "message_channel"))
     ai_model = Column(String) 
-    created_at = Column(DateTime, server_default=func.now())
+    # Partition key (monthly ranges on PostgreSQL), so never NULL.
+    created_at = Column(DateTime, server_default=func.now(), nullable=False)
     updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
     deleted_at = Column(DateTime, nullable=True)
+
+    organization = relationship("Organization")
+    application = relationship("Application", back_populates="communication_logs")
+    borrower = relationship("Borrower", back_populates="communication_logs")
+    sender = relationship("User", foreign_keys=[sender_user_id])
+
+    __table_args__ = (
+        Index(
+            "ix_communication_logs_org_created_live", "organization_id", "created_at", "id",
+            postgresql_where=text("deleted_at IS NULL"),
+            sqlite_where=text("deleted_at IS NULL"),
+        ),
+        Index(
+            "ix_communication_logs_application_created_live", "application_id", "created_at", "id",
+            postgresql_where=text("deleted_at IS NULL"),
+            sqlite_where=text("deleted_at IS NULL"),
+        ),
+        Index(
+            "ix_communication_logs_borrower_created_live", "borrower_id", "created_at", "id",
+            postgresql_where=text("deleted_at IS NULL"),
+            sqlite_where=text("deleted_at IS NULL"),
+        ),
+    )
@@ -1,11 +1,13 @@
-from sqlalchemy import Column, BigInteger, String, DateTime, Boolean, ForeignKey
+from sqlalchemy import Column, BigInteger, String, DateTime, Boolean, ForeignKey, Index, text
+from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
-from app.core.database import Base
+from app.core.database import Base, BigIntegerPK
+from app.models.enums import StorageProvider, enum_column_type
 
 class Document(Base):
     __tablename__ = "documents"
 
-    id = Column(BigInteger, primary_key=True, index=True)
+    id = Column(BigIntegerPK, primary_key=True)
 
     organization_id = Column(BigInteger, ForeignKey("organizations.id"), nullable=False, index=True)
     application_id = Column(BigInteger, ForeignKey("applications.id"), nullable=False, index=True)
@@ -15,8 +17,29 @@ class Document(Base):
     file_type = Column(String)
     file_size = Column(BigInteger)
     storage_url = Column(String)
-    storage_provider = Column(String)
+    storage_provider = Column(enum_column_type(StorageProvider, "storage_provider"))
+    # Hex SHA-256 of the stored bytes, which is also the blob's storage key.
+    # Indexed for the reference check before a shared blob is deleted.
+    content_sha256 = Column(String(64), index=True)
     description = Column(String)
     created_at = Column(DateTime, server_default=func.now())
     updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
     deleted_at = Column(DateTime, nullable=True)
+
+    organization = relationship("Organization", back_populates="documents")
+    application = relationship("Application", back_populates="documents")
+    borrower = relationship("Borrower", back_populates="documents")
+    uploader = relationship("User", foreign_keys=[uploaded_by])
+
+    __table_args__ = (
+        Index(
+            "ix_documents_org_created_live", "organization_id", "created_at", "id",
+            postgresql_where=text("deleted_at IS NULL"),
+            sqlite_where=text("deleted_at IS NULL"),
+        ),
+        Index(
+            "ix_documents_application_created_live", "application_id", "created_at", "id",
+            postgresql_where=text("deleted_at IS NULL"),
+            sqlite_where=text("deleted_at IS NULL"),
+        ),
+    )
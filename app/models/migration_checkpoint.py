@@ -0,0 +1,23 @@
+from sqlalchemy import Column, BigInteger, String, DateTime, text
+from sqlalchemy.sql import func
+from app.core.database import Base
+
+class MigrationCheckpoint(Base):
+    """Progress of one batched backfill, so an interrupted run resumes.
+
+    Written only by app.core.online_migration, in the same transaction as
+    each batch. next_key is where the next batch starts; end_key, captured
+    when the run began, is where it stops.
+    """
+
+    __tablename__ = "migration_checkpoints"
+
+    name = Column(String, primary_key=True)
+    table_name = Column(String, nullable=False)
+    next_key = Column(BigInteger)
+    end_key = Column(BigInteger)
+    rows_done = Column(BigInteger, nullable=False, server_default=text("0"))
+    batches_done = Column(BigInteger, nullable=False, server_default=text("0"))
+    started_at = Column(DateTime, server_default=func.now())
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
+    finished_at = Column(DateTime, nullable=True)
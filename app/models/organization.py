@@ -1,11 +1,12 @@
-from sqlalchemy import Column, BigInteger, String, DateTime
+from sqlalchemy import Column, String, DateTime
+from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
-from app.core.database import Base
+from app.core.database import Base, BigIntegerPK
 
 class Organization(Base):
     __tablename__ = "organizations"
 
-    id = Column(BigInteger, primary_key=True, index=True)
+    id = Column(BigIntegerPK, primary_key=True)
     name = Column(String, nullable=False)
     legal_name = Column(String)
     email = Column(String)
@@ -18,3 +19,8 @@ class Organization(Base):
     created_at = Column(DateTime, server_default=func.now(), nullable=False)
     updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now(), nullable=False)
     deleted_at = Column(DateTime, nullable=True)
+
+    users = relationship("User", back_populates="organization", lazy="write_only")
+    borrowers = relationship("Borrower", back_populates="organization", lazy="write_only")
+    applications = relationship("Application", back_populates="organization", lazy="write_only")
+    documents = relationship("Document", back_populates="organization", lazy="write_only")
@@ -1,16 +1,86 @@
-from datetime import datetime, timezone
-from sqlalchemy.orm import Session
-from app.models.application import Application
+from typing import NamedTuple
+from sqlalchemy import select, bindparam
+from sqlalchemy.orm import Session, joinedload, selectinload
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.query_metrics import instrument_module
+from app.models import Application, Document, CommunicationLog
+from app.repositories.communication_repository import list_logs, async_list_logs
+from app.repositories.bulk import bulk_insert, async_bulk_insert, DEFAULT_CHUNK_SIZE, soft_delete_where, run_cascade, async_run_cascade, utcnow
+from app.repositories.lookups import loaded_live
+from app.repositories.projection import project_by_ids, async_project_by_ids, project_page, async_project_page
+from app.repositories.pagination import keyset_page, async_keyset_page, DEFAULT_PAGE_SIZE
 
-def get_application_by_id(session: Session, app_id: int):
-    return (
-        session.query(Application)
-        .filter(
-            Application.id == app_id,
-            Application.deleted_at.is_(None)
-        )
-        .first()
+RECENT_LOGS = 20
+
+class ApplicationBundle(NamedTuple):
+    application: Application
+    recent_logs: list
+    more_logs_cursor: str | None
+
+_APPLICATION_BY_ID = select(Application).where(
+    Application.id == bindparam("app_id"),
+    Application.deleted_at.is_(None)
+)
+
+_APPLICATIONS_BY_IDS = select(Application).where(
+    Application.id.in_(bindparam("app_ids", expanding=True)),
+    Application.deleted_at.is_(None)
+)
+
+def _soft_delete_applications_by_ids(app_ids):
+    return soft_delete_where(Application, Application.id.in_(app_ids))
+
+def _application_cascade(app_ids):
+    return {
+        "documents": soft_delete_where(Document, Document.application_id.in_(app_ids)),
+        "communication_logs": soft_delete_where(CommunicationLog, CommunicationLog.application_id.in_(app_ids)),
+        "applications": _soft_delete_applications_by_ids(app_ids),
+    }
+
+def _list_applications(org_id: int, borrower_id: int | None = None, status: str | None = None):
+    stmt = select(Application).where(
+        Application.organization_id == org_id,
+        Application.deleted_at.is_(None)
     )
+    if borrower_id is not None:
+        stmt = stmt.where(Application.borrower_id == borrower_id)
+    if status is not None:
+        stmt = stmt.where(Application.application_status == status)
+    return stmt
+
+# borrower and loan officer are many-to-one, so they ride along on the
+# application row; documents come from one extra SELECT ... IN. Logs are
+# paged separately because selectinload can't limit per parent.
+_APPLICATION_BUNDLE = _APPLICATION_BY_ID.options(
+    joinedload(Application.borrower),
+    joinedload(Application.loan_officer),
+    selectinload(Application.documents.and_(Document.deleted_at.is_(None))),
+)
+
+def get_application_by_id(session: Session, app_id: int):
+    return loaded_live(session, Application, app_id) or session.scalars(_APPLICATION_BY_ID, {"app_id": app_id}).first()
+
+def get_application_bundle(session: Session, app_id: int, recent_logs: int = RECENT_LOGS):
+    application = session.scalars(_APPLICATION_BUNDLE, {"app_id": app_id}).unique().first()
+    if application is None:
+        return None
+    logs = list_logs(session, application.organization_id, application_id=application.id, page_size=recent_logs)
+    return ApplicationBundle(application, logs.items, logs.next_cursor)
+
+def get_applications_by_ids(session: Session, app_ids):
+    app_ids = set(app_ids)
+    if not app_ids:
+        return {}
+    return {row.id: row for row in session.scalars(_APPLICATIONS_BY_IDS, {"app_ids": list(app_ids)})}
+
+def list_applications(session: Session, org_id: int, borrower_id: int | None = None, status: str | None = None, cursor: str | None = None, page_size: int = DEFAULT_PAGE_SIZE):
+    return keyset_page(session, _list_applications(org_id, borrower_id, status), Application, cursor, page_size)
+
+def get_application_rows_by_ids(session: Session, app_ids, fields):
+    return project_by_ids(session, Application, app_ids, fields)
+
+def list_application_rows(session: Session, org_id: int, fields, cursor: str | None = None, page_size: int = DEFAULT_PAGE_SIZE):
+    return project_page(session, Application, org_id, fields, cursor, page_size)
 
 def create_application(session: Session, application: Application):
     session.add(application)
@@ -18,6 +88,77 @@ def create_application(session: Session, application: Application):
     session.refresh(application)
     return application
 
+def bulk_create_applications(session: Session, rows, chunk_size: int = DEFAULT_CHUNK_SIZE):
+    return bulk_insert(session, Application, rows, chunk_size)
+
 def soft_delete_application(session: Session, application: Application):
-    application.deleted_at = datetime.now(datetime.timezone.utc)
+    application.deleted_at = utcnow()
     session.commit()
+
+def soft_delete_applications_by_ids(session: Session, app_ids):
+    app_ids = set(app_ids)
+    if not app_ids:
+        return 0
+    count = session.execute(_soft_delete_applications_by_ids(app_ids)).rowcount
+    session.commit()
+    return count
+
+def soft_delete_application_cascade(session: Session, app_ids):
+    app_ids = set(app_ids)
+    if not app_ids:
+        return {}
+    return run_cascade(session, _application_cascade(app_ids))
+
+async def async_get_application_by_id(session: AsyncSession, app_id: int):
+    return loaded_live(session, Application, app_id) or (await session.scalars(_APPLICATION_BY_ID, {"app_id": app_id})).first()
+
+async def async_get_application_bundle(session: AsyncSession, app_id: int, recent_logs: int = RECENT_LOGS):
+    application = (await session.scalars(_APPLICATION_BUNDLE, {"app_id": app_id})).unique().first()
+    if application is None:
+        return None
+    logs = await async_list_logs(session, application.organization_id, application_id=application.id, page_size=recent_logs)
+    return ApplicationBundle(application, logs.items, logs.next_cursor)
+
+async def async_get_applications_by_ids(session: AsyncSession, app_ids):
+    app_ids = set(app_ids)
+    if not app_ids:
+        return {}
+    return {row.id: row for row in await session.scalars(_APPLICATIONS_BY_IDS, {"app_ids": list(app_ids)})}
+
+async def async_list_applications(session: AsyncSession, org_id: int, borrower_id: int | None = None, status: str | None = None, cursor: str | None = None, page_size: int = DEFAULT_PAGE_SIZE):
+    return await async_keyset_page(session, _list_applications(org_id, borrower_id, status), Application, cursor, page_size)
+
+async def async_get_application_rows_by_ids(session: AsyncSession, app_ids, fields):
+    return await async_project_by_ids(session, Application, app_ids, fields)
+
+async def async_list_application_rows(session: AsyncSession, org_id: int, fields, cursor: str | None = None, page_size: int = DEFAULT_PAGE_SIZE):
+    return await async_project_page(session, Application, org_id, fields, cursor, page_size)
+
+async def async_create_application(session: AsyncSession, application: Application):
+    session.add(application)
+    await session.commit()
+    await session.refresh(application)
+    return application
+
+async def async_bulk_create_applications(session: AsyncSession, rows, chunk_size: int = DEFAULT_CHUNK_SIZE):
+    return await async_bulk_insert(session, Application, rows, chunk_size)
+
+async def async_soft_delete_application(session: AsyncSession, application: Application):
+    application.deleted_at = utcnow()
+    await session.commit()
+
+async def async_soft_delete_applications_by_ids(session: AsyncSession, app_ids):
+    app_ids = set(app_ids)
+    if not app_ids:
+        return 0
+    count = (await session.execute(_soft_delete_applications_by_ids(app_ids))).rowcount
+    await session.commit()
+    return count
+
+async def async_soft_delete_application_cascade(session: AsyncSession, app_ids):
+    app_ids = set(app_ids)
+    if not app_ids:
+        return {}
+    return await async_run_cascade(session, _application_cascade(app_ids))
+
+instrument_module(globals())
@@ -1,6 +1,49 @@
-from datetime import datetime, timezone
+from datetime import datetime
+from sqlalchemy import select, bindparam
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.query_metrics import instrument_module
 from app.models.audit_trail import AuditTrail
+from app.repositories.bulk import bulk_insert, async_bulk_insert, DEFAULT_CHUNK_SIZE, soft_delete_where, utcnow
+from app.repositories.copy_loader import copy_rows, BufferedLoader
+from app.repositories.projection import project_by_ids, async_project_by_ids, project_page, async_project_page
+from app.repositories.pagination import keyset_page, async_keyset_page, DEFAULT_PAGE_SIZE
+
+_AUDIT_ENTRIES_BY_IDS = select(AuditTrail).where(
+    AuditTrail.id.in_(bindparam("entry_ids", expanding=True)),
+    AuditTrail.deleted_at.is_(None)
+)
+
+def _soft_delete_audit_entries_by_ids(entry_ids):
+    return soft_delete_where(AuditTrail, AuditTrail.id.in_(entry_ids))
+
+def _list_audit_entries(org_id: int, entity_type: str | None = None, entity_id: int | None = None, since: datetime | None = None):
+    stmt = select(AuditTrail).where(
+        AuditTrail.organization_id == org_id,
+        AuditTrail.deleted_at.is_(None)
+    )
+    if entity_type is not None:
+        stmt = stmt.where(AuditTrail.entity_type == entity_type)
+    if entity_id is not None:
+        stmt = stmt.where(AuditTrail.entity_id == entity_id)
+    if since is not None:
+        stmt = stmt.where(AuditTrail.created_at >= since)
+    return stmt
+
+def get_audit_entries_by_ids(session: Session, entry_ids):
+    entry_ids = set(entry_ids)
+    if not entry_ids:
+        return {}
+    return {row.id: row for row in session.scalars(_AUDIT_ENTRIES_BY_IDS, {"entry_ids": list(entry_ids)})}
+
+def list_audit_entries(session: Session, org_id: int, entity_type: str | None = None, entity_id: int | None = None, since: datetime | None = None, cursor: str | None = None, page_size: int = DEFAULT_PAGE_SIZE):
+    return keyset_page(session, _list_audit_entries(org_id, entity_type, entity_id, since), AuditTrail, cursor, page_size)
+
+def get_audit_entry_rows_by_ids(session: Session, entry_ids, fields):
+    return project_by_ids(session, AuditTrail, entry_ids, fields)
+
+def list_audit_entry_rows(session: Session, org_id: int, fields, cursor: str | None = None, page_size: int = DEFAULT_PAGE_SIZE):
+    return project_page(session, AuditTrail, org_id, fields, cursor, page_size)
 
 def create_audit_entry(session: Session, entry: AuditTrail):
     session.add(entry)
@@ -8,6 +51,63 @@ def create_audit_entry(session: Session, entry: AuditTrail):
     session.refresh(entry)
     return entry
 
+def bulk_create_audit_entries(session: Session, rows, chunk_size: int = DEFAULT_CHUNK_SIZE):
+    return bulk_insert(session, AuditTrail, rows, chunk_size)
+
+def copy_create_audit_entries(session: Session, rows, columns=None):
+    count = copy_rows(session.connection(), AuditTrail, rows, columns)
+    session.commit()
+    return count
+
+def audit_entry_loader(engine, **kwargs):
+    return BufferedLoader(engine, AuditTrail, **kwargs)
+
 def soft_delete_audit_entry(session: Session, entry: AuditTrail):
-    entry.deleted_at = datetime.now(datetime.timezone.utc)
+    entry.deleted_at = utcnow()
+    session.commit()
+
+def soft_delete_audit_entries_by_ids(session: Session, entry_ids):
+    entry_ids = set(entry_ids)
+    if not entry_ids:
+        return 0
+    count = session.execute(_soft_delete_audit_entries_by_ids(entry_ids)).rowcount
     session.commit()
+    return count
+
+async def async_get_audit_entries_by_ids(session: AsyncSession, entry_ids):
+    entry_ids = set(entry_ids)
+    if not entry_ids:
+        return {}
+    return {row.id: row for row in await session.scalars(_AUDIT_ENTRIES_BY_IDS, {"entry_ids": list(entry_ids)})}
+
+async def async_list_audit_entries(session: AsyncSession, org_id: int, entity_type: str | None = None, entity_id: int | None = None, since: datetime | None = None, cursor: str | None = None, page_size: int = DEFAULT_PAGE_SIZE):
+    return await async_keyset_page(session, _list_audit_entries(org_id, entity_type, entity_id, since), AuditTrail, cursor, page_size)
+
+async def async_get_audit_entry_rows_by_ids(session: AsyncSession, entry_ids, fields):
+    return await async_project_by_ids(session, AuditTrail, entry_ids, fields)
+
+async def async_list_audit_entry_rows(session: AsyncSession, org_id: int, fields, cursor: str | None = None, page_size: int = DEFAULT_PAGE_SIZE):
+    return await async_project_page(session, AuditTrail, org_id, fields, cursor, page_size)
+
+async def async_create_audit_entry(session: AsyncSession, entry: AuditTrail):
+    session.add(entry)
+    await session.commit()
+    await session.refresh(entry)
+    return entry
+
+async def async_bulk_create_audit_entries(session: AsyncSession, rows, chunk_size: int = DEFAULT_CHUNK_SIZE):
+    return await async_bulk_insert(session, AuditTrail, rows, chunk_size)
+
+async def async_soft_delete_audit_entry(session: AsyncSession, entry: AuditTrail):
+    entry.deleted_at = utcnow()
+    await session.commit()
+
+async def async_soft_delete_audit_entries_by_ids(session: AsyncSession, entry_ids):
+    entry_ids = set(entry_ids)
+    if not entry_ids:
+        return 0
+    count = (await session.execute(_soft_delete_audit_entries_by_ids(entry_ids))).rowcount
+    await session.commit()
+    return count
+
+instrument_module(globals())
@@ -1,16 +1,67 @@
-from datetime import datetime, timezone
+from sqlalchemy import select, bindparam, or_
 from sqlalchemy.orm import Session
-from app.models.borrower import Borrower
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.query_metrics import instrument_module
+from app.models import Borrower, Application, Document, CommunicationLog
+from app.repositories.bulk import bulk_insert, async_bulk_insert, DEFAULT_CHUNK_SIZE, soft_delete_where, run_cascade, async_run_cascade, utcnow
+from app.repositories.lookups import loaded_live
+from app.repositories.projection import project_by_ids, async_project_by_ids, project_page, async_project_page
+from app.repositories.pagination import keyset_page, async_keyset_page, DEFAULT_PAGE_SIZE
 
-def get_borrower_by_id(session: Session, borrower_id: int):
-    return (
-        session.query(Borrower)
-        .filter(
-            Borrower.id == borrower_id,
-            Borrower.deleted_at.is_(None)
-        )
-        .first()
+_BORROWER_BY_ID = select(Borrower).where(
+    Borrower.id == bindparam("borrower_id"),
+    Borrower.deleted_at.is_(None)
+)
+
+_BORROWERS_BY_IDS = select(Borrower).where(
+    Borrower.id.in_(bindparam("borrower_ids", expanding=True)),
+    Borrower.deleted_at.is_(None)
+)
+
+def _soft_delete_borrowers_by_ids(borrower_ids):
+    return soft_delete_where(Borrower, Borrower.id.in_(borrower_ids))
+
+def _borrower_cascade(borrower_ids):
+    # Children of every application the borrower has, including ones that
+    # were already soft-deleted on their own.
+    applications = select(Application.id).where(Application.borrower_id.in_(borrower_ids))
+    return {
+        "documents": soft_delete_where(Document, or_(
+            Document.borrower_id.in_(borrower_ids),
+            Document.application_id.in_(applications),
+        )),
+        "communication_logs": soft_delete_where(CommunicationLog, or_(
+            CommunicationLog.borrower_id.in_(borrower_ids),
+            CommunicationLog.application_id.in_(applications),
+        )),
+        "applications": soft_delete_where(Application, Application.borrower_id.in_(borrower_ids)),
+        "borrowers": _soft_delete_borrowers_by_ids(borrower_ids),
+    }
+
+def _list_borrowers(org_id: int):
+    stmt = select(Borrower).where(
+        Borrower.organization_id == org_id,
+        Borrower.deleted_at.is_(None)
     )
+    return stmt
+
+def get_borrower_by_id(session: Session, borrower_id: int):
+    return loaded_live(session, Borrower, borrower_id) or session.scalars(_BORROWER_BY_ID, {"borrower_id": borrower_id}).first()
+
+def get_borrowers_by_ids(session: Session, borrower_ids):
+    borrower_ids = set(borrower_ids)
+    if not borrower_ids:
+        return {}
+    return {row.id: row for row in session.scalars(_BORROWERS_BY_IDS, {"borrower_ids": list(borrower_ids)})}
+
+def list_borrowers(session: Session, org_id: int, cursor: str | None = None, page_size: int = DEFAULT_PAGE_SIZE):
+    return keyset_page(session, _list_borrowers(org_id), Borrower, cursor, page_size)
+
+def get_borrower_rows_by_ids(session: Session, borrower_ids, fields):
+    return project_by_ids(session, Borrower, borrower_ids, fields)
+
+def list_borrower_rows(session: Session, org_id: int, fields, cursor: str | None = None, page_size: int = DEFAULT_PAGE_SIZE):
+    return project_page(session, Borrower, org_id, fields, cursor, page_size)
 
 def create_borrower(session: Session, borrower: Borrower):
     session.add(borrower)
@@ -18,6 +69,70 @@ def create_borrower(session: Session, borrower: Borrower):
     session.refresh(borrower)
     return borrower
 
+def bulk_create_borrowers(session: Session, rows, chunk_size: int = DEFAULT_CHUNK_SIZE):
+    return bulk_insert(session, Borrower, rows, chunk_size)
+
 def soft_delete_borrower(session: Session, borrower: Borrower):
-    borrower.deleted_at = datetime.now(datetime.timezone.utc)
+    borrower.deleted_at = utcnow()
+    session.commit()
+
+def soft_delete_borrowers_by_ids(session: Session, borrower_ids):
+    borrower_ids = set(borrower_ids)
+    if not borrower_ids:
+        return 0
+    count = session.execute(_soft_delete_borrowers_by_ids(borrower_ids)).rowcount
     session.commit()
+    return count
+
+def soft_delete_borrower_cascade(session: Session, borrower_ids):
+    borrower_ids = set(borrower_ids)
+    if not borrower_ids:
+        return {}
+    return run_cascade(session, _borrower_cascade(borrower_ids))
+
+async def async_get_borrower_by_id(session: AsyncSession, borrower_id: int):
+    return loaded_live(session, Borrower, borrower_id) or (await session.scalars(_BORROWER_BY_ID, {"borrower_id": borrower_id})).first()
+
+async def async_get_borrowers_by_ids(session: AsyncSession, borrower_ids):
+    borrower_ids = set(borrower_ids)
+    if not borrower_ids:
+        return {}
+    return {row.id: row for row in await session.scalars(_BORROWERS_BY_IDS, {"borrower_ids": list(borrower_ids)})}
+
+async def async_list_borrowers(session: AsyncSession, org_id: int, cursor: str | None = None, page_size: int = DEFAULT_PAGE_SIZE):
+    return await async_keyset_page(session, _list_borrowers(org_id), Borrower, cursor, page_size)
+
+async def async_get_borrower_rows_by_ids(session: AsyncSession, borrower_ids, fields):
+    return await async_project_by_ids(session, Borrower, borrower_ids, fields)
+
+async def async_list_borrower_rows(session: AsyncSession, org_id: int, fields, cursor: str | None = None, page_size: int = DEFAULT_PAGE_SIZE):
+    return await async_project_page(session, Borrower, org_id, fields, cursor, page_size)
+
+async def async_create_borrower(session: AsyncSession, borrower: Borrower):
+    session.add(borrower)
+    await session.commit()
+    await session.refresh(borrower)
+    return borrower
+
+async def async_bulk_create_borrowers(session: AsyncSession, rows, chunk_size: int = DEFAULT_CHUNK_SIZE):
+    return await async_bulk_insert(session, Borrower, rows, chunk_size)
+
+async def async_soft_delete_borrower(session: AsyncSession, borrower: Borrower):
+    borrower.deleted_at = utcnow()
+    await session.commit()
+
+async def async_soft_delete_borrowers_by_ids(session: AsyncSession, borrower_ids):
+    borrower_ids = set(borrower_ids)
+    if not borrower_ids:
+        return 0
+    count = (await session.execute(_soft_delete_borrowers_by_ids(borrower_ids))).rowcount
+    await session.commit()
+    return count
+
+async def async_soft_delete_borrower_cascade(session: AsyncSession, borrower_ids):
+    borrower_ids = set(borrower_ids)
+    if not borrower_ids:
+        return {}
+    return await async_run_cascade(session, _borrower_cascade(borrower_ids))
+
+instrument_module(globals())
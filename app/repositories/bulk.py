@@ -0,0 +1,66 @@
+from datetime import datetime, timezone
+from itertools import islice
+from sqlalchemy import insert, update, func
+from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+
+DEFAULT_CHUNK_SIZE = 1000
+
+def _chunks(rows, size):
+    it = iter(rows)
+    while True:
+        chunk = list(islice(it, size))
+        if not chunk:
+            return
+        yield chunk
+
+def bulk_insert(session: Session, model, rows, chunk_size: int = DEFAULT_CHUNK_SIZE):
+    # rows are plain dicts of column values. Each chunk goes out as batched
+    # multi-row INSERT ... RETURNING id and is committed on its own, so a
+    # failure part way through keeps the chunks already written.
+    stmt = insert(model).returning(model.id, sort_by_parameter_order=True)
+    ids = []
+    for chunk in _chunks(rows, chunk_size):
+        ids.extend(session.scalars(stmt, chunk).all())
+        session.commit()
+    return ids
+
+async def async_bulk_insert(session: AsyncSession, model, rows, chunk_size: int = DEFAULT_CHUNK_SIZE):
+    stmt = insert(model).returning(model.id, sort_by_parameter_order=True)
+    ids = []
+    for chunk in _chunks(rows, chunk_size):
+        ids.extend((await session.scalars(stmt, chunk)).all())
+        await session.commit()
+    return ids
+
+# Set-based UPDATEs skip syncing in-session objects; callers commit right
+# after, which expires everything anyway.
+SOFT_DELETE = {"synchronize_session": False}
+
+def utcnow():
+    # Naive UTC for the DateTime (without time zone) columns: asyncpg refuses
+    # aware values for them, and psycopg2 would shift them into the session's
+    # time zone.
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+def soft_delete_where(model, *criteria):
+    return (
+        update(model)
+        .where(*criteria, model.deleted_at.is_(None))
+        .values(deleted_at=func.now())
+        .execution_options(**SOFT_DELETE)
+    )
+
+def run_cascade(session: Session, statements):
+    # statements maps table name -> UPDATE; all of them share one transaction
+    # (and, on PostgreSQL, one now()), so a cascade is never left half applied.
+    counts = {table: session.execute(stmt).rowcount for table, stmt in statements.items()}
+    session.commit()
+    return counts
+
+async def async_run_cascade(session: AsyncSession, statements):
+    counts = {}
+    for table, stmt in statements.items():
+        counts[table] = (await session.execute(stmt)).rowcount
+    await session.commit()
+    return counts
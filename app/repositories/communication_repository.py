@@ -1,16 +1,72 @@
-from datetime import datetime, timezone
+from datetime import datetime
+from sqlalchemy import select, bindparam
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.query_metrics import instrument_module
 from app.models.communication_log import CommunicationLog
+from app.repositories.bulk import bulk_insert, async_bulk_insert, DEFAULT_CHUNK_SIZE, soft_delete_where, utcnow
+from app.repositories.copy_loader import copy_rows, BufferedLoader
+from app.repositories.lookups import loaded_live
+from app.repositories.projection import project_by_ids, async_project_by_ids, project_page, async_project_page
+from app.repositories.pagination import keyset_page, async_keyset_page, DEFAULT_PAGE_SIZE
 
-def get_log_by_id(session: Session, log_id: int):
-    return (
-        session.query(CommunicationLog)
-        .filter(
-            CommunicationLog.id == log_id,
-            CommunicationLog.deleted_at.is_(None)
-        )
-        .first()
+_LOG_BY_ID = select(CommunicationLog).where(
+    CommunicationLog.id == bindparam("log_id"),
+    CommunicationLog.deleted_at.is_(None)
+)
+
+# communication_logs is partitioned by created_at; passing it narrows the
+# lookup to one partition instead of probing every month.
+_LOG_BY_ID_IN_PARTITION = _LOG_BY_ID.where(CommunicationLog.created_at == bindparam("created_at"))
+
+def _log_by_id(log_id: int, created_at: datetime | None = None):
+    if created_at is None:
+        return _LOG_BY_ID, {"log_id": log_id}
+    return _LOG_BY_ID_IN_PARTITION, {"log_id": log_id, "created_at": created_at}
+
+def _loaded_log(session, log_id, created_at):
+    if created_at is None:
+        return loaded_live(session, CommunicationLog, log_id)
+    return loaded_live(session, CommunicationLog, log_id, created_at=created_at)
+
+_LOGS_BY_IDS = select(CommunicationLog).where(
+    CommunicationLog.id.in_(bindparam("log_ids", expanding=True)),
+    CommunicationLog.deleted_at.is_(None)
+)
+
+def _soft_delete_logs_by_ids(log_ids):
+    return soft_delete_where(CommunicationLog, CommunicationLog.id.in_(log_ids))
+
+def _list_logs(org_id: int, application_id: int | None = None, borrower_id: int | None = None, since: datetime | None = None):
+    stmt = select(CommunicationLog).where(
+        CommunicationLog.organization_id == org_id,
+        CommunicationLog.deleted_at.is_(None)
     )
+    if application_id is not None:
+        stmt = stmt.where(CommunicationLog.application_id == application_id)
+    if borrower_id is not None:
+        stmt = stmt.where(CommunicationLog.borrower_id == borrower_id)
+    if since is not None:
+        stmt = stmt.where(CommunicationLog.created_at >= since)
+    return stmt
+
+def get_log_by_id(session: Session, log_id: int, created_at: datetime | None = None):
+    return _loaded_log(session, log_id, created_at) or session.scalars(*_log_by_id(log_id, created_at)).first()
+
+def get_logs_by_ids(session: Session, log_ids):
+    log_ids = set(log_ids)
+    if not log_ids:
+        return {}
+    return {row.id: row for row in session.scalars(_LOGS_BY_IDS, {"log_ids": list(log_ids)})}
+
+def list_logs(session: Session, org_id: int, application_id: int | None = None, borrower_id: int | None = None, since: datetime | None = None, cursor: str | None = None, page_size: int = DEFAULT_PAGE_SIZE):
+    return keyset_page(session, _list_logs(org_id, application_id, borrower_id, since), CommunicationLog, cursor, page_size)
+
+def get_log_rows_by_ids(session: Session, log_ids, fields):
+    return project_by_ids(session, CommunicationLog, log_ids, fields)
+
+def list_log_rows(session: Session, org_id: int, fields, cursor: str | None = None, page_size: int = DEFAULT_PAGE_SIZE):
+    return project_page(session, CommunicationLog, org_id, fields, cursor, page_size)
 
 def create_log(session: Session, log: CommunicationLog):
     session.add(log)
@@ -18,6 +74,66 @@ def create_log(session: Session, log: CommunicationLog):
     session.refresh(log)
     return log
 
+def bulk_create_logs(session: Session, rows, chunk_size: int = DEFAULT_CHUNK_SIZE):
+    return bulk_insert(session, CommunicationLog, rows, chunk_size)
+
+def copy_create_logs(session: Session, rows, columns=None):
+    count = copy_rows(session.connection(), CommunicationLog, rows, columns)
+    session.commit()
+    return count
+
+def log_loader(engine, **kwargs):
+    return BufferedLoader(engine, CommunicationLog, **kwargs)
+
 def soft_delete_log(session: Session, log: CommunicationLog):
-    log.deleted_at = datetime.now(datetime.timezone.utc)
+    log.deleted_at = utcnow()
     session.commit()
+
+def soft_delete_logs_by_ids(session: Session, log_ids):
+    log_ids = set(log_ids)
+    if not log_ids:
+        return 0
+    count = session.execute(_soft_delete_logs_by_ids(log_ids)).rowcount
+    session.commit()
+    return count
+
+async def async_get_log_by_id(session: AsyncSession, log_id: int, created_at: datetime | None = None):
+    return _loaded_log(session, log_id, created_at) or (await session.scalars(*_log_by_id(log_id, created_at))).first()
+
+async def async_get_logs_by_ids(session: AsyncSession, log_ids):
+    log_ids = set(log_ids)
+    if not log_ids:
+        return {}
+    return {row.id: row for row in await session.scalars(_LOGS_BY_IDS, {"log_ids": list(log_ids)})}
+
+async def async_list_logs(session: AsyncSession, org_id: int, application_id: int | None = None, borrower_id: int | None = None, since: datetime | None = None, cursor: str | None = None, page_size: int = DEFAULT_PAGE_SIZE):
+    return await async_keyset_page(session, _list_logs(org_id, application_id, borrower_id, since), CommunicationLog, cursor, page_size)
+
+async def async_get_log_rows_by_ids(session: AsyncSession, log_ids, fields):
+    return await async_project_by_ids(session, CommunicationLog, log_ids, fields)
+
+async def async_list_log_rows(session: AsyncSession, org_id: int, fields, cursor: str | None = None, page_size: int = DEFAULT_PAGE_SIZE):
+    return await async_project_page(session, CommunicationLog, org_id, fields, cursor, page_size)
+
+async def async_create_log(session: AsyncSession, log: CommunicationLog):
+    session.add(log)
+    await session.commit()
+    await session.refresh(log)
+    return log
+
+async def async_bulk_create_logs(session: AsyncSession, rows, chunk_size: int = DEFAULT_CHUNK_SIZE):
+    return await async_bulk_insert(session, CommunicationLog, rows, chunk_size)
+
+async def async_soft_delete_log(session: AsyncSession, log: CommunicationLog):
+    log.deleted_at = utcnow()
+    await session.commit()
+
+async def async_soft_delete_logs_by_ids(session: AsyncSession, log_ids):
+    log_ids = set(log_ids)
+    if not log_ids:
+        return 0
+    count = (await session.execute(_soft_delete_logs_by_ids(log_ids))).rowcount
+    await session.commit()
+    return count
+
+instrument_module(globals())
@@ -0,0 +1,173 @@
+import io
+import logging
+import queue
+import threading
+import time
+from sqlalchemy import insert
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_ROWS = 5000
+DEFAULT_MAX_INTERVAL = 1.0
+DEFAULT_MAX_PENDING = 50000
+DEFAULT_RETRIES = 3
+DEFAULT_RETRY_DELAY = 0.5
+
+_NULL = r"\N"
+_STOP = object()
+
+def default_columns(model, row=None):
+    # Leave out the id and anything with a server default (created_at, ...)
+    # that row doesn't supply, so the database fills those in. Rows in one
+    # batch are expected to share their keys, so the first one stands for
+    # all of them.
+    supplied = row or {}
+    return [
+        column.name
+        for column in model.__table__.columns
+        if not column.primary_key and (column.server_default is None or column.name in supplied)
+    ]
+
+def _csv_field(value):
+    if value is None:
+        return _NULL
+    # Always quoted, so a literal \N in a message can't be read back as NULL.
+    return '"' + str(value).replace('"', '""') + '"'
+
+def _copy_buffer(rows, columns):
+    buffer = io.StringIO()
+    for row in rows:
+        buffer.write(",".join(_csv_field(row.get(column)) for column in columns))
+        buffer.write("\n")
+    buffer.seek(0)
+    return buffer
+
+def copy_rows(connection, model, rows, columns=None):
+    # COPY FROM STDIN on psycopg2; a plain executemany INSERT anywhere else.
+    # Runs in the caller's transaction.
+    if not rows:
+        return 0
+    columns = columns or default_columns(model, rows[0])
+    if connection.dialect.driver == "psycopg2":
+        table = connection.dialect.identifier_preparer.format_table(model.__table__)
+        column_list = ", ".join(connection.dialect.identifier_preparer.quote(c) for c in columns)
+        sql = f"COPY {table} ({column_list}) FROM STDIN WITH (FORMAT csv, NULL '{_NULL}')"
+        cursor = connection.connection.cursor()
+        try:
+            cursor.copy_expert(sql, _copy_buffer(rows, columns))
+        finally:
+            cursor.close()
+    else:
+        connection.execute(
+            insert(model.__table__),
+            [{column: row.get(column) for column in columns} for row in rows],
+        )
+    return len(rows)
+
+class BufferedLoader:
+    """Buffers rows for one table and writes them in the background.
+
+    A batch is flushed once it reaches max_rows or max_interval seconds after
+    its first row arrived, whichever comes first. put() blocks when
+    max_pending rows are already queued, so producers slow down instead of
+    growing memory without bound; put(row, block=False) raises queue.Full
+    instead. close() flushes whatever is left.
+
+    A failed flush is retried up to retries times, backing off from
+    retry_delay seconds. A batch that still fails is passed to
+    on_failure(rows), or logged and dropped without one, and counted in
+    rows_failed either way; the worker then carries on with the next batch.
+    """
+
+    def __init__(self, engine, model, columns=None, max_rows: int = DEFAULT_MAX_ROWS,
+                 max_interval: float = DEFAULT_MAX_INTERVAL, max_pending: int = DEFAULT_MAX_PENDING,
+                 retries: int = DEFAULT_RETRIES, retry_delay: float = DEFAULT_RETRY_DELAY, on_failure=None):
+        self.engine = engine
+        self.model = model
+        # None: worked out per batch from its first row (see default_columns).
+        self.columns = columns
+        self.max_rows = max_rows
+        self.max_interval = max_interval
+        self.retries = retries
+        self.retry_delay = retry_delay
+        self.on_failure = on_failure
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._closed = False
+        # The last flush error, for inspection; it doesn't stop the loader.
+        self.error = None
+        self.rows_written = 0
+        self.rows_failed = 0
+        self.flushes = 0
+        self._thread = threading.Thread(
+            target=self._run, name=f"loader-{model.__tablename__}", daemon=True
+        )
+        self._thread.start()
+
+    def put(self, row, block: bool = True, timeout: float | None = None):
+        if self._closed:
+            raise RuntimeError("loader is closed")
+        if not self._thread.is_alive():
+            raise RuntimeError("loader worker is not running")
+        self._queue.put(row, block, timeout)
+
+    def close(self, timeout: float | None = None):
+        if self._closed:
+            return
+        self._closed = True
+        if self._thread.is_alive():
+            self._queue.put(_STOP)
+        self._thread.join(timeout)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _flush(self, batch):
+        with self.engine.begin() as connection:
+            copy_rows(connection, self.model, batch, self.columns)
+        self.rows_written += len(batch)
+        self.flushes += 1
+
+    def _run(self):
+        batch = []
+        deadline = None
+        while True:
+            timeout = None if deadline is None else max(deadline - time.monotonic(), 0)
+            try:
+                row = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                row = None
+            stop = row is _STOP
+            if row is not None and not stop:
+                if not batch:
+                    deadline = time.monotonic() + self.max_interval
+                batch.append(row)
+            due = batch and (stop or len(batch) >= self.max_rows or time.monotonic() >= deadline)
+            if due:
+                self._write(batch)
+                batch = []
+                deadline = None
+            if stop:
+                return
+
+    def _write(self, batch):
+        table = self.model.__tablename__
+        for attempt in range(self.retries + 1):
+            try:
+                self._flush(batch)
+                return
+            except Exception as exc:
+                self.error = exc
+                if attempt < self.retries:
+                    logger.warning("flushing %d %s rows failed, retrying", len(batch), table, exc_info=True)
+                    time.sleep(self.retry_delay * 2 ** attempt)
+        self.rows_failed += len(batch)
+        if self.on_failure is None:
+            logger.error("dropping %d %s rows after %d failed flushes", len(batch), table, self.retries + 1, exc_info=self.error)
+            return
+        try:
+            self.on_failure(batch)
+        except Exception:
+            logger.exception("on_failure for %d %s rows failed", len(batch), table)
@@ -1,16 +1,53 @@
-from datetime import datetime, timezone
+from sqlalchemy import select, bindparam
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.query_metrics import instrument_module
+from app.core.storage import get_storage
 from app.models.document import Document
+from app.repositories.bulk import bulk_insert, async_bulk_insert, DEFAULT_CHUNK_SIZE, soft_delete_where, utcnow
+from app.repositories.lookups import loaded_live
+from app.repositories.projection import project_by_ids, async_project_by_ids, project_page, async_project_page
+from app.repositories.pagination import keyset_page, async_keyset_page, DEFAULT_PAGE_SIZE
 
-def get_document_by_id(session: Session, doc_id: int):
-    return (
-        session.query(Document)
-        .filter(
-            Document.id == doc_id,
-            Document.deleted_at.is_(None)
-        )
-        .first()
+_DOCUMENT_BY_ID = select(Document).where(
+    Document.id == bindparam("doc_id"),
+    Document.deleted_at.is_(None)
+)
+
+_DOCUMENTS_BY_IDS = select(Document).where(
+    Document.id.in_(bindparam("doc_ids", expanding=True)),
+    Document.deleted_at.is_(None)
+)
+
+def _soft_delete_documents_by_ids(doc_ids):
+    return soft_delete_where(Document, Document.id.in_(doc_ids))
+
+def _list_documents(org_id: int, application_id: int | None = None):
+    stmt = select(Document).where(
+        Document.organization_id == org_id,
+        Document.deleted_at.is_(None)
     )
+    if application_id is not None:
+        stmt = stmt.where(Document.application_id == application_id)
+    return stmt
+
+def get_document_by_id(session: Session, doc_id: int):
+    return loaded_live(session, Document, doc_id) or session.scalars(_DOCUMENT_BY_ID, {"doc_id": doc_id}).first()
+
+def get_documents_by_ids(session: Session, doc_ids):
+    doc_ids = set(doc_ids)
+    if not doc_ids:
+        return {}
+    return {row.id: row for row in session.scalars(_DOCUMENTS_BY_IDS, {"doc_ids": list(doc_ids)})}
+
+def list_documents(session: Session, org_id: int, application_id: int | None = None, cursor: str | None = None, page_size: int = DEFAULT_PAGE_SIZE):
+    return keyset_page(session, _list_documents(org_id, application_id), Document, cursor, page_size)
+
+def get_document_rows_by_ids(session: Session, doc_ids, fields):
+    return project_by_ids(session, Document, doc_ids, fields)
+
+def list_document_rows(session: Session, org_id: int, fields, cursor: str | None = None, page_size: int = DEFAULT_PAGE_SIZE):
+    return project_page(session, Document, org_id, fields, cursor, page_size)
 
 def create_document(session: Session, doc: Document):
     session.add(doc)
@@ -18,6 +55,77 @@ def create_document(session: Session, doc: Document):
     session.refresh(doc)
     return doc
 
+def _attach_blob(doc: Document, blob):
+    doc.storage_provider = blob.provider
+    doc.storage_url = blob.url
+    doc.content_sha256 = blob.sha256
+    doc.file_size = blob.size
+
+def store_document(session: Session, doc: Document, content, storage=None):
+    # content is a binary file object or an iterable of byte chunks. The
+    # blob is written before the row, so a committed document always has
+    # its bytes; a failed commit leaves at most an unreferenced blob.
+    storage = storage or get_storage(doc.storage_provider)
+    _attach_blob(doc, storage.save(content))
+    return create_document(session, doc)
+
+def bulk_create_documents(session: Session, rows, chunk_size: int = DEFAULT_CHUNK_SIZE):
+    return bulk_insert(session, Document, rows, chunk_size)
+
 def soft_delete_document(session: Session, doc: Document):
-    doc.deleted_at = datetime.now(datetime.timezone.utc)
+    doc.deleted_at = utcnow()
+    session.commit()
+
+def soft_delete_documents_by_ids(session: Session, doc_ids):
+    doc_ids = set(doc_ids)
+    if not doc_ids:
+        return 0
+    count = session.execute(_soft_delete_documents_by_ids(doc_ids)).rowcount
     session.commit()
+    return count
+
+async def async_get_document_by_id(session: AsyncSession, doc_id: int):
+    return loaded_live(session, Document, doc_id) or (await session.scalars(_DOCUMENT_BY_ID, {"doc_id": doc_id})).first()
+
+async def async_get_documents_by_ids(session: AsyncSession, doc_ids):
+    doc_ids = set(doc_ids)
+    if not doc_ids:
+        return {}
+    return {row.id: row for row in await session.scalars(_DOCUMENTS_BY_IDS, {"doc_ids": list(doc_ids)})}
+
+async def async_list_documents(session: AsyncSession, org_id: int, application_id: int | None = None, cursor: str | None = None, page_size: int = DEFAULT_PAGE_SIZE):
+    return await async_keyset_page(session, _list_documents(org_id, application_id), Document, cursor, page_size)
+
+async def async_get_document_rows_by_ids(session: AsyncSession, doc_ids, fields):
+    return await async_project_by_ids(session, Document, doc_ids, fields)
+
+async def async_list_document_rows(session: AsyncSession, org_id: int, fields, cursor: str | None = None, page_size: int = DEFAULT_PAGE_SIZE):
+    return await async_project_page(session, Document, org_id, fields, cursor, page_size)
+
+async def async_create_document(session: AsyncSession, doc: Document):
+    session.add(doc)
+    await session.commit()
+    await session.refresh(doc)
+    return doc
+
+async def async_store_document(session: AsyncSession, doc: Document, content, storage=None):
+    storage = storage or get_storage(doc.storage_provider)
+    _attach_blob(doc, await storage.async_save(content))
+    return await async_create_document(session, doc)
+
+async def async_bulk_create_documents(session: AsyncSession, rows, chunk_size: int = DEFAULT_CHUNK_SIZE):
+    return await async_bulk_insert(session, Document, rows, chunk_size)
+
+async def async_soft_delete_document(session: AsyncSession, doc: Document):
+    doc.deleted_at = utcnow()
+    await session.commit()
+
+async def async_soft_delete_documents_by_ids(session: AsyncSession, doc_ids):
+    doc_ids = set(doc_ids)
+    if not doc_ids:
+        return 0
+    count = (await session.execute(_soft_delete_documents_by_ids(doc_ids))).rowcount
+    await session.commit()
+    return count
+
+instrument_module(globals())
@@ -0,0 +1,139 @@
+import csv
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from enum import Enum
+from sqlalchemy import Enum as EnumType, select
+from sqlalchemy.orm import Session
+from app.models.application import Application
+from app.models.borrower import Borrower
+
+DEFAULT_BATCH_SIZE = 5000
+
+def _export_columns(model, prefix):
+    return [
+        column.label(f"{prefix}_{column.name}")
+        for column in model.__table__.columns
+        if column.name != "deleted_at"
+    ]
+
+EXPORT_COLUMNS = _export_columns(Application, "application") + _export_columns(Borrower, "borrower")
+EXPORT_HEADER = [column.name for column in EXPORT_COLUMNS]
+
+def _export_stmt(org_id: int):
+    return (
+        select(*EXPORT_COLUMNS)
+        .join(Borrower, Borrower.id == Application.borrower_id)
+        .where(
+            Application.organization_id == org_id,
+            Application.deleted_at.is_(None),
+            Borrower.deleted_at.is_(None),
+        )
+        .order_by(Application.id)
+    )
+
+def iter_application_rows(session: Session, org_id: int, batch_size: int = DEFAULT_BATCH_SIZE):
+    # Column-only select: rows come back as plain tuples, nothing is added to
+    # the identity map. yield_per turns on stream_results, so psycopg2 uses a
+    # named server-side cursor and only batch_size rows are in memory at once.
+    result = session.execute(_export_stmt(org_id).execution_options(yield_per=batch_size))
+    try:
+        for row in result:
+            yield tuple(row)
+    finally:
+        result.close()
+
+def _json_default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+def write_csv(rows, fp, header=EXPORT_HEADER):
+    writer = csv.writer(fp)
+    writer.writerow(header)
+    count = 0
+    for row in rows:
+        writer.writerow(row)
+        count += 1
+    return count
+
+def write_ndjson(rows, fp, header=EXPORT_HEADER):
+    count = 0
+    for row in rows:
+        fp.write(json.dumps(dict(zip(header, row)), default=_json_default))
+        fp.write("\n")
+        count += 1
+    return count
+
+def _arrow_type(pa, types, column):
+    # Enum columns (statuses, roles) hold enum members; they go out as their
+    # values, like in CSV and NDJSON.
+    if isinstance(column.type, EnumType):
+        return pa.string()
+    return types[column.type.python_type]
+
+def _arrow_schema(pa, columns=EXPORT_COLUMNS):
+    # Fixed up front from the column types, so a first batch that happens to
+    # be all NULL in some column can't pin the file schema to the null type.
+    # Numeric goes out as text to keep full precision.
+    types = {
+        int: pa.int64(),
+        bool: pa.bool_(),
+        str: pa.string(),
+        Decimal: pa.string(),
+        datetime: pa.timestamp("us"),
+        date: pa.date32(),
+    }
+    return pa.schema([(column.name, _arrow_type(pa, types, column)) for column in columns])
+
+def _arrow_value(value):
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, Enum):
+        return value.value
+    return value
+
+def write_parquet(rows, path, batch_size: int = DEFAULT_BATCH_SIZE):
+    # pyarrow is only needed for parquet exports.
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = _arrow_schema(pa)
+
+    def write(writer, buffer):
+        columns = [
+            [_arrow_value(v) for v in values]
+            for values in zip(*buffer)
+        ]
+        writer.write_batch(pa.RecordBatch.from_arrays(
+            [pa.array(values, type=field.type) for values, field in zip(columns, schema)],
+            schema=schema,
+        ))
+
+    count = 0
+    buffer = []
+    with pq.ParquetWriter(path, schema) as writer:
+        for row in rows:
+            buffer.append(row)
+            if len(buffer) >= batch_size:
+                write(writer, buffer)
+                count += len(buffer)
+                buffer = []
+        if buffer:
+            write(writer, buffer)
+            count += len(buffer)
+    return count
+
+WRITERS = {
+    "csv": write_csv,
+    "ndjson": write_ndjson,
+    "parquet": write_parquet,
+}
+
+def export_applications(session: Session, org_id: int, out, format: str = "csv", batch_size: int = DEFAULT_BATCH_SIZE):
+    if format not in WRITERS:
+        raise ValueError(f"unknown export format: {format!r}")
+    rows = iter_application_rows(session, org_id, batch_size)
+    return WRITERS[format](rows, out)
@@ -0,0 +1,168 @@
+from collections import namedtuple
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+from app.core.cache import LRUCache
+from app.core.config import settings
+from app.core.tenancy import TENANT_KEY
+from app.models.organization import Organization
+from app.models.user import User
+from app.repositories import organization_repository, user_repository
+
+# Credentials never go into a cache; login should use
+# user_repository.get_user_by_email directly.
+_EXCLUDED_COLUMNS = {User: {"password_hash"}}
+
+def _snapshot_type(model):
+    excluded = _EXCLUDED_COLUMNS.get(model, set())
+    fields = [attr.key for attr in inspect(model).column_attrs if attr.key not in excluded]
+    return namedtuple(f"{model.__name__}Snapshot", fields)
+
+OrganizationSnapshot = _snapshot_type(Organization)
+UserSnapshot = _snapshot_type(User)
+
+def _in_tenant(session, snapshot, org_id):
+    # Snapshots are shared across sessions, so a tenant-scoped session must
+    # not be handed another tenant's row that some other session cached.
+    tenant = session.info.get(TENANT_KEY)
+    if snapshot is None or tenant is None or tenant == org_id:
+        return snapshot
+    return None
+
+def _org_keys(org_id):
+    return [f"organization:id:{org_id}"]
+
+def _user_keys(user_id, *emails):
+    return [f"user:id:{user_id}"] + [f"user:email:{email}" for email in emails if email]
+
+class IdentityCache:
+    def __init__(self, max_size: int = 10000, ttl: float = 60.0, backend=None):
+        self.local = LRUCache(max_size, ttl)
+        self.backend = backend
+        self.ttl = ttl
+
+    def _lookup(self, session, key, snapshot_type, load):
+        # A session whose transaction has flushed changes to these tables
+        # reads past the cache (it should see its own writes) and doesn't
+        # publish what it loads: other sessions would be served rows that
+        # may never commit.
+        if not _writing(session):
+            snapshot = self.local.get(key)
+            if snapshot is not None:
+                return snapshot
+            if self.backend is not None:
+                row = self.backend.get(key)
+                if row is not None:
+                    snapshot = snapshot_type(**row)
+                    self.local.set(key, snapshot)
+                    return snapshot
+        obj = load()
+        if obj is None:
+            return None
+        snapshot = snapshot_type(**{field: getattr(obj, field) for field in snapshot_type._fields})
+        # load() may have autoflushed this session's first write, or returned
+        # an object from the identity map with changes not yet flushed.
+        if not (_writing(session) or inspect(obj).modified):
+            self.local.set(key, snapshot)
+            if self.backend is not None:
+                self.backend.set(key, snapshot._asdict(), self.ttl)
+        return snapshot
+
+    def get_organization_by_id(self, session: Session, org_id: int):
+        snapshot = self._lookup(
+            session, _org_keys(org_id)[0], OrganizationSnapshot,
+            lambda: organization_repository.get_organization_by_id(session, org_id),
+        )
+        return _in_tenant(session, snapshot, snapshot and snapshot.id)
+
+    def get_user_by_id(self, session: Session, user_id: int):
+        snapshot = self._lookup(
+            session, _user_keys(user_id)[0], UserSnapshot,
+            lambda: user_repository.get_user_by_id(session, user_id),
+        )
+        return _in_tenant(session, snapshot, snapshot and snapshot.organization_id)
+
+    def get_user_by_email(self, session: Session, email: str):
+        snapshot = self._lookup(
+            session, f"user:email:{email}", UserSnapshot,
+            lambda: user_repository.get_user_by_email(session, email),
+        )
+        return _in_tenant(session, snapshot, snapshot and snapshot.organization_id)
+
+    def invalidate(self, *keys):
+        self.local.delete(*keys)
+        if self.backend is not None:
+            self.backend.delete(*keys)
+
+    def clear(self):
+        self.local.clear()
+        if self.backend is not None:
+            self.backend.clear()
+
+    def stats(self):
+        return self.local.stats()
+
+identity_cache = IdentityCache(settings.identity_cache_size, settings.identity_cache_ttl)
+
+def get_organization_by_id(session: Session, org_id: int):
+    return identity_cache.get_organization_by_id(session, org_id)
+
+def get_user_by_id(session: Session, user_id: int):
+    return identity_cache.get_user_by_id(session, user_id)
+
+def get_user_by_email(session: Session, email: str):
+    return identity_cache.get_user_by_email(session, email)
+
+# Invalidation. Keys are dropped as soon as the flush happens and again after
+# commit, so a concurrent reader that re-cached the old row between the two
+# doesn't keep it for a full ttl.
+
+def _writing(session):
+    # Set by the flush-time hooks below until the transaction ends.
+    return "identity_cache_stale" in session.info or "identity_cache_clear" in session.info
+
+def _stale_keys(target):
+    if isinstance(target, Organization):
+        return _org_keys(target.id)
+    history = inspect(target).attrs.email.history
+    return _user_keys(target.id, target.email, *(history.deleted or ()))
+
+def _on_change(mapper, connection, target):
+    keys = _stale_keys(target)
+    identity_cache.invalidate(*keys)
+    session = Session.object_session(target)
+    if session is not None:
+        session.info.setdefault("identity_cache_stale", set()).update(keys)
+
+for _model in (Organization, User):
+    event.listen(_model, "after_insert", _on_change)
+    event.listen(_model, "after_update", _on_change)
+    event.listen(_model, "after_delete", _on_change)
+
+@event.listens_for(Session, "do_orm_execute")
+def _on_orm_execute(orm_execute_state):
+    # Set-based UPDATE/DELETE statements (soft_delete_*_by_ids, the cascades)
+    # bypass the mapper events and don't say which rows they touch, so drop
+    # everything; they're rare for these two tables.
+    if not (orm_execute_state.is_update or orm_execute_state.is_delete):
+        return
+    if any(mapper.class_ in (Organization, User) for mapper in orm_execute_state.all_mappers):
+        identity_cache.clear()
+        orm_execute_state.session.info["identity_cache_clear"] = True
+
+def _drop_stale(session):
+    keys = session.info.pop("identity_cache_stale", None)
+    if keys:
+        identity_cache.invalidate(*keys)
+    if session.info.pop("identity_cache_clear", False):
+        identity_cache.clear()
+
+@event.listens_for(Session, "after_commit")
+def _after_commit(session):
+    _drop_stale(session)
+
+@event.listens_for(Session, "after_transaction_end")
+def _after_transaction_end(session, transaction):
+    # Commit, rollback or close: either way the writes are no longer in
+    # flight, and the session can use the cache again.
+    if transaction.parent is None:
+        _drop_stale(session)
@@ -0,0 +1,127 @@
+import asyncio
+from collections import defaultdict
+from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models import Organization, User, Borrower, Application, Document, CommunicationLog, AuditTrail
+from app.repositories import (
+    organization_repository,
+    user_repository,
+    borrower_repository,
+    application_repository,
+    document_repository,
+    communication_repository,
+    audit_trail_repository,
+)
+
+BY_IDS = {
+    Organization: (organization_repository.get_organizations_by_ids, organization_repository.async_get_organizations_by_ids),
+    User: (user_repository.get_users_by_ids, user_repository.async_get_users_by_ids),
+    Borrower: (borrower_repository.get_borrowers_by_ids, borrower_repository.async_get_borrowers_by_ids),
+    Application: (application_repository.get_applications_by_ids, application_repository.async_get_applications_by_ids),
+    Document: (document_repository.get_documents_by_ids, document_repository.async_get_documents_by_ids),
+    CommunicationLog: (communication_repository.get_logs_by_ids, communication_repository.async_get_logs_by_ids),
+    AuditTrail: (audit_trail_repository.get_audit_entries_by_ids, audit_trail_repository.async_get_audit_entries_by_ids),
+}
+
+class RequestLoader:
+    """Per-request batching of by-id lookups.
+
+    Ids announced with want() are held until the first get() for that
+    entity, which fetches all of them in one get_*_by_ids query. Results,
+    including misses, are remembered for the life of the loader, so it
+    should not outlive the request (or the session) it was created for.
+    """
+
+    def __init__(self, session: Session):
+        self.session = session
+        self._loaded = defaultdict(dict)
+        self._pending = defaultdict(set)
+        self.queries = 0
+
+    def want(self, model, *ids):
+        loaded = self._loaded[model]
+        self._pending[model].update(i for i in ids if i is not None and i not in loaded)
+
+    def get(self, model, id):
+        if id is None:
+            return None
+        if id not in self._loaded[model]:
+            self._pending[model].add(id)
+            self._dispatch(model)
+        return self._loaded[model][id]
+
+    def get_many(self, model, ids):
+        ids = [i for i in ids if i is not None]
+        self.want(model, *ids)
+        if self._pending[model]:
+            self._dispatch(model)
+        return {i: self._loaded[model][i] for i in ids}
+
+    def _dispatch(self, model):
+        ids = self._pending.pop(model)
+        rows = BY_IDS[model][0](self.session, ids)
+        self.queries += 1
+        loaded = self._loaded[model]
+        for i in ids:
+            loaded[i] = rows.get(i)
+
+    def clear(self):
+        self._loaded.clear()
+        self._pending.clear()
+
+class AsyncRequestLoader:
+    """asyncio flavour of RequestLoader.
+
+    load() calls made in the same event loop tick (e.g. under
+    asyncio.gather) are collected and dispatched together, one
+    async_get_*_by_ids query per entity. Queries run one after another since
+    an AsyncSession can't run statements concurrently.
+    """
+
+    def __init__(self, session: AsyncSession):
+        self.session = session
+        self._futures = {}
+        self._pending = defaultdict(set)
+        self._scheduled = False
+        self.queries = 0
+
+    def load(self, model, id):
+        key = (model, id)
+        future = self._futures.get(key)
+        if future is None:
+            loop = asyncio.get_running_loop()
+            future = loop.create_future()
+            self._futures[key] = future
+            self._pending[model].add(id)
+            if not self._scheduled:
+                self._scheduled = True
+                loop.call_soon(lambda: loop.create_task(self._dispatch()))
+        return future
+
+    async def load_many(self, model, ids):
+        ids = list(ids)
+        return dict(zip(ids, await asyncio.gather(*(self.load(model, i) for i in ids))))
+
+    async def _dispatch(self):
+        # Stays scheduled until the queue is drained: load() calls arriving
+        # while a query is awaited are picked up by this loop instead of
+        # starting a second dispatch on the same session.
+        try:
+            while self._pending:
+                model, ids = self._pending.popitem()
+                try:
+                    rows = await BY_IDS[model][1](self.session, ids)
+                except Exception as exc:
+                    for i in ids:
+                        # Forget the failure so a later load() can retry.
+                        self._futures.pop((model, i)).set_exception(exc)
+                    continue
+                self.queries += 1
+                for i in ids:
+                    self._futures[(model, i)].set_result(rows.get(i))
+        finally:
+            self._scheduled = False
+
+    def clear(self):
+        self._futures.clear()
+        self._pending.clear()
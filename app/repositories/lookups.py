@@ -0,0 +1,36 @@
+from sqlalchemy import inspect
+from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.tenancy import TENANT_KEY
+from app.models import Organization
+
+def loaded_live(session: Session | AsyncSession, model, pk, **expected):
+    """The session's already loaded instance for pk if it is live, else None.
+
+    This is the session.get() shortcut with the repositories' soft-delete
+    rule on top: an instance counts only when deleted_at is loaded and None,
+    it belongs to the session's tenant, and any expected column values
+    (e.g. created_at for partitioned tables) match. Anything else returns
+    None and the caller runs its query, so results never differ from the
+    query path except that no SQL is issued.
+    """
+    if isinstance(session, AsyncSession):
+        session = session.sync_session
+    obj = session.identity_map.get(session.identity_key(model, pk))
+    if obj is None:
+        return None
+    state = inspect(obj)
+    if state.deleted or state.was_deleted or state.expired:
+        return None
+    tenant_column = "id" if model is Organization else "organization_id"
+    tenant = session.info.get(TENANT_KEY)
+    needed = {"deleted_at", *expected, *([tenant_column] if tenant is not None else ())}
+    if needed & state.unloaded:
+        return None
+    if obj.deleted_at is not None:
+        return None
+    if tenant is not None and getattr(obj, tenant_column) != tenant:
+        return None
+    if any(getattr(obj, key) != value for key, value in expected.items()):
+        return None
+    return obj
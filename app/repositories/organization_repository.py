@@ -1,16 +1,59 @@
-from datetime import datetime, timezone
+from sqlalchemy import select, bindparam
 from sqlalchemy.orm import Session
-from app.models.organization import Organization
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.query_metrics import instrument_module
+from app.models import Organization, User, Borrower, Application, Document, CommunicationLog
+from app.repositories.bulk import bulk_insert, async_bulk_insert, DEFAULT_CHUNK_SIZE, soft_delete_where, run_cascade, async_run_cascade, utcnow
+from app.repositories.lookups import loaded_live
+from app.repositories.projection import project_by_ids, async_project_by_ids, project_page, async_project_page
+from app.repositories.pagination import keyset_page, async_keyset_page, DEFAULT_PAGE_SIZE
 
-def get_organization_by_id(session: Session, org_id: int):
-    return (
-        session.query(Organization)
-        .filter(
-            Organization.id == org_id,
-            Organization.deleted_at.is_(None)
-        )
-        .first()
+_ORGANIZATION_BY_ID = select(Organization).where(
+    Organization.id == bindparam("org_id"),
+    Organization.deleted_at.is_(None)
+)
+
+_ORGANIZATIONS_BY_IDS = select(Organization).where(
+    Organization.id.in_(bindparam("org_ids", expanding=True)),
+    Organization.deleted_at.is_(None)
+)
+
+def _soft_delete_organizations_by_ids(org_ids):
+    return soft_delete_where(Organization, Organization.id.in_(org_ids))
+
+def _organization_cascade(org_ids):
+    return {
+        "documents": soft_delete_where(Document, Document.organization_id.in_(org_ids)),
+        "communication_logs": soft_delete_where(CommunicationLog, CommunicationLog.organization_id.in_(org_ids)),
+        "applications": soft_delete_where(Application, Application.organization_id.in_(org_ids)),
+        "borrowers": soft_delete_where(Borrower, Borrower.organization_id.in_(org_ids)),
+        "users": soft_delete_where(User, User.organization_id.in_(org_ids)),
+        "organizations": _soft_delete_organizations_by_ids(org_ids),
+    }
+
+def _list_organizations():
+    stmt = select(Organization).where(
+        Organization.deleted_at.is_(None)
     )
+    return stmt
+
+def get_organization_by_id(session: Session, org_id: int):
+    return loaded_live(session, Organization, org_id) or session.scalars(_ORGANIZATION_BY_ID, {"org_id": org_id}).first()
+
+def get_organizations_by_ids(session: Session, org_ids):
+    org_ids = set(org_ids)
+    if not org_ids:
+        return {}
+    return {row.id: row for row in session.scalars(_ORGANIZATIONS_BY_IDS, {"org_ids": list(org_ids)})}
+
+def list_organizations(session: Session, cursor: str | None = None, page_size: int = DEFAULT_PAGE_SIZE):
+    return keyset_page(session, _list_organizations(), Organization, cursor, page_size)
+
+def get_organization_rows_by_ids(session: Session, org_ids, fields):
+    return project_by_ids(session, Organization, org_ids, fields)
+
+def list_organization_rows(session: Session, fields, cursor: str | None = None, page_size: int = DEFAULT_PAGE_SIZE):
+    return project_page(session, Organization, None, fields, cursor, page_size)
 
 def create_organization(session: Session, org: Organization):
     session.add(org)
@@ -18,6 +61,70 @@ def create_organization(session: Session, org: Organization):
     session.refresh(org)
     return org
 
+def bulk_create_organizations(session: Session, rows, chunk_size: int = DEFAULT_CHUNK_SIZE):
+    return bulk_insert(session, Organization, rows, chunk_size)
+
 def soft_delete_organization(session: Session, org: Organization):
-    org.deleted_at = datetime.now(datetime.timezone.utc)
+    org.deleted_at = utcnow()
+    session.commit()
+
+def soft_delete_organizations_by_ids(session: Session, org_ids):
+    org_ids = set(org_ids)
+    if not org_ids:
+        return 0
+    count = session.execute(_soft_delete_organizations_by_ids(org_ids)).rowcount
     session.commit()
+    return count
+
+def soft_delete_organization_cascade(session: Session, org_ids):
+    org_ids = set(org_ids)
+    if not org_ids:
+        return {}
+    return run_cascade(session, _organization_cascade(org_ids))
+
+async def async_get_organization_by_id(session: AsyncSession, org_id: int):
+    return loaded_live(session, Organization, org_id) or (await session.scalars(_ORGANIZATION_BY_ID, {"org_id": org_id})).first()
+
+async def async_get_organizations_by_ids(session: AsyncSession, org_ids):
+    org_ids = set(org_ids)
+    if not org_ids:
+        return {}
+    return {row.id: row for row in await session.scalars(_ORGANIZATIONS_BY_IDS, {"org_ids": list(org_ids)})}
+
+async def async_list_organizations(session: AsyncSession, cursor: str | None = None, page_size: int = DEFAULT_PAGE_SIZE):
+    return await async_keyset_page(session, _list_organizations(), Organization, cursor, page_size)
+
+async def async_get_organization_rows_by_ids(session: AsyncSession, org_ids, fields):
+    return await async_project_by_ids(session, Organization, org_ids, fields)
+
+async def async_list_organization_rows(session: AsyncSession, fields, cursor: str | None = None, page_size: int = DEFAULT_PAGE_SIZE):
+    return await async_project_page(session, Organization, None, fields, cursor, page_size)
+
+async def async_create_organization(session: AsyncSession, org: Organization):
+    session.add(org)
+    await session.commit()
+    await session.refresh(org)
+    return org
+
+async def async_bulk_create_organizations(session: AsyncSession, rows, chunk_size: int = DEFAULT_CHUNK_SIZE):
+    return await async_bulk_insert(session, Organization, rows, chunk_size)
+
+async def async_soft_delete_organization(session: AsyncSession, org: Organization):
+    org.deleted_at = utcnow()
+    await session.commit()
+
+async def async_soft_delete_organizations_by_ids(session: AsyncSession, org_ids):
+    org_ids = set(org_ids)
+    if not org_ids:
+        return 0
+    count = (await session.execute(_soft_delete_organizations_by_ids(org_ids))).rowcount
+    await session.commit()
+    return count
+
+async def async_soft_delete_organization_cascade(session: AsyncSession, org_ids):
+    org_ids = set(org_ids)
+    if not org_ids:
+        return {}
+    return await async_run_cascade(session, _organization_cascade(org_ids))
+
+instrument_module(globals())
@@ -0,0 +1,104 @@
+import base64
+import json
+from datetime import datetime
+from typing import NamedTuple
+from sqlalchemy import tuple_
+from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+class Page(NamedTuple):
+    items: list
+    next_cursor: str | None
+
+def encode_cursor(created_at: datetime, row_id: int) -> str:
+    raw = json.dumps([created_at.isoformat() if created_at else None, row_id])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str):
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, row_id = json.loads(base64.urlsafe_b64decode(padded))
+        return (datetime.fromisoformat(created_at) if created_at else None), int(row_id)
+    except (ValueError, TypeError) as exc:
+        raise ValueError(f"invalid page cursor: {cursor!r}") from exc
+
+def encode_rank_cursor(rank: float, row_id: int) -> str:
+    raw = json.dumps([rank, row_id])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+def decode_rank_cursor(cursor: str):
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        rank, row_id = json.loads(base64.urlsafe_b64decode(padded))
+        return float(rank), int(row_id)
+    except (ValueError, TypeError) as exc:
+        raise ValueError(f"invalid page cursor: {cursor!r}") from exc
+
+def keyset_stmt(stmt, model, cursor: str | None, page_size: int):
+    # Newest first on (created_at, id), which the *_org_created_live indexes
+    # serve directly. One extra row tells us whether another page exists
+    # without counting anything.
+    page_size = max(1, min(page_size, MAX_PAGE_SIZE))
+    if cursor is not None:
+        created_at, row_id = decode_cursor(cursor)
+        # The plain created_at bound is implied by the tuple comparison but is
+        # what lets Postgres prune partitions and bound the index range scan.
+        stmt = stmt.where(
+            model.created_at <= created_at,
+            tuple_(model.created_at, model.id) < tuple_(created_at, row_id),
+        )
+    return stmt.order_by(model.created_at.desc(), model.id.desc()).limit(page_size + 1), page_size
+
+def _page(rows, page_size):
+    if len(rows) <= page_size:
+        return Page(rows, None)
+    rows = rows[:page_size]
+    last = rows[-1]
+    return Page(rows, encode_cursor(last.created_at, last.id))
+
+def ranked_stmt(stmt, rank, model, cursor: str | None, page_size: int):
+    # Best match first, ties broken by newest id. The rank has to come back
+    # bit-for-bit as it was computed (a double, JSON round-trips those) or
+    # the next page would repeat or skip rows at the boundary.
+    page_size = max(1, min(page_size, MAX_PAGE_SIZE))
+    stmt = stmt.add_columns(rank.label("rank"))
+    if cursor is not None:
+        score, row_id = decode_rank_cursor(cursor)
+        stmt = stmt.where(tuple_(rank, model.id) < tuple_(score, row_id))
+    return stmt.order_by(rank.desc(), model.id.desc()).limit(page_size + 1), page_size
+
+def _ranked_page(rows, page_size):
+    more = len(rows) > page_size
+    rows = rows[:page_size]
+    items = [row[0] for row in rows]
+    if not more:
+        return Page(items, None)
+    return Page(items, encode_rank_cursor(rows[-1].rank, items[-1].id))
+
+def keyset_page(session: Session, stmt, model, cursor: str | None = None, page_size: int = DEFAULT_PAGE_SIZE):
+    stmt, page_size = keyset_stmt(stmt, model, cursor, page_size)
+    return _page(session.scalars(stmt).all(), page_size)
+
+async def async_keyset_page(session: AsyncSession, stmt, model, cursor: str | None = None, page_size: int = DEFAULT_PAGE_SIZE):
+    stmt, page_size = keyset_stmt(stmt, model, cursor, page_size)
+    return _page((await session.scalars(stmt)).all(), page_size)
+
+def ranked_page(session: Session, stmt, rank, model, cursor: str | None = None, page_size: int = DEFAULT_PAGE_SIZE):
+    stmt, page_size = ranked_stmt(stmt, rank, model, cursor, page_size)
+    return _ranked_page(session.execute(stmt).all(), page_size)
+
+async def async_ranked_page(session: AsyncSession, stmt, rank, model, cursor: str | None = None, page_size: int = DEFAULT_PAGE_SIZE):
+    stmt, page_size = ranked_stmt(stmt, rank, model, cursor, page_size)
+    return _ranked_page((await session.execute(stmt)).all(), page_size)
+
+def iter_pages(list_fn, session: Session, *args, page_size: int = DEFAULT_PAGE_SIZE, **kwargs):
+    cursor = None
+    while True:
+        page = list_fn(session, *args, cursor=cursor, page_size=page_size, **kwargs)
+        yield page.items
+        if page.next_cursor is None:
+            return
+        cursor = page.next_cursor
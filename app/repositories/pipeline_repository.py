@@ -0,0 +1,33 @@
+from decimal import Decimal
+from typing import NamedTuple
+from sqlalchemy import select, bindparam
+from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.query_metrics import instrument_module
+from app.models.application_status_count import ApplicationStatusCount
+from app.models.enums import ApplicationStatus
+
+class StatusTotals(NamedTuple):
+    count: int
+    sum_amount: Decimal
+
+_SUMMARY_BY_ORG = select(
+    ApplicationStatusCount.status,
+    ApplicationStatusCount.count,
+    ApplicationStatusCount.sum_amount,
+).where(
+    ApplicationStatusCount.organization_id == bindparam("org_id"),
+    ApplicationStatusCount.count > 0
+).order_by(ApplicationStatusCount.status)
+
+def _summary(rows):
+    # Applications without a status are stored under "".
+    return {ApplicationStatus(row.status) if row.status else None: StatusTotals(row.count, Decimal(row.sum_amount)) for row in rows}
+
+def get_pipeline_summary(session: Session, org_id: int):
+    return _summary(session.execute(_SUMMARY_BY_ORG, {"org_id": org_id}))
+
+async def async_get_pipeline_summary(session: AsyncSession, org_id: int):
+    return _summary(await session.execute(_SUMMARY_BY_ORG, {"org_id": org_id}))
+
+instrument_module(globals())
@@ -0,0 +1,88 @@
+import functools
+from collections import namedtuple
+from sqlalchemy import select, bindparam, inspect, tuple_
+from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.repositories.pagination import Page, decode_cursor, encode_cursor, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+
+MAX_SHAPES = 256
+
+class Projection:
+    """Prebuilt statements and row type for one (model, columns) shape.
+
+    Rows come back as namedtuples holding id, the requested columns and
+    created_at (needed for the page cursor), in that order. Selecting
+    columns rather than the entity means nothing is hydrated into ORM
+    instances or added to the identity map; the statements still go through
+    the ORM, so tenant scoping applies.
+    """
+
+    __slots__ = ("model", "fields", "row", "by_ids", "first_page", "next_page")
+
+    def __init__(self, model, fields):
+        mapper = inspect(model)
+        unknown = [f for f in fields if f not in mapper.column_attrs]
+        if unknown:
+            raise ValueError(f"{model.__name__} has no column {', '.join(map(repr, unknown))}")
+        self.model = model
+        self.fields = tuple(dict.fromkeys(("id",) + tuple(fields) + ("created_at",)))
+        self.row = namedtuple(f"{model.__name__}Row", self.fields)
+        live = select(*(getattr(model, f) for f in self.fields)).where(model.deleted_at.is_(None))
+        self.by_ids = live.where(model.id.in_(bindparam("ids", expanding=True)))
+        if "organization_id" in mapper.column_attrs:
+            live = live.where(model.organization_id == bindparam("org_id"))
+        order = (model.created_at.desc(), model.id.desc())
+        self.first_page = live.order_by(*order).limit(bindparam("limit"))
+        # Same shape as keyset_stmt, with the bounds as parameters.
+        self.next_page = live.where(
+            model.created_at <= bindparam("created_at"),
+            tuple_(model.created_at, model.id) < tuple_(bindparam("created_at"), bindparam("row_id")),
+        ).order_by(*order).limit(bindparam("limit"))
+
+    def page_query(self, org_id, cursor, page_size):
+        page_size = max(1, min(page_size, MAX_PAGE_SIZE))
+        params = {"org_id": org_id, "limit": page_size + 1}
+        if cursor is None:
+            return self.first_page, params, page_size
+        params["created_at"], params["row_id"] = decode_cursor(cursor)
+        return self.next_page, params, page_size
+
+    def page(self, rows, page_size):
+        rows = [self.row._make(row) for row in rows]
+        if len(rows) <= page_size:
+            return Page(rows, None)
+        rows = rows[:page_size]
+        return Page(rows, encode_cursor(rows[-1].created_at, rows[-1].id))
+
+@functools.lru_cache(maxsize=MAX_SHAPES)
+def _projection(model, fields):
+    return Projection(model, fields)
+
+def projection(model, fields) -> Projection:
+    # Statements are built once per shape and reused, so a call costs a
+    # cache-key lookup instead of query construction and compilation.
+    return _projection(model, tuple(fields))
+
+def project_by_ids(session: Session, model, ids, fields):
+    ids = set(ids)
+    if not ids:
+        return {}
+    shape = projection(model, fields)
+    return {row.id: row for row in map(shape.row._make, session.execute(shape.by_ids, {"ids": list(ids)}))}
+
+def project_page(session: Session, model, org_id: int | None, fields, cursor: str | None = None, page_size: int = DEFAULT_PAGE_SIZE):
+    shape = projection(model, fields)
+    stmt, params, page_size = shape.page_query(org_id, cursor, page_size)
+    return shape.page(session.execute(stmt, params).all(), page_size)
+
+async def async_project_by_ids(session: AsyncSession, model, ids, fields):
+    ids = set(ids)
+    if not ids:
+        return {}
+    shape = projection(model, fields)
+    return {row.id: row for row in map(shape.row._make, await session.execute(shape.by_ids, {"ids": list(ids)}))}
+
+async def async_project_page(session: AsyncSession, model, org_id: int | None, fields, cursor: str | None = None, page_size: int = DEFAULT_PAGE_SIZE):
+    shape = projection(model, fields)
+    stmt, params, page_size = shape.page_query(org_id, cursor, page_size)
+    return shape.page((await session.execute(stmt, params)).all(), page_size)
@@ -0,0 +1,85 @@
+from datetime import datetime
+from sqlalchemy import select, func, cast, or_, literal_column, table, column, Double
+from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.query_metrics import instrument_module
+from app.core.search import BORROWER_NAME_SQL, search_terms, prefix_tsquery, fts5_query, fts_table
+from app.models import Borrower, CommunicationLog
+from app.repositories.pagination import Page, ranked_page, async_ranked_page, DEFAULT_PAGE_SIZE
+
+def _dialect(session):
+    # session.get_bind() would count as a write on a RoutingSession and pin
+    # the transaction to the primary; the replicas share its dialect anyway.
+    bind = session.bind if session.bind is not None else session.get_bind()
+    return bind.dialect.name
+
+def _fts_join(stmt, model, terms):
+    fts = fts_table(model.__tablename__)
+    stmt = stmt.join(table(fts, column("rowid")), literal_column(f"{fts}.rowid") == model.id)
+    # bm25 is lower-is-better; negated so both dialects rank descending.
+    return stmt.where(literal_column(fts).match(fts5_query(terms))), -func.bm25(literal_column(fts))
+
+def _search_borrowers(dialect: str, org_id: int, terms):
+    stmt = select(Borrower).where(
+        Borrower.organization_id == org_id,
+        Borrower.deleted_at.is_(None)
+    )
+    if dialect != "postgresql":
+        return _fts_join(stmt, Borrower, terms)
+    # The literal SQL keeps the name expression identical to the one
+    # ix_borrowers_name_trgm_live was built on, so pg_trgm's % can use it.
+    vector = literal_column("borrowers.search_vector")
+    name = literal_column(BORROWER_NAME_SQL)
+    query = func.to_tsquery(literal_column("'simple'::regconfig"), prefix_tsquery(terms))
+    needle = " ".join(terms).lower()
+    stmt = stmt.where(or_(vector.op("@@")(query), name.op("%")(needle)))
+    return stmt, cast(func.greatest(func.ts_rank(vector, query), func.similarity(name, needle)), Double)
+
+def _search_messages(dialect: str, org_id: int, q: str, terms, application_id: int | None = None, borrower_id: int | None = None, since: datetime | None = None):
+    stmt = select(CommunicationLog).where(
+        CommunicationLog.organization_id == org_id,
+        CommunicationLog.deleted_at.is_(None)
+    )
+    if application_id is not None:
+        stmt = stmt.where(CommunicationLog.application_id == application_id)
+    if borrower_id is not None:
+        stmt = stmt.where(CommunicationLog.borrower_id == borrower_id)
+    if since is not None:
+        stmt = stmt.where(CommunicationLog.created_at >= since)
+    if dialect != "postgresql":
+        return _fts_join(stmt, CommunicationLog, terms)
+    # Messages are prose: stemmed, with websearch syntax ("quoted phrases",
+    # or, -excluded) instead of prefix matching.
+    vector = literal_column("communication_logs.search_vector")
+    query = func.websearch_to_tsquery(literal_column("'english'::regconfig"), q)
+    return stmt.where(vector.op("@@")(query)), cast(func.ts_rank_cd(vector, query), Double)
+
+def search_borrowers(session: Session, org_id: int, q: str, cursor: str | None = None, page_size: int = DEFAULT_PAGE_SIZE):
+    terms = search_terms(q)
+    if not terms:
+        return Page([], None)
+    stmt, rank = _search_borrowers(_dialect(session), org_id, terms)
+    return ranked_page(session, stmt, rank, Borrower, cursor, page_size)
+
+def search_messages(session: Session, org_id: int, q: str, application_id: int | None = None, borrower_id: int | None = None, since: datetime | None = None, cursor: str | None = None, page_size: int = DEFAULT_PAGE_SIZE):
+    terms = search_terms(q)
+    if not terms:
+        return Page([], None)
+    stmt, rank = _search_messages(_dialect(session), org_id, q, terms, application_id, borrower_id, since)
+    return ranked_page(session, stmt, rank, CommunicationLog, cursor, page_size)
+
+async def async_search_borrowers(session: AsyncSession, org_id: int, q: str, cursor: str | None = None, page_size: int = DEFAULT_PAGE_SIZE):
+    terms = search_terms(q)
+    if not terms:
+        return Page([], None)
+    stmt, rank = _search_borrowers(_dialect(session), org_id, terms)
+    return await async_ranked_page(session, stmt, rank, Borrower, cursor, page_size)
+
+async def async_search_messages(session: AsyncSession, org_id: int, q: str, application_id: int | None = None, borrower_id: int | None = None, since: datetime | None = None, cursor: str | None = None, page_size: int = DEFAULT_PAGE_SIZE):
+    terms = search_terms(q)
+    if not terms:
+        return Page([], None)
+    stmt, rank = _search_messages(_dialect(session), org_id, q, terms, application_id, borrower_id, since)
+    return await async_ranked_page(session, stmt, rank, CommunicationLog, cursor, page_size)
+
+instrument_module(globals())
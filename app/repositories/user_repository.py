@@ -1,26 +1,58 @@
-from datetime import datetime, timezone
+from sqlalchemy import select, bindparam
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.query_metrics import instrument_module
 from app.models.user import User
+from app.repositories.bulk import bulk_insert, async_bulk_insert, DEFAULT_CHUNK_SIZE, soft_delete_where, utcnow
+from app.repositories.lookups import loaded_live
+from app.repositories.projection import project_by_ids, async_project_by_ids, project_page, async_project_page
+from app.repositories.pagination import keyset_page, async_keyset_page, DEFAULT_PAGE_SIZE
 
-def get_user_by_id(session: Session, user_id: int):
-    return (
-        session.query(User)
-        .filter(
-            User.id == user_id,
-            User.deleted_at.is_(None)
-        )
-        .first()
+_USER_BY_ID = select(User).where(
+    User.id == bindparam("user_id"),
+    User.deleted_at.is_(None)
+)
+
+_USER_BY_EMAIL = select(User).where(
+    User.email == bindparam("email"),
+    User.deleted_at.is_(None)
+)
+
+_USERS_BY_IDS = select(User).where(
+    User.id.in_(bindparam("user_ids", expanding=True)),
+    User.deleted_at.is_(None)
+)
+
+def _soft_delete_users_by_ids(user_ids):
+    return soft_delete_where(User, User.id.in_(user_ids))
+
+def _list_users(org_id: int):
+    stmt = select(User).where(
+        User.organization_id == org_id,
+        User.deleted_at.is_(None)
     )
+    return stmt
+
+def get_user_by_id(session: Session, user_id: int):
+    return loaded_live(session, User, user_id) or session.scalars(_USER_BY_ID, {"user_id": user_id}).first()
 
 def get_user_by_email(session: Session, email: str):
-    return (
-        session.query(User)
-        .filter(
-            User.email == email,
-            User.deleted_at.is_(None)
-        )
-        .first()
-    )
+    return session.scalars(_USER_BY_EMAIL, {"email": email}).first()
+
+def get_users_by_ids(session: Session, user_ids):
+    user_ids = set(user_ids)
+    if not user_ids:
+        return {}
+    return {row.id: row for row in session.scalars(_USERS_BY_IDS, {"user_ids": list(user_ids)})}
+
+def list_users(session: Session, org_id: int, cursor: str | None = None, page_size: int = DEFAULT_PAGE_SIZE):
+    return keyset_page(session, _list_users(org_id), User, cursor, page_size)
+
+def get_user_rows_by_ids(session: Session, user_ids, fields):
+    return project_by_ids(session, User, user_ids, fields)
+
+def list_user_rows(session: Session, org_id: int, fields, cursor: str | None = None, page_size: int = DEFAULT_PAGE_SIZE):
+    return project_page(session, User, org_id, fields, cursor, page_size)
 
 def create_user(session: Session, user: User):
     session.add(user)
@@ -28,6 +60,61 @@ def create_user(session: Session, user: User):
     session.refresh(user)
     return user
 
+def bulk_create_users(session: Session, rows, chunk_size: int = DEFAULT_CHUNK_SIZE):
+    return bulk_insert(session, User, rows, chunk_size)
+
 def soft_delete_user(session: Session, user: User):
-    user.deleted_at = datetime.now(datetime.timezone.utc)
+    user.deleted_at = utcnow()
+    session.commit()
+
+def soft_delete_users_by_ids(session: Session, user_ids):
+    user_ids = set(user_ids)
+    if not user_ids:
+        return 0
+    count = session.execute(_soft_delete_users_by_ids(user_ids)).rowcount
     session.commit()
+    return count
+
+async def async_get_user_by_id(session: AsyncSession, user_id: int):
+    return loaded_live(session, User, user_id) or (await session.scalars(_USER_BY_ID, {"user_id": user_id})).first()
+
+async def async_get_user_by_email(session: AsyncSession, email: str):
+    return (await session.scalars(_USER_BY_EMAIL, {"email": email})).first()
+
+async def async_get_users_by_ids(session: AsyncSession, user_ids):
+    user_ids = set(user_ids)
+    if not user_ids:
+        return {}
+    return {row.id: row for row in await session.scalars(_USERS_BY_IDS, {"user_ids": list(user_ids)})}
+
+async def async_list_users(session: AsyncSession, org_id: int, cursor: str | None = None, page_size: int = DEFAULT_PAGE_SIZE):
+    return await async_keyset_page(session, _list_users(org_id), User, cursor, page_size)
+
+async def async_get_user_rows_by_ids(session: AsyncSession, user_ids, fields):
+    return await async_project_by_ids(session, User, user_ids, fields)
+
+async def async_list_user_rows(session: AsyncSession, org_id: int, fields, cursor: str | None = None, page_size: int = DEFAULT_PAGE_SIZE):
+    return await async_project_page(session, User, org_id, fields, cursor, page_size)
+
+async def async_create_user(session: AsyncSession, user: User):
+    session.add(user)
+    await session.commit()
+    await session.refresh(user)
+    return user
+
+async def async_bulk_create_users(session: AsyncSession, rows, chunk_size: int = DEFAULT_CHUNK_SIZE):
+    return await async_bulk_insert(session, User, rows, chunk_size)
+
+async def async_soft_delete_user(session: AsyncSession, user: User):
+    user.deleted_at = utcnow()
+    await session.commit()
+
+async def async_soft_delete_users_by_ids(session: AsyncSession, user_ids):
+    user_ids = set(user_ids)
+    if not user_ids:
+        return 0
+    count = (await session.execute(_soft_delete_users_by_ids(user_ids))).rowcount
+    await session.commit()
+    return count
+
+instrument_module(globals())
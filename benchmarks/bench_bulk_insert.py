@@ -0,0 +1,67 @@
+"""Rows/sec of create_borrower (per-row commit + refresh) vs bulk_create_borrowers.
+
+    python -m benchmarks.bench_bulk_insert [rows] [chunk_size]
+
+Runs against BENCH_DATABASE_URL, defaulting to a throwaway SQLite file.
+"""
+import os
+import sys
+import time
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core.init_db import init_db, drop_db
+from app.models.organization import Organization
+from app.models.borrower import Borrower
+from app.repositories.organization_repository import create_organization
+from app.repositories.borrower_repository import create_borrower, bulk_create_borrowers
+
+BENCH_DATABASE_URL = os.getenv("BENCH_DATABASE_URL", "sqlite:///bench.db")
+
+
+def borrower_rows(org_id, n):
+    for i in range(n):
+        yield {
+            "organization_id": org_id,
+            "email": f"borrower{i}@example.com",
+            "first_name": "Bench",
+            "last_name": f"Borrower{i}",
+            "city": "Columbus",
+            "state": "OH",
+        }
+
+
+def timed(fn):
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def main(rows=5000, chunk_size=1000):
+    engine = create_engine(BENCH_DATABASE_URL)
+    drop_db(engine)
+    init_db(engine)
+    Session = sessionmaker(bind=engine, autoflush=False)
+
+    with Session() as session:
+        org_id = create_organization(session, Organization(name="bench")).id
+
+        def per_row():
+            for row in borrower_rows(org_id, rows):
+                create_borrower(session, Borrower(**row))
+
+        def bulk():
+            bulk_create_borrowers(session, borrower_rows(org_id, rows), chunk_size)
+
+        for label, fn in (("create_borrower", per_row), ("bulk_create_borrowers", bulk)):
+            elapsed = timed(fn)
+            print(f"{label:<24} {rows:>8} rows  {elapsed:8.3f}s  {rows / elapsed:>10.0f} rows/s")
+
+    drop_db(engine)
+
+
+if __name__ == "__main__":
+    main(*(int(a) for a in sys.argv[1:3]))
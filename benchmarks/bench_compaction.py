@@ -0,0 +1,109 @@
+"""Table and index sizes before and after the column-type compaction.
+
+    python -m benchmarks.bench_compaction [scale] [seed]
+
+Loads a synthetic dataset (see benchmarks.datagen), converts the compacted
+columns back to strings with the compact_column_types migration's downgrade,
+measures, then runs its upgrade (precheck, backfill and swap) and measures
+again. Tables are rewritten (VACUUM / VACUUM FULL) before each measurement
+so free space left by the conversion isn't counted. Runs against
+BENCH_DATABASE_URL, defaulting to a throwaway SQLite file.
+"""
+import importlib.util
+import os
+import sys
+import time
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from alembic.migration import MigrationContext
+from alembic.operations import Operations
+from sqlalchemy import create_engine, text
+
+from app.core.init_db import init_db, drop_db
+from benchmarks.datagen import BENCH_DATABASE_URL, Dataset, load
+
+MIGRATION = os.path.join(
+    os.path.dirname(__file__), os.pardir, "alembic", "versions", "b4d8f2a61c93_compact_column_types.py"
+)
+TABLES = ("borrowers", "applications", "users", "communication_logs", "documents")
+
+
+def _migration():
+    spec = importlib.util.spec_from_file_location("compact_column_types", MIGRATION)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def run(engine, step):
+    with engine.connect() as connection:
+        context = MigrationContext.configure(connection)
+        with context.begin_transaction(), Operations.context(context):
+            step()
+        # SQLite's DDL isn't transactional to alembic, so nothing commits it.
+        connection.commit()
+
+
+def compact(engine):
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+        if engine.dialect.name == "postgresql":
+            for table in TABLES:
+                # VACUUM FULL on a partitioned table rewrites every partition.
+                connection.execute(text(f"VACUUM FULL ANALYZE {table}"))
+        else:
+            connection.execute(text("VACUUM"))
+
+
+def sizes(engine):
+    result = {}
+    with engine.connect() as connection:
+        for table in TABLES:
+            if engine.dialect.name == "postgresql":
+                row = connection.execute(text(
+                    "SELECT sum(pg_table_size(relid)), sum(pg_indexes_size(relid)) "
+                    "FROM pg_partition_tree(CAST(:table AS regclass))"
+                ), {"table": table}).one()
+            else:
+                row = connection.execute(text(
+                    "SELECT coalesce(sum(CASE WHEN name = :table THEN pgsize END), 0), "
+                    "coalesce(sum(CASE WHEN name <> :table THEN pgsize END), 0) FROM dbstat "
+                    "WHERE name = :table OR name IN (SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = :table)"
+                ), {"table": table}).one()
+            result[table] = (int(row[0] or 0), int(row[1] or 0))
+    return result
+
+
+def main(scale="10k", seed=0):
+    engine = create_engine(BENCH_DATABASE_URL)
+    drop_db(engine)
+    init_db(engine)
+    load(engine, Dataset.for_scale(scale, int(seed)))
+    migration = _migration()
+
+    run(engine, migration.downgrade)
+    compact(engine)
+    before = sizes(engine)
+
+    start = time.perf_counter()
+    run(engine, migration.upgrade)
+    elapsed = time.perf_counter() - start
+    compact(engine)
+    after = sizes(engine)
+
+    print(f"{engine.dialect.name}, scale {scale}; upgrade took {elapsed:.1f}s")
+    print(f"{'':<20} {'table KiB':^19} {'indexes KiB':^19}")
+    print(f"{'table':<20} {'before':>9} {'after':>9} {'before':>9} {'after':>9} {'change':>8}")
+    for table in TABLES:
+        (table_before, index_before), (table_after, index_after) = before[table], after[table]
+        total_before, total_after = table_before + index_before, table_after + index_after
+        change = (total_after - total_before) / total_before * 100 if total_before else 0.0
+        print(
+            f"{table:<20} {table_before / 1024:>9.0f} {table_after / 1024:>9.0f} "
+            f"{index_before / 1024:>9.0f} {index_after / 1024:>9.0f} {change:>7.1f}%"
+        )
+    drop_db(engine)
+
+
+if __name__ == "__main__":
+    main(*sys.argv[1:3])
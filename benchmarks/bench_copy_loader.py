@@ -0,0 +1,80 @@
+"""Rows/sec for communication_logs: create_log vs bulk_create_logs vs COPY.
+
+    python -m benchmarks.bench_copy_loader [rows]
+
+On PostgreSQL with psycopg2 the copy paths use COPY FROM STDIN; on other
+dialects they fall back to executemany. Runs against BENCH_DATABASE_URL,
+defaulting to a throwaway SQLite file.
+"""
+import os
+import sys
+import time
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core.init_db import init_db, drop_db
+from app.models.communication_log import CommunicationLog
+from app.models.organization import Organization
+from app.repositories.communication_repository import create_log, bulk_create_logs, copy_create_logs, log_loader
+from app.repositories.organization_repository import create_organization
+
+BENCH_DATABASE_URL = os.getenv("BENCH_DATABASE_URL", "sqlite:///bench.db")
+PER_ROW_LIMIT = 5000
+
+
+def log_rows(org_id, n):
+    return [
+        {
+            "organization_id": org_id,
+            "sender_type": "ai",
+            "message": f"Hi, we still need your \"W-2\" for 2024, item {i}",
+            "message_type": "text",
+            "channel": "sms",
+            "ai_model": "bench",
+        }
+        for i in range(n)
+    ]
+
+
+def report(label, rows, elapsed):
+    print(f"{label:<20} {rows:>8} rows  {elapsed:8.3f}s  {rows / elapsed:>10.0f} rows/s")
+
+
+def main(rows=100000):
+    engine = create_engine(BENCH_DATABASE_URL)
+    drop_db(engine)
+    init_db(engine)
+    Session = sessionmaker(bind=engine, autoflush=False)
+
+    with Session() as session:
+        org_id = create_organization(session, Organization(name="bench")).id
+        data = log_rows(org_id, rows)
+
+        per_row = data[:PER_ROW_LIMIT]
+        start = time.perf_counter()
+        for row in per_row:
+            create_log(session, CommunicationLog(**row))
+        report("create_log", len(per_row), time.perf_counter() - start)
+
+        start = time.perf_counter()
+        bulk_create_logs(session, data)
+        report("bulk_create_logs", rows, time.perf_counter() - start)
+
+        start = time.perf_counter()
+        copy_create_logs(session, data)
+        report("copy_create_logs", rows, time.perf_counter() - start)
+
+    start = time.perf_counter()
+    with log_loader(engine) as loader:
+        for row in data:
+            loader.put(row)
+    report("log_loader", loader.rows_written, time.perf_counter() - start)
+
+    drop_db(engine)
+
+
+if __name__ == "__main__":
+    main(*(int(a) for a in sys.argv[1:2]))
@@ -0,0 +1,125 @@
+"""Per-call Python overhead of the hot getters, before and after prebuilt statements.
+
+    python -m benchmarks.bench_lookups [rows] [calls]
+
+For each getter, times:
+  legacy    session.query(...).filter(...).first(), rebuilt every call
+  rebuilt   select(...).where(...) built every call (the previous repository code)
+  prebuilt  the repository function, identity map cleared before every call
+  identity  the repository function with the row already in the session
+  raw       the same SELECT on the DBAPI cursor, as the floor
+
+"overhead" is the time above raw. The compiled-cache columns count how
+SQLAlchemy obtained each statement's SQL string during the run. Runs against
+BENCH_DATABASE_URL, defaulting to a throwaway SQLite file.
+"""
+import os
+import random
+import sys
+import time
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import sessionmaker
+
+from app.core.init_db import init_db, drop_db
+from app.core.query_metrics import QueryMetrics
+from app.models import Organization, User, Borrower, Application
+from app.repositories import application_repository, borrower_repository, user_repository
+from app.repositories.organization_repository import create_organization
+
+BENCH_DATABASE_URL = os.getenv("BENCH_DATABASE_URL", "sqlite:///bench.db")
+
+
+def seed(session, rows):
+    org_id = create_organization(session, Organization(name="bench")).id
+    user_rows = [{"organization_id": org_id, "email": f"user{i}@bench.example", "password_hash": "x"} for i in range(rows)]
+    user_repository.bulk_create_users(session, user_rows, chunk_size=5000)
+    borrower_ids = borrower_repository.bulk_create_borrowers(session, ({"organization_id": org_id, "first_name": f"B{i}"} for i in range(rows)), chunk_size=5000)
+    app_ids = application_repository.bulk_create_applications(session, ({"organization_id": org_id, "borrower_id": b} for b in borrower_ids), chunk_size=5000)
+    return [row["email"] for row in user_rows], borrower_ids, app_ids
+
+
+def _legacy(model, column):
+    def run(session, value):
+        return session.query(model).filter(column == value, model.deleted_at.is_(None)).first()
+    return run
+
+
+def _rebuilt(model, column):
+    def run(session, value):
+        return session.scalars(select(model).where(column == value, model.deleted_at.is_(None))).first()
+    return run
+
+
+def _raw(engine, model, column):
+    sql = f"SELECT * FROM {model.__tablename__} WHERE {column.key} = ? AND deleted_at IS NULL LIMIT 1"
+    if engine.dialect.paramstyle != "qmark":
+        sql = sql.replace("?", "%s")
+
+    def run(session, value):
+        cursor = session.connection().connection.cursor()
+        try:
+            cursor.execute(sql, (value,))
+            return cursor.fetchone()
+        finally:
+            cursor.close()
+    return run
+
+
+def timed(Session, fn, values, clear):
+    with Session() as session:
+        # Held so the identity map (which references objects weakly) keeps
+        # the warm-up row for the "identity" variant.
+        warm = fn(session, values[0])
+        start = time.perf_counter()
+        for value in values:
+            if clear:
+                session.expunge_all()
+            fn(session, value)
+        elapsed = time.perf_counter() - start
+        del warm
+        return elapsed / len(values) * 1e6
+
+
+def main(rows=10000, calls=5000):
+    engine = create_engine(BENCH_DATABASE_URL)
+    drop_db(engine)
+    init_db(engine)
+    metrics = QueryMetrics(slow_query_ms=10 ** 9)
+    metrics.attach(engine)
+    Session = sessionmaker(bind=engine, autoflush=False)
+    with Session() as session:
+        emails, borrower_ids, app_ids = seed(session, rows)
+
+    rng = random.Random(0)
+    getters = [
+        ("get_user_by_email", User, User.email, user_repository.get_user_by_email, rng.choices(emails, k=calls)),
+        ("get_borrower_by_id", Borrower, Borrower.id, borrower_repository.get_borrower_by_id, rng.choices(borrower_ids, k=calls)),
+        ("get_application_by_id", Application, Application.id, application_repository.get_application_by_id, rng.choices(app_ids, k=calls)),
+    ]
+    print(f"{'getter':<24} {'variant':<9} {'us/call':>9} {'overhead':>9} {'hits':>7} {'misses':>7}")
+    for name, model, column, repository_fn, values in getters:
+        variants = [
+            ("raw", _raw(engine, model, column), values, True),
+            ("legacy", _legacy(model, column), values, True),
+            ("rebuilt", _rebuilt(model, column), values, True),
+            ("prebuilt", repository_fn, values, True),
+        ]
+        if column.key == "id":
+            # One row, fetched over and over without clearing the session.
+            variants.append(("identity", repository_fn, [values[0]] * calls, False))
+        floor = None
+        for variant, fn, variant_values, clear in variants:
+            metrics.reset()
+            micros = timed(Session, fn, variant_values, clear)
+            floor = micros if floor is None else floor
+            cache = metrics.snapshot()["compiled_cache"]
+            print(f"{name:<24} {variant:<9} {micros:>9.1f} {micros - floor:>9.1f} {cache.get('cache_hit', 0):>7} {cache.get('cache_miss', 0):>7}")
+
+    drop_db(engine)
+
+
+if __name__ == "__main__":
+    main(*(int(a) for a in sys.argv[1:3]))
@@ -0,0 +1,93 @@
+"""One-statement backfill vs app.core.online_migration.backfill.
+
+    python -m benchmarks.bench_online_migration [scale] [batch_size]
+
+Adds a column to communication_logs on a synthetic dataset (see
+benchmarks.datagen) and fills it both ways, reporting total time and the
+longest single transaction, which is how long concurrent writers to the
+touched rows can be kept waiting. The batched run is interrupted halfway
+and rerun, to show it resuming from its checkpoint. Runs against
+BENCH_DATABASE_URL, defaulting to a throwaway SQLite file.
+"""
+import os
+import sys
+import time
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from sqlalchemy import create_engine, text
+
+from app.core import online_migration
+from app.core.init_db import init_db, drop_db
+from benchmarks.datagen import BENCH_DATABASE_URL, Dataset, load
+
+TABLE = "communication_logs"
+FILL = f"UPDATE {TABLE} SET message_length = length(message)"
+
+
+class Interrupted(Exception):
+    pass
+
+
+def timed_batches(stop_after=None):
+    durations = []
+
+    def run(conn, start, end):
+        if stop_after is not None and len(durations) == stop_after:
+            raise Interrupted()
+        began = time.perf_counter()
+        rows = conn.execute(text(f"{FILL} WHERE id >= :start AND id < :end"), {"start": start, "end": end}).rowcount
+        durations.append(time.perf_counter() - began)
+        return rows
+    return run, durations
+
+
+def reset(engine):
+    with engine.begin() as conn:
+        conn.execute(text(f"UPDATE {TABLE} SET message_length = NULL"))
+    online_migration.reset_checkpoints("bench_message_length", bind=engine)
+
+
+def main(scale="100k", batch_size=online_migration.DEFAULT_BATCH_SIZE):
+    batch_size = int(batch_size)
+    engine = create_engine(BENCH_DATABASE_URL)
+    drop_db(engine)
+    init_db(engine)
+    load(engine, Dataset.for_scale(scale, 0))
+    with engine.begin() as conn:
+        conn.execute(text(f"ALTER TABLE {TABLE} ADD COLUMN message_length integer"))
+        total = conn.execute(text(f"SELECT count(*) FROM {TABLE}")).scalar()
+
+    began = time.perf_counter()
+    with engine.begin() as conn:
+        conn.execute(text(FILL))
+    single = time.perf_counter() - began
+
+    reset(engine)
+    run, durations = timed_batches()
+    began = time.perf_counter()
+    online_migration.backfill("bench_message_length", TABLE, run, batch_size=batch_size, bind=engine)
+    batched = time.perf_counter() - began
+
+    reset(engine)
+    halfway = max(1, len(durations) // 2)
+    run, first = timed_batches(stop_after=halfway)
+    try:
+        online_migration.backfill("bench_message_length", TABLE, run, batch_size=batch_size, bind=engine)
+    except Interrupted:
+        pass
+    run, second = timed_batches()
+    resumed = online_migration.backfill("bench_message_length", TABLE, run, batch_size=batch_size, bind=engine)
+    with engine.connect() as conn:
+        missing = conn.execute(text(f"SELECT count(*) FROM {TABLE} WHERE message_length IS NULL")).scalar()
+
+    print(f"{TABLE}: {total} rows, batch size {batch_size}")
+    print(f"{'run':<14} {'total s':>9} {'longest txn ms':>15} {'transactions':>13}")
+    print(f"{'one UPDATE':<14} {single:>9.2f} {single * 1000:>15.1f} {1:>13}")
+    print(f"{'batched':<14} {batched:>9.2f} {max(durations, default=0) * 1000:>15.1f} {len(durations):>13}")
+    print(f"interrupted after {len(first)} batches; resume ran {len(second)} more for {resumed} rows, {missing} rows left unfilled")
+    drop_db(engine)
+
+
+if __name__ == "__main__":
+    main(*sys.argv[1:3])
@@ -0,0 +1,88 @@
+"""Deep-page latency of OFFSET/LIMIT vs list_applications keyset cursors.
+
+    python -m benchmarks.bench_pagination [rows] [page_size]
+
+Runs against BENCH_DATABASE_URL, defaulting to a throwaway SQLite file.
+"""
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import sessionmaker
+
+from app.core.init_db import init_db, drop_db
+from app.models.application import Application
+from app.models.borrower import Borrower
+from app.models.organization import Organization
+from app.repositories.application_repository import bulk_create_applications, list_applications
+from app.repositories.organization_repository import create_organization
+from app.repositories.borrower_repository import create_borrower
+from app.repositories.pagination import encode_cursor
+
+BENCH_DATABASE_URL = os.getenv("BENCH_DATABASE_URL", "sqlite:///bench.db")
+REPEAT = 20
+
+
+def seed(session, rows):
+    org_id = create_organization(session, Organization(name="bench")).id
+    borrower_id = create_borrower(session, Borrower(organization_id=org_id)).id
+    start = datetime(2024, 1, 1)
+    bulk_create_applications(session, (
+        {
+            "organization_id": org_id,
+            "borrower_id": borrower_id,
+            "application_status": "submitted",
+            "created_at": start + timedelta(seconds=i),
+        }
+        for i in range(rows)
+    ), chunk_size=5000)
+    return org_id
+
+
+def offset_page(session, org_id, offset, page_size):
+    stmt = (
+        select(Application)
+        .where(Application.organization_id == org_id, Application.deleted_at.is_(None))
+        .order_by(Application.created_at.desc(), Application.id.desc())
+        .offset(offset)
+        .limit(page_size)
+    )
+    return session.scalars(stmt).all()
+
+
+def timed(fn):
+    start = time.perf_counter()
+    for _ in range(REPEAT):
+        fn()
+    return (time.perf_counter() - start) / REPEAT * 1000
+
+
+def main(rows=200000, page_size=50):
+    engine = create_engine(BENCH_DATABASE_URL)
+    drop_db(engine)
+    init_db(engine)
+    Session = sessionmaker(bind=engine, autoflush=False)
+
+    with Session() as session:
+        org_id = seed(session, rows)
+        print(f"{'depth':>10} {'offset ms':>12} {'keyset ms':>12}")
+        for depth in (0, rows // 100, rows // 10, rows // 2, rows - page_size):
+            if depth:
+                anchor = offset_page(session, org_id, depth - 1, 1)[0]
+                cursor = encode_cursor(anchor.created_at, anchor.id)
+            else:
+                cursor = None
+            offset_ms = timed(lambda: offset_page(session, org_id, depth, page_size))
+            keyset_ms = timed(lambda: list_applications(session, org_id, cursor=cursor, page_size=page_size))
+            session.expunge_all()
+            print(f"{depth:>10} {offset_ms:>12.2f} {keyset_ms:>12.2f}")
+
+    drop_db(engine)
+
+
+if __name__ == "__main__":
+    main(*(int(a) for a in sys.argv[1:3]))
@@ -0,0 +1,120 @@
+"""Full-entity loads vs column projections for borrowers and applications.
+
+    python -m benchmarks.bench_projection [rows] [batch]
+
+Times get_*_by_ids / list_* against get_*_rows_by_ids / list_*_rows and
+reports latency plus peak Python allocation (tracemalloc) per call. Runs
+against BENCH_DATABASE_URL, defaulting to a throwaway SQLite file.
+"""
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core.init_db import init_db, drop_db
+from app.models.organization import Organization
+from app.repositories.organization_repository import create_organization
+from app.repositories import application_repository, borrower_repository
+from app.repositories.pagination import MAX_PAGE_SIZE
+
+BENCH_DATABASE_URL = os.getenv("BENCH_DATABASE_URL", "sqlite:///bench.db")
+REPEAT = 20
+BORROWER_FIELDS = ("first_name", "last_name", "employment_status")
+APPLICATION_FIELDS = ("borrower_id", "application_status", "loan_amount")
+
+
+def seed(session, rows):
+    org_id = create_organization(session, Organization(name="bench")).id
+    borrower_ids = borrower_repository.bulk_create_borrowers(session, (
+        {
+            "organization_id": org_id,
+            "first_name": f"First{i}",
+            "last_name": f"Last{i}",
+            "email": f"borrower{i}@bench.example",
+            "phone": f"555{i:07d}",
+            "address_line1": f"{i} Main Street",
+            "city": "Austin",
+            "state": "TX",
+            "postal_code": "78701",
+            "country": "US",
+            "credit_report_url": f"https://reports.example/{i}.pdf",
+            "employment_status": "employed",
+        }
+        for i in range(rows)
+    ), chunk_size=5000)
+    app_ids = application_repository.bulk_create_applications(session, (
+        {
+            "organization_id": org_id,
+            "borrower_id": borrower_id,
+            "application_status": "submitted",
+            "loan_amount": 350000,
+        }
+        for borrower_id in borrower_ids
+    ), chunk_size=5000)
+    return org_id, borrower_ids, app_ids
+
+
+def measure(Session, fn):
+    # Fresh session per call so the full loads pay for hydration every time
+    # rather than finding their objects already in the identity map.
+    elapsed = 0.0
+    for _ in range(REPEAT):
+        with Session() as session:
+            start = time.perf_counter()
+            fn(session)
+            elapsed += time.perf_counter() - start
+    with Session() as session:
+        tracemalloc.start()
+        result = fn(session)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        # The identity map holds its objects weakly, so count while the
+        # result is still referenced.
+        tracked = len(session.identity_map)
+        del result
+    return elapsed / REPEAT * 1000, peak / 1024, tracked
+
+
+def main(rows=20000, batch=500):
+    engine = create_engine(BENCH_DATABASE_URL)
+    drop_db(engine)
+    init_db(engine)
+    Session = sessionmaker(bind=engine, autoflush=False)
+
+    with Session() as session:
+        org_id, borrower_ids, app_ids = seed(session, rows)
+    rng = random.Random(0)
+    some_borrowers = rng.sample(borrower_ids, min(batch, len(borrower_ids)))
+    some_apps = rng.sample(app_ids, min(batch, len(app_ids)))
+
+    cases = [
+        ("borrowers by ids",
+         lambda s: borrower_repository.get_borrowers_by_ids(s, some_borrowers),
+         lambda s: borrower_repository.get_borrower_rows_by_ids(s, some_borrowers, BORROWER_FIELDS)),
+        ("borrowers page",
+         lambda s: borrower_repository.list_borrowers(s, org_id, page_size=MAX_PAGE_SIZE),
+         lambda s: borrower_repository.list_borrower_rows(s, org_id, BORROWER_FIELDS, page_size=MAX_PAGE_SIZE)),
+        ("applications by ids",
+         lambda s: application_repository.get_applications_by_ids(s, some_apps),
+         lambda s: application_repository.get_application_rows_by_ids(s, some_apps, APPLICATION_FIELDS)),
+        ("applications page",
+         lambda s: application_repository.list_applications(s, org_id, page_size=MAX_PAGE_SIZE),
+         lambda s: application_repository.list_application_rows(s, org_id, APPLICATION_FIELDS, page_size=MAX_PAGE_SIZE)),
+    ]
+    print(f"{'case':<22} {'full ms':>9} {'rows ms':>9} {'full KiB':>10} {'rows KiB':>10} {'tracked':>9}")
+    for name, full, lean in cases:
+        full_ms, full_kib, full_tracked = measure(Session, full)
+        lean_ms, lean_kib, lean_tracked = measure(Session, lean)
+        print(f"{name:<22} {full_ms:>9.2f} {lean_ms:>9.2f} {full_kib:>10.1f} {lean_kib:>10.1f} {full_tracked:>4}/{lean_tracked:<4}")
+
+    drop_db(engine)
+
+
+if __name__ == "__main__":
+    main(*(int(a) for a in sys.argv[1:3]))
@@ -0,0 +1,87 @@
+"""Per-object soft deletes vs soft_delete_borrower_cascade.
+
+    python -m benchmarks.bench_soft_delete [borrowers] [children]
+
+Each borrower gets one application with `children` documents and
+communication logs. The per-object path loads and soft-deletes every row
+through the existing get_*/soft_delete_* functions; the set-based path
+issues one UPDATE per table. Runs against BENCH_DATABASE_URL, defaulting to
+a throwaway SQLite file.
+"""
+import os
+import sys
+import time
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import sessionmaker
+
+from app.core.init_db import init_db, drop_db
+from app.models import Organization, Application, Document, CommunicationLog
+from app.repositories.application_repository import bulk_create_applications, soft_delete_application
+from app.repositories.borrower_repository import bulk_create_borrowers, get_borrower_by_id, soft_delete_borrower, soft_delete_borrower_cascade
+from app.repositories.communication_repository import bulk_create_logs, soft_delete_log
+from app.repositories.document_repository import bulk_create_documents, soft_delete_document
+from app.repositories.organization_repository import create_organization
+
+BENCH_DATABASE_URL = os.getenv("BENCH_DATABASE_URL", "sqlite:///bench.db")
+
+
+def seed(session, borrowers, children):
+    org_id = create_organization(session, Organization(name="bench")).id
+    borrower_ids = bulk_create_borrowers(session, [{"organization_id": org_id} for _ in range(borrowers)])
+    app_ids = bulk_create_applications(session, [
+        {"organization_id": org_id, "borrower_id": b} for b in borrower_ids
+    ])
+    bulk_create_documents(session, [
+        {"organization_id": org_id, "application_id": a, "borrower_id": b}
+        for a, b in zip(app_ids, borrower_ids) for _ in range(children)
+    ])
+    bulk_create_logs(session, [
+        {"organization_id": org_id, "application_id": a, "borrower_id": b}
+        for a, b in zip(app_ids, borrower_ids) for _ in range(children)
+    ])
+    return borrower_ids
+
+
+def per_object(session, borrower_ids):
+    rows = 0
+    for borrower_id in borrower_ids:
+        borrower = get_borrower_by_id(session, borrower_id)
+        for application in session.scalars(select(Application).where(Application.borrower_id == borrower_id)):
+            for doc in session.scalars(select(Document).where(Document.application_id == application.id)):
+                soft_delete_document(session, doc)
+                rows += 1
+            for log in session.scalars(select(CommunicationLog).where(CommunicationLog.application_id == application.id)):
+                soft_delete_log(session, log)
+                rows += 1
+            soft_delete_application(session, application)
+            rows += 1
+        soft_delete_borrower(session, borrower)
+        rows += 1
+    return rows
+
+
+def main(borrowers=200, children=5):
+    engine = create_engine(BENCH_DATABASE_URL)
+    Session = sessionmaker(bind=engine, autoflush=False)
+
+    for label in ("per-object", "cascade"):
+        drop_db(engine)
+        init_db(engine)
+        with Session() as session:
+            borrower_ids = seed(session, borrowers, children)
+            start = time.perf_counter()
+            if label == "per-object":
+                rows = per_object(session, borrower_ids)
+            else:
+                rows = sum(soft_delete_borrower_cascade(session, borrower_ids).values())
+            elapsed = time.perf_counter() - start
+        print(f"{label:<12} {rows:>8} rows  {elapsed:8.3f}s  {rows / elapsed:>10.0f} rows/s")
+
+    drop_db(engine)
+
+
+if __name__ == "__main__":
+    main(*(int(a) for a in sys.argv[1:3]))
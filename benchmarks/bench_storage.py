@@ -0,0 +1,94 @@
+"""Streaming document uploads and ranged reads on the local storage backend.
+
+    python -m benchmarks.bench_storage [megabytes] [chunk_kib]
+
+Uploads a generated file of the given size through LocalStorage.save(), a
+second time to show deduplication, and through a whole-file read for
+comparison, reporting throughput and peak Python allocation (tracemalloc).
+Then times random 64 KiB ranged reads via a seek+read loop, read_range
+(pread), iter_range (mmap) and send_range (sendfile into /dev/null). Blobs go to a temporary directory.
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from app.core.storage import LocalStorage
+
+RANGE = 64 * 1024
+READS = 2000
+
+
+def make_file(path, megabytes):
+    rng = random.Random(0)
+    with open(path, "wb") as fh:
+        for _ in range(megabytes):
+            fh.write(rng.randbytes(1024 * 1024))
+
+
+def measure(fn):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def main(megabytes=100, chunk_kib=1024):
+    with tempfile.TemporaryDirectory() as tmp:
+        source = os.path.join(tmp, "upload.bin")
+        make_file(source, megabytes)
+        storage = LocalStorage(os.path.join(tmp, "blobs"), chunk_size=chunk_kib * 1024)
+
+        def streamed():
+            with open(source, "rb") as fh:
+                return storage.save(fh)
+
+        def buffered():
+            with open(source, "rb") as fh:
+                return storage.save(fh.read())
+
+        print(f"{'upload':<12} {'MB/s':>9} {'peak KiB':>10}")
+        for name, fn in [("streamed", streamed), ("duplicate", streamed), ("whole-file", buffered)]:
+            blob, elapsed, peak = measure(fn)
+            print(f"{name:<12} {megabytes / elapsed:>9.1f} {peak / 1024:>10.1f}")
+        blobs = sum(len(files) for _, _, files in os.walk(os.path.join(tmp, "blobs", "sha256")))
+        print(f"{blobs} blob(s) stored for 3 uploads of the same content")
+
+        rng = random.Random(0)
+        offsets = [rng.randrange(0, blob.size - RANGE) for _ in range(READS)]
+
+        def seek_read():
+            for offset in offsets:
+                with storage.open(blob.url) as fh:
+                    fh.seek(offset)
+                    fh.read(RANGE)
+
+        def pread():
+            for offset in offsets:
+                storage.read_range(blob.url, offset, offset + RANGE)
+
+        def mmap_read():
+            for offset in offsets:
+                for _ in storage.iter_range(blob.url, offset, offset + RANGE):
+                    pass
+
+        def sendfile():
+            with open(os.devnull, "wb") as out:
+                for offset in offsets:
+                    storage.send_range(blob.url, out, offset, offset + RANGE)
+
+        print(f"\n{'range read':<12} {'us/read':>9}")
+        for name, fn in [("seek+read", seek_read), ("pread", pread), ("mmap", mmap_read), ("sendfile", sendfile)]:
+            start = time.perf_counter()
+            fn()
+            elapsed = time.perf_counter() - start
+            print(f"{name:<12} {elapsed / READS * 1e6:>9.1f}")
+
+
+if __name__ == "__main__":
+    main(*(int(a) for a in sys.argv[1:3]))
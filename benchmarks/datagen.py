@@ -0,0 +1,339 @@
+"""Deterministic synthetic 1003 data for benchmarks.
+
+    python -m benchmarks.datagen [scale] [seed]
+
+A Dataset is sized by its number of applications (see SCALES). Everything
+else is derived from it: tenants follow a Zipf distribution, so a few
+organizations hold most of the applications; borrowers and loan officers
+live inside their tenant; documents per application are mostly 0-5; and
+communication logs have a long tail, with a handful of applications
+carrying hundreds of messages. Roughly 12 rows are written per application.
+
+Ids are assigned here rather than by the database, so two loads with the
+same scale and seed are identical row for row. Timestamps are anchored to
+EPOCH, not to the current time.
+"""
+import os
+import random
+import sys
+import time
+from array import array
+from bisect import bisect
+from datetime import date, datetime, timedelta
+from itertools import accumulate
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from sqlalchemy import create_engine, text
+
+from app.core.init_db import init_db, drop_db
+from app.models import Organization, User, Borrower, Application, Document, CommunicationLog, AuditTrail
+from app.repositories.bulk import _chunks
+from app.repositories.copy_loader import copy_rows
+
+BENCH_DATABASE_URL = os.getenv("BENCH_DATABASE_URL", "sqlite:///bench.db")
+
+SCALES = {"1k": 1_000, "10k": 10_000, "100k": 100_000, "1m": 1_000_000}
+EPOCH = datetime(2025, 1, 1)
+WINDOW_DAYS = 730
+LOAD_CHUNK_SIZE = 10_000
+
+FIRST_NAMES = ("James", "Mary", "Robert", "Patricia", "John", "Jennifer", "Michael", "Linda", "David", "Elizabeth", "Maria", "Wei", "Aisha", "Carlos", "Priya", "Olu")
+LAST_NAMES = ("Smith", "Johnson", "Williams", "Brown", "Jones", "Garcia", "Miller", "Davis", "Rodriguez", "Martinez", "Nguyen", "Patel", "Kim", "Okafor", "Cohen", "Silva")
+CITIES = (("Austin", "TX"), ("Denver", "CO"), ("Phoenix", "AZ"), ("Columbus", "OH"), ("Charlotte", "NC"), ("Seattle", "WA"), ("Tampa", "FL"), ("Boise", "ID"))
+LOAN_TYPES = (("conventional", 62), ("fha", 20), ("va", 10), ("usda", 3), ("jumbo", 5))
+LOAN_PURPOSES = (("purchase", 55), ("refinance", 30), ("cash_out_refinance", 15))
+STATUSES = (("draft", 15), ("submitted", 20), ("processing", 18), ("underwriting", 12), ("approved", 10), ("closed", 17), ("denied", 5), ("withdrawn", 3))
+EMPLOYMENT = (("employed", 78), ("self_employed", 14), ("retired", 6), ("unemployed", 2))
+ROLES = (("loan_officer", 70), ("processor", 20), ("underwriter", 8), ("admin", 2))
+FILE_TYPES = (("pdf", 70), ("jpg", 15), ("png", 10), ("docx", 5))
+DOCUMENT_KINDS = ("w2", "paystub", "bank_statement", "tax_return", "drivers_license", "purchase_agreement", "appraisal")
+DOCUMENTS_PER_APPLICATION = ((0, 10), (1, 15), (2, 20), (3, 20), (4, 15), (5, 10), (6, 5), (8, 3), (12, 2))
+CHANNELS = (("email", 45), ("sms", 30), ("portal", 20), ("phone", 5))
+SENDERS = (("user", 45), ("borrower", 35), ("ai", 20))
+MESSAGES = ("Please upload your most recent pay stubs.", "Thanks, I've attached them.", "Your appraisal has been scheduled.", "Can we lock the rate today?", "Conditional approval issued.", "Closing disclosure is ready for review.")
+AUDIT_ACTIONS = (("insert", 60), ("update", 35), ("delete", 5))
+
+
+def _weighted(pairs):
+    values = [value for value, _ in pairs]
+    return values, list(accumulate(weight for _, weight in pairs))
+
+
+def _pick(rng, table):
+    values, cum_weights = table
+    return values[bisect(cum_weights, rng.random() * cum_weights[-1])]
+
+
+_LOAN_TYPES = _weighted(LOAN_TYPES)
+_LOAN_PURPOSES = _weighted(LOAN_PURPOSES)
+_STATUSES = _weighted(STATUSES)
+_EMPLOYMENT = _weighted(EMPLOYMENT)
+_ROLES = _weighted(ROLES)
+_FILE_TYPES = _weighted(FILE_TYPES)
+_DOCUMENTS_PER_APPLICATION = _weighted(DOCUMENTS_PER_APPLICATION)
+_CHANNELS = _weighted(CHANNELS)
+_SENDERS = _weighted(SENDERS)
+_AUDIT_ACTIONS = _weighted(AUDIT_ACTIONS)
+
+
+class Dataset:
+    """The plan for one synthetic database.
+
+    Construction only decides tenant sizes and, per application, its tenant,
+    borrower and creation time (kept in compact arrays). The row generators
+    stream dicts from there, each from its own seeded Random, so any table
+    can be regenerated on its own.
+    """
+
+    def __init__(self, applications: int, seed: int = 0, tenants: int | None = None, skew: float = 1.1):
+        self.seed = seed
+        self.application_count = applications
+        self.tenant_count = tenants or max(3, applications // 2000)
+        rng = random.Random(seed)
+
+        weights = [1 / rank ** skew for rank in range(1, self.tenant_count + 1)]
+        cum_weights = list(accumulate(weights))
+        total = cum_weights[-1]
+        self.app_org = array("q", (bisect(cum_weights, rng.random() * total) + 1 for _ in range(applications)))
+
+        self.tenant_sizes = {org_id: 0 for org_id in range(1, self.tenant_count + 1)}
+        for org_id in self.app_org:
+            self.tenant_sizes[org_id] += 1
+
+        # Users and borrowers get contiguous id blocks per tenant.
+        self.user_ranges, self.borrower_ranges = {}, {}
+        next_user = next_borrower = 1
+        for org_id, size in self.tenant_sizes.items():
+            users = max(2, size // 150)
+            borrowers = max(1, int(size * 0.85))
+            self.user_ranges[org_id] = (next_user, next_user + users)
+            self.borrower_ranges[org_id] = (next_borrower, next_borrower + borrowers)
+            next_user += users
+            next_borrower += borrowers
+        self.user_count = next_user - 1
+        self.borrower_count = next_borrower - 1
+
+        # Creation times skew recent and ascend with id, like a serial column.
+        offsets = sorted(WINDOW_DAYS * 86400 * (1 - rng.random() ** 2) for _ in range(applications))
+        self.app_created = array("d", offsets)
+        self.app_borrower = array("q", (rng.randrange(*self.borrower_ranges[org_id]) for org_id in self.app_org))
+        self.app_officer = array("q", (rng.randrange(*self.user_ranges[org_id]) for org_id in self.app_org))
+
+    @classmethod
+    def for_scale(cls, scale: str, seed: int = 0):
+        return cls(SCALES[scale], seed)
+
+    @property
+    def largest_tenant(self):
+        return max(self.tenant_sizes, key=self.tenant_sizes.get)
+
+    @property
+    def smallest_tenant(self):
+        return min(self.tenant_sizes, key=self.tenant_sizes.get)
+
+    def _rng(self, table):
+        return random.Random(f"{self.seed}:{table}")
+
+    def _created_at(self, seconds):
+        return EPOCH - timedelta(days=WINDOW_DAYS) + timedelta(seconds=seconds)
+
+    def organizations(self):
+        rng = self._rng("organizations")
+        for org_id in self.tenant_sizes:
+            city, state = rng.choice(CITIES)
+            yield {
+                "id": org_id,
+                "name": f"Lender {org_id}",
+                "legal_name": f"Lender {org_id} Mortgage LLC",
+                "email": f"ops@lender{org_id}.example",
+                "city": city,
+                "state": state,
+                "created_at": self._created_at(0) - timedelta(days=rng.randrange(365)),
+            }
+
+    def users(self):
+        rng = self._rng("users")
+        for org_id, (first, last) in self.user_ranges.items():
+            for user_id in range(first, last):
+                yield {
+                    "id": user_id,
+                    "organization_id": org_id,
+                    "email": f"user{user_id}@lender{org_id}.example",
+                    "first_name": rng.choice(FIRST_NAMES),
+                    "last_name": rng.choice(LAST_NAMES),
+                    "password_hash": "x" * 60,
+                    "role": _pick(rng, _ROLES),
+                    "is_active": rng.random() > 0.05,
+                    "created_at": self._created_at(rng.randrange(WINDOW_DAYS * 86400)),
+                }
+
+    def borrowers(self):
+        rng = self._rng("borrowers")
+        for org_id, (first, last) in self.borrower_ranges.items():
+            for borrower_id in range(first, last):
+                city, state = rng.choice(CITIES)
+                yield {
+                    "id": borrower_id,
+                    "organization_id": org_id,
+                    "email": f"borrower{borrower_id}@mail.example",
+                    "phone": f"555{borrower_id % 10_000_000:07d}",
+                    "first_name": rng.choice(FIRST_NAMES),
+                    "last_name": rng.choice(LAST_NAMES),
+                    "address_line1": f"{rng.randrange(1, 9999)} Main St",
+                    "city": city,
+                    "state": state,
+                    "postal_code": f"{rng.randrange(10000, 99999)}",
+                    "country": "US",
+                    "credit_score": int(min(850, max(500, rng.gauss(715, 55)))),
+                    "ssn_last_4": f"{rng.randrange(10000):04d}",
+                    "date_of_birth": date(1950, 1, 1) + timedelta(days=rng.randrange(50 * 365)),
+                    "income_annual": int(rng.lognormvariate(11.3, 0.5)) // 100 * 100,
+                    "employment_status": _pick(rng, _EMPLOYMENT),
+                    "created_at": self._created_at(rng.randrange(WINDOW_DAYS * 86400)),
+                }
+
+    def applications(self):
+        rng = self._rng("applications")
+        for index in range(self.application_count):
+            city, state = rng.choice(CITIES)
+            yield {
+                "id": index + 1,
+                "organization_id": self.app_org[index],
+                "borrower_id": self.app_borrower[index],
+                "loan_officer_id": self.app_officer[index],
+                "loan_amount": int(rng.lognormvariate(12.6, 0.45)) // 1000 * 1000,
+                "loan_type": _pick(rng, _LOAN_TYPES),
+                "loan_purpose": _pick(rng, _LOAN_PURPOSES),
+                "property_address_line1": f"{rng.randrange(1, 9999)} Oak Ave",
+                "property_city": city,
+                "property_state": state,
+                "property_postal_code": f"{rng.randrange(10000, 99999)}",
+                "property_country": "US",
+                "employment_income_annual": int(rng.lognormvariate(11.3, 0.5)) // 100 * 100,
+                "employment_status": _pick(rng, _EMPLOYMENT),
+                "application_status": _pick(rng, _STATUSES),
+                "created_at": self._created_at(self.app_created[index]),
+            }
+
+    def documents(self):
+        rng = self._rng("documents")
+        doc_id = 0
+        for index in range(self.application_count):
+            created = self.app_created[index]
+            for _ in range(_pick(rng, _DOCUMENTS_PER_APPLICATION)):
+                doc_id += 1
+                file_type = _pick(rng, _FILE_TYPES)
+                kind = rng.choice(DOCUMENT_KINDS)
+                yield {
+                    "id": doc_id,
+                    "organization_id": self.app_org[index],
+                    "application_id": index + 1,
+                    "borrower_id": self.app_borrower[index],
+                    "uploaded_by": self.app_officer[index] if rng.random() < 0.3 else None,
+                    "file_name": f"{kind}_{doc_id}.{file_type}",
+                    "file_type": file_type,
+                    "file_size": int(rng.lognormvariate(12.5, 1.0)),
+                    "storage_url": f"s3://documents/{self.app_org[index]}/{doc_id}.{file_type}",
+                    "storage_provider": "s3",
+                    "description": kind.replace("_", " "),
+                    "created_at": self._created_at(created + rng.randrange(30 * 86400)),
+                }
+
+    def communication_logs(self):
+        rng = self._rng("communication_logs")
+        log_id = 0
+        for index in range(self.application_count):
+            created = self.app_created[index]
+            # Pareto tail: most applications see a few messages, some see hundreds.
+            for _ in range(min(int(rng.paretovariate(1.3) * 2) - 1, 500)):
+                log_id += 1
+                created += rng.randrange(60, 3 * 86400)
+                sender_type = _pick(rng, _SENDERS)
+                yield {
+                    "id": log_id,
+                    "organization_id": self.app_org[index],
+                    "application_id": index + 1,
+                    "borrower_id": self.app_borrower[index],
+                    "sender_user_id": self.app_officer[index] if sender_type == "user" else None,
+                    "sender_type": sender_type,
+                    "message": rng.choice(MESSAGES),
+                    "message_type": "text",
+                    "channel": _pick(rng, _CHANNELS),
+                    "ai_model": "assistant-v1" if sender_type == "ai" else None,
+                    "created_at": self._created_at(created),
+                }
+
+    def audit_trails(self):
+        rng = self._rng("audit_trails")
+        entry_id = 0
+        for index in range(self.application_count):
+            created = self.app_created[index]
+            for _ in range(1 + int(rng.expovariate(1.0))):
+                entry_id += 1
+                action = _pick(rng, _AUDIT_ACTIONS)
+                created += rng.randrange(60, 7 * 86400)
+                yield {
+                    "id": entry_id,
+                    "organization_id": self.app_org[index],
+                    "user_id": self.app_officer[index],
+                    "entity_type": "applications",
+                    "entity_id": index + 1,
+                    "action": action,
+                    "old_value": None if action == "insert" else '{"application_status": "submitted"}',
+                    "new_value": None if action == "delete" else '{"application_status": "processing"}',
+                    "created_at": self._created_at(created),
+                }
+
+    def tables(self):
+        # FK order.
+        return (
+            (Organization, self.organizations),
+            (User, self.users),
+            (Borrower, self.borrowers),
+            (Application, self.applications),
+            (Document, self.documents),
+            (CommunicationLog, self.communication_logs),
+            (AuditTrail, self.audit_trails),
+        )
+
+
+def load(engine, dataset: Dataset, chunk_size: int = LOAD_CHUNK_SIZE):
+    # COPY on psycopg2, executemany elsewhere; one transaction per chunk.
+    counts = {}
+    for model, rows in dataset.tables():
+        columns = None
+        count = 0
+        for chunk in _chunks(rows(), chunk_size):
+            columns = columns or list(chunk[0])
+            with engine.begin() as connection:
+                count += copy_rows(connection, model, chunk, columns)
+        counts[model.__tablename__] = count
+        if engine.dialect.name == "postgresql" and count:
+            # Explicit ids leave the serial sequences behind.
+            with engine.begin() as connection:
+                table = model.__tablename__
+                connection.execute(text(f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), (SELECT max(id) FROM {table}))"))
+    if engine.dialect.name == "postgresql":
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+            connection.execute(text("ANALYZE"))
+    return counts
+
+
+def main(scale="10k", seed=0):
+    engine = create_engine(BENCH_DATABASE_URL)
+    drop_db(engine)
+    init_db(engine)
+    start = time.perf_counter()
+    dataset = Dataset.for_scale(scale, int(seed))
+    counts = load(engine, dataset)
+    elapsed = time.perf_counter() - start
+    sizes = sorted(dataset.tenant_sizes.values(), reverse=True)
+    print(f"tenants: {dataset.tenant_count}, largest {sizes[0]} / smallest {sizes[-1]} applications")
+    for table, count in counts.items():
+        print(f"{table:<22} {count:>10}")
+    print(f"{sum(counts.values())} rows in {elapsed:.1f}s")
+
+
+if __name__ == "__main__":
+    main(*sys.argv[1:3])
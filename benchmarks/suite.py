@@ -0,0 +1,496 @@
+"""Repository benchmark suite with a JSON report for regression comparison.
+
+    python -m benchmarks.suite run [--scale 10k] [--repeat 20] [--filter text] [--output report.json]
+    python -m benchmarks.suite compare base.json new.json [--threshold 0.15]
+
+`run` loads a benchmarks.datagen Dataset into BENCH_DATABASE_URL (a
+throwaway SQLite file by default; pass --reuse to keep an existing load) and
+times one scenario per public function in app/repositories. Every scenario
+whose function has an async_* twin is timed again through the async engine,
+if its driver is installed. Setup inside a scenario, such as inserting the
+rows a soft delete will remove, is not timed. Repository functions that no
+scenario covers are listed in the report.
+
+`compare` matches scenarios by name and exits non-zero when a median
+slowed down by more than --threshold.
+"""
+import argparse
+import asyncio
+import importlib
+import io
+import json
+import os
+import pkgutil
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from inspect import isclass, isfunction
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+import sqlalchemy
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from sqlalchemy.orm import sessionmaker
+
+import app.repositories
+from app.core import storage
+from app.core.config import _async_url
+from app.core.init_db import init_db, drop_db
+from app.models import Organization, User, Borrower, Application, Document, CommunicationLog, AuditTrail
+from app.repositories import (
+    organization_repository,
+    user_repository,
+    borrower_repository,
+    application_repository,
+    document_repository,
+    communication_repository,
+    audit_trail_repository,
+    bulk,
+    copy_loader,
+    export_repository,
+    identity_cache,
+    loader,
+    lookups,
+    pagination,
+    pipeline_repository,
+    projection,
+    search_repository,
+)
+from app.repositories.bulk import bulk_insert
+from benchmarks.datagen import Dataset, SCALES, load
+
+BENCH_DATABASE_URL = os.getenv("BENCH_DATABASE_URL", "sqlite:///bench.db")
+BATCH = 100
+BULK_ROWS = 1000
+
+# (module, model, singular, plural) for the functions every entity repository has.
+ENTITIES = (
+    (organization_repository, Organization, "organization", "organizations"),
+    (user_repository, User, "user", "users"),
+    (borrower_repository, Borrower, "borrower", "borrowers"),
+    (application_repository, Application, "application", "applications"),
+    (document_repository, Document, "document", "documents"),
+    (communication_repository, CommunicationLog, "log", "logs"),
+    (audit_trail_repository, AuditTrail, "audit_entry", "audit_entries"),
+)
+
+
+class Scenario:
+    def __init__(self, name, fn, args=lambda ctx: (), kwargs=None, load=None, async_fn=None, covers=()):
+        self.name = name
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs or {}
+        # When set, the first argument is an id of this model and is loaded
+        # into the timed session before the clock starts.
+        self.load = load
+        self.async_fn = async_fn if async_fn is not None else _async_twin(fn)
+        covers = (fn, self.async_fn, *covers, *(_async_twin(c) for c in covers))
+        self.covers = {_qualname(c) for c in covers if c is not None}
+
+
+def _qualname(obj):
+    return f"{obj.__module__}.{obj.__name__}"
+
+
+def _label(fn):
+    return f"{fn.__module__.rsplit('.', 1)[-1]}.{fn.__name__}"
+
+
+def _async_twin(fn):
+    module = sys.modules.get(fn.__module__)
+    return getattr(module, f"async_{fn.__name__}", None) if module else None
+
+
+class Context:
+    """Ids and rows the scenarios draw from, fixed by the dataset seed."""
+
+    def __init__(self, dataset, Session):
+        self.dataset = dataset
+        self.Session = Session
+        self.rng = random.Random(dataset.seed)
+        self.hot_org = dataset.largest_tenant
+        self.cold_org = dataset.smallest_tenant
+        self._serial = 0
+        with Session() as session:
+            self.max_ids = {
+                model: session.scalar(select(func.max(model.id))) or 0
+                for _, model, _, _ in ENTITIES
+            }
+            self.hot_applications = session.scalars(
+                select(Application.id).where(Application.organization_id == self.hot_org)
+            ).all()
+            self.busy_application = session.scalar(
+                select(CommunicationLog.application_id)
+                .group_by(CommunicationLog.application_id)
+                .order_by(func.count().desc())
+                .limit(1)
+            )
+            self.hot_user_email = session.scalar(select(User.email).where(User.organization_id == self.hot_org).limit(1))
+            self.hot_user_id = session.scalar(select(User.id).where(User.organization_id == self.hot_org).limit(1))
+            anchor = session.execute(
+                select(Application.created_at, Application.id)
+                .where(Application.organization_id == self.hot_org, Application.deleted_at.is_(None))
+                .order_by(Application.created_at.desc(), Application.id.desc())
+                .offset(len(self.hot_applications) // 2)
+                .limit(1)
+            ).first()
+            self.deep_cursor = pagination.encode_cursor(*anchor) if anchor else None
+        self.templates = {model: dict(next(rows())) for model, rows in dataset.tables()}
+        for row in self.templates.values():
+            row.pop("id")
+            row.pop("created_at", None)
+
+    def sample_id(self, model):
+        return self.rng.randint(1, self.max_ids[model])
+
+    def sample_ids(self, model, n=BATCH):
+        return [self.sample_id(model) for _ in range(n)]
+
+    def hot_application(self):
+        return self.rng.choice(self.hot_applications)
+
+    def log_key(self):
+        with self.Session() as session:
+            return session.execute(
+                select(CommunicationLog.id, CommunicationLog.created_at).where(CommunicationLog.id == self.sample_id(CommunicationLog))
+            ).one()
+
+    def new_row(self, model, **values):
+        self._serial += 1
+        row = dict(self.templates[model], **values)
+        if model is User:
+            row["email"] = f"bench{self._serial}-{time.time_ns()}@bench.example"
+        return row
+
+    def new_rows(self, model, n, **values):
+        return [self.new_row(model, **values) for _ in range(n)]
+
+    def new_object(self, model, **values):
+        return model(**self.new_row(model, **values))
+
+    def insert(self, model, n=1, **values):
+        with self.Session() as session:
+            return bulk_insert(session, model, self.new_rows(model, n, **values))
+
+    def tree(self, root):
+        # A small subtree under a new root, for the cascade scenarios.
+        org_id = self.insert(Organization)[0] if root is Organization else self.templates[Borrower]["organization_id"]
+        borrower_id = self.insert(Borrower, organization_id=org_id)[0]
+        app_id = self.insert(Application, organization_id=org_id, borrower_id=borrower_id)[0]
+        children = dict(organization_id=org_id, application_id=app_id, borrower_id=borrower_id)
+        self.insert(Document, 3, **children)
+        self.insert(CommunicationLog, 10, **children)
+        return {Organization: org_id, Borrower: borrower_id, Application: app_id}[root]
+
+
+def _entity_scenarios(module, model, singular, plural):
+    def fn(name):
+        return getattr(module, name.format(s=singular, p=plural), None)
+
+    candidates = [
+        (fn("get_{s}_by_id"), dict(args=lambda ctx: (ctx.sample_id(model),), covers=(lookups.loaded_live,))),
+        (fn("get_{p}_by_ids"), dict(args=lambda ctx: (ctx.sample_ids(model),))),
+        (fn("create_{s}"), dict(args=lambda ctx: (ctx.new_object(model),))),
+        (fn("bulk_create_{p}"), dict(args=lambda ctx: (ctx.new_rows(model, BULK_ROWS),), covers=(bulk.bulk_insert,))),
+        (fn("soft_delete_{s}"), dict(args=lambda ctx: (ctx.insert(model)[0],), load=model)),
+        (fn("soft_delete_{p}_by_ids"), dict(args=lambda ctx: (ctx.insert(model, BATCH),), covers=(bulk.soft_delete_where,))),
+    ]
+    fields = ("name",) if model is Organization else ("organization_id",)
+    candidates.append((fn("get_{s}_rows_by_ids"), dict(args=lambda ctx: (ctx.sample_ids(model), fields), covers=(projection.project_by_ids, projection.projection, projection.Projection))))
+    if model is Organization:
+        candidates.append((fn("list_{p}"), dict(covers=(pagination.keyset_page, pagination.Page))))
+        candidates.append((fn("list_{s}_rows"), dict(args=lambda ctx: (fields,), covers=(projection.project_page,))))
+    else:
+        candidates.append((fn("list_{p}"), dict(args=lambda ctx: (ctx.hot_org,), covers=(pagination.keyset_page, pagination.Page))))
+        candidates.append((fn("list_{s}_rows"), dict(args=lambda ctx: (ctx.hot_org, fields), covers=(projection.project_page,))))
+    if model in (Organization, Borrower, Application):
+        candidates.append((fn("soft_delete_{s}_cascade"), dict(args=lambda ctx: ([ctx.tree(model)],), covers=(bulk.run_cascade,))))
+    return [Scenario(_label(f), f, **options) for f, options in candidates if f is not None]
+
+
+def _export(format):
+    def run(session, org_id):
+        return export_repository.export_applications(session, org_id, io.StringIO(), format=format)
+    run.__name__ = f"export_{format}"
+    return run
+
+
+def _export_parquet(session, org_id, path="bench_export.parquet"):
+    try:
+        return export_repository.export_applications(session, org_id, path, format="parquet")
+    finally:
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def _request_loader(session, ids):
+    batch = loader.RequestLoader(session)
+    batch.want(Borrower, *ids)
+    return batch.get_many(Borrower, ids)
+
+
+async def _async_request_loader(session, ids):
+    return await loader.AsyncRequestLoader(session).load_many(Borrower, ids)
+
+
+def _buffered_log_loader(session, rows):
+    with communication_repository.log_loader(session.get_bind()) as buffered:
+        for row in rows:
+            buffered.put(row)
+    return buffered.rows_written
+
+
+def _buffered_audit_loader(session, rows):
+    with audit_trail_repository.audit_entry_loader(session.get_bind()) as buffered:
+        for row in rows:
+            buffered.put(row)
+    return buffered.rows_written
+
+
+_STORAGE = storage.LocalStorage(os.path.join(tempfile.gettempdir(), "bench_storage"))
+
+
+def _document_content(ctx):
+    # Distinct bytes each call, so every upload is a real write, not a dedup hit.
+    return (ctx.new_object(Document), ctx.rng.randbytes(256 * 1024), _STORAGE)
+
+
+def _iter_pages(session, org_id):
+    return sum(len(page) for page in pagination.iter_pages(document_repository.list_documents, session, org_id, page_size=pagination.MAX_PAGE_SIZE))
+
+
+def scenarios():
+    result = []
+    for entity in ENTITIES:
+        result.extend(_entity_scenarios(*entity))
+
+    app_repo, log_repo, audit_repo = application_repository, communication_repository, audit_trail_repository
+    result += [
+        Scenario(_label(user_repository.get_user_by_email), user_repository.get_user_by_email, args=lambda ctx: (ctx.hot_user_email,)),
+        Scenario(_label(app_repo.get_application_bundle), app_repo.get_application_bundle, args=lambda ctx: (ctx.busy_application,), covers=(app_repo.ApplicationBundle,)),
+        Scenario(f"{_label(app_repo.list_applications)}[deep]", app_repo.list_applications, args=lambda ctx: (ctx.hot_org, None, None, ctx.deep_cursor), covers=(pagination.encode_cursor, pagination.decode_cursor, pagination.keyset_stmt)),
+        Scenario(f"{_label(app_repo.list_applications)}[status]", app_repo.list_applications, args=lambda ctx: (ctx.hot_org,), kwargs={"status": "underwriting"}),
+        Scenario(f"{_label(document_repository.list_documents)}[application]", document_repository.list_documents, args=lambda ctx: (ctx.hot_org, ctx.hot_application())),
+        Scenario(f"{_label(log_repo.list_logs)}[application]", log_repo.list_logs, args=lambda ctx: (ctx.hot_org, ctx.busy_application)),
+        Scenario(f"{_label(log_repo.list_logs)}[since]", log_repo.list_logs, args=lambda ctx: (ctx.hot_org,), kwargs={"since": datetime(2024, 12, 1)}),
+        Scenario(f"{_label(log_repo.get_log_by_id)}[created_at]", log_repo.get_log_by_id, args=lambda ctx: tuple(ctx.log_key())),
+        Scenario(f"{_label(audit_repo.list_audit_entries)}[entity]", audit_repo.list_audit_entries, args=lambda ctx: (ctx.hot_org,), kwargs={"entity_type": "applications"}),
+        Scenario(_label(log_repo.copy_create_logs), log_repo.copy_create_logs, args=lambda ctx: (ctx.new_rows(CommunicationLog, BULK_ROWS),), covers=(log_repo.copy_create_logs, copy_loader.copy_rows, copy_loader.default_columns)),
+        Scenario(_label(audit_repo.copy_create_audit_entries), audit_repo.copy_create_audit_entries, args=lambda ctx: (ctx.new_rows(AuditTrail, BULK_ROWS),), covers=(audit_repo.copy_create_audit_entries,)),
+        Scenario(_label(log_repo.log_loader), _buffered_log_loader, args=lambda ctx: (ctx.new_rows(CommunicationLog, BULK_ROWS),), covers=(log_repo.log_loader, copy_loader.BufferedLoader)),
+        Scenario(_label(audit_repo.audit_entry_loader), _buffered_audit_loader, args=lambda ctx: (ctx.new_rows(AuditTrail, BULK_ROWS),), covers=(audit_repo.audit_entry_loader,)),
+        Scenario("loader.RequestLoader", _request_loader, args=lambda ctx: (ctx.sample_ids(Borrower),), async_fn=_async_request_loader, covers=(loader.RequestLoader, loader.AsyncRequestLoader)),
+        Scenario("pagination.iter_pages", _iter_pages, args=lambda ctx: (ctx.cold_org,), covers=(pagination.iter_pages,)),
+        Scenario("export_repository.export_applications[csv]", _export("csv"), args=lambda ctx: (ctx.cold_org,), covers=(export_repository.export_applications, export_repository.iter_application_rows, export_repository.write_csv)),
+        Scenario("export_repository.export_applications[ndjson]", _export("ndjson"), args=lambda ctx: (ctx.cold_org,), covers=(export_repository.write_ndjson,)),
+        Scenario("export_repository.export_applications[parquet]", _export_parquet, args=lambda ctx: (ctx.cold_org,), covers=(export_repository.write_parquet,)),
+        Scenario("identity_cache.get_organization_by_id", (identity_cache.get_organization_by_id), args=lambda ctx: (ctx.hot_org,), covers=(identity_cache.get_organization_by_id, identity_cache.IdentityCache, identity_cache.OrganizationSnapshot)),
+        Scenario("identity_cache.get_user_by_id", (identity_cache.get_user_by_id), args=lambda ctx: (ctx.hot_user_id,), covers=(identity_cache.get_user_by_id, identity_cache.UserSnapshot)),
+        Scenario(_label(search_repository.search_borrowers), search_repository.search_borrowers, args=lambda ctx: (ctx.hot_org, "mar"), covers=(pagination.ranked_page, pagination.encode_rank_cursor, pagination.decode_rank_cursor, pagination.ranked_stmt)),
+        Scenario(f"{_label(search_repository.search_borrowers)}[full]", search_repository.search_borrowers, args=lambda ctx: (ctx.hot_org, "maria garcia")),
+        Scenario(_label(search_repository.search_messages), search_repository.search_messages, args=lambda ctx: (ctx.hot_org, "appraisal scheduled")),
+        Scenario(_label(pipeline_repository.get_pipeline_summary), pipeline_repository.get_pipeline_summary, args=lambda ctx: (ctx.hot_org,), covers=(pipeline_repository.StatusTotals,)),
+        Scenario(_label(document_repository.store_document), document_repository.store_document, args=_document_content),
+        Scenario("identity_cache.get_user_by_email", (identity_cache.get_user_by_email), args=lambda ctx: (ctx.hot_user_email,), covers=(identity_cache.get_user_by_email,)),
+    ]
+    return result
+
+
+def repository_functions():
+    names = set()
+    for info in pkgutil.iter_modules(app.repositories.__path__):
+        module = importlib.import_module(f"app.repositories.{info.name}")
+        for name, value in vars(module).items():
+            if name.startswith("_") or not (isfunction(value) or isclass(value)):
+                continue
+            if value.__module__ == module.__name__:
+                names.add(f"{module.__name__}.{name}")
+    return names
+
+
+def _summary(samples, rows):
+    samples.sort()
+    return {
+        "repeat": len(samples),
+        "min_ms": samples[0] * 1000,
+        "median_ms": statistics.median(samples) * 1000,
+        "p95_ms": samples[min(len(samples) - 1, int(len(samples) * 0.95))] * 1000,
+        "mean_ms": statistics.fmean(samples) * 1000,
+        "rows": rows,
+    }
+
+
+def _rows(result):
+    if isinstance(result, (list, tuple, set, dict)):
+        return len(result)
+    if isinstance(result, pagination.Page):
+        return len(result.items)
+    if isinstance(result, int) and not isinstance(result, bool):
+        return result
+    return 0 if result is None else 1
+
+
+def run_sync(scenario, ctx, repeat):
+    samples, rows = [], 0
+    for iteration in range(repeat + 1):
+        args = scenario.args(ctx)
+        with ctx.Session() as session:
+            if scenario.load is not None:
+                args = (session.get(scenario.load, args[0]),) + args[1:]
+            start = time.perf_counter()
+            result = scenario.fn(session, *args, **scenario.kwargs)
+            elapsed = time.perf_counter() - start
+        if iteration:
+            samples.append(elapsed)
+            rows = _rows(result)
+    return _summary(samples, rows)
+
+
+async def run_async(scenario, ctx, AsyncSession, repeat):
+    samples, rows = [], 0
+    for iteration in range(repeat + 1):
+        args = scenario.args(ctx)
+        async with AsyncSession() as session:
+            if scenario.load is not None:
+                args = (await session.get(scenario.load, args[0]),) + args[1:]
+            start = time.perf_counter()
+            result = await scenario.async_fn(session, *args, **scenario.kwargs)
+            elapsed = time.perf_counter() - start
+        if iteration:
+            samples.append(elapsed)
+            rows = _rows(result)
+    return _summary(samples, rows)
+
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(scale="10k", seed=0, repeat=20, name_filter=None, reuse=False, run_async_twins=True, url=BENCH_DATABASE_URL):
+    engine = create_engine(url)
+    dataset = Dataset.for_scale(scale, seed)
+    if not reuse:
+        drop_db(engine)
+        init_db(engine)
+        load(engine, dataset)
+    Session = sessionmaker(bind=engine, autoflush=False, expire_on_commit=False)
+    ctx = Context(dataset, Session)
+
+    selected = [s for s in scenarios() if not name_filter or name_filter in s.name]
+    results, skipped = {}, {}
+    for scenario in selected:
+        try:
+            results[scenario.name] = run_sync(scenario, ctx, repeat)
+        except ImportError as exc:
+            skipped[scenario.name] = str(exc)
+            continue
+        print(f"{scenario.name:<72} {results[scenario.name]['median_ms']:>10.3f} ms")
+
+    async_engine = None
+    if run_async_twins:
+        try:
+            async_engine = create_async_engine(_async_url(url))
+        except ImportError as exc:
+            skipped["async"] = str(exc)
+    if async_engine is not None:
+        AsyncSession = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+        async def run_all():
+            for scenario in selected:
+                if scenario.async_fn is None or scenario.name not in results:
+                    continue
+                name = f"{scenario.name}[async]"
+                results[name] = await run_async(scenario, ctx, AsyncSession, repeat)
+                print(f"{name:<72} {results[name]['median_ms']:>10.3f} ms")
+            await async_engine.dispose()
+
+        asyncio.run(run_all())
+
+    covered = set().union(*(s.covers for s in selected)) if selected else set()
+    return {
+        "meta": {
+            "scale": scale,
+            "applications": dataset.application_count,
+            "seed": seed,
+            "repeat": repeat,
+            "dialect": engine.dialect.name,
+            "driver": engine.dialect.driver,
+            "server_version": ".".join(str(v) for v in engine.dialect.server_version_info or ()),
+            "python": platform.python_version(),
+            "sqlalchemy": sqlalchemy.__version__,
+            "commit": _git_commit(),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+        },
+        "scenarios": results,
+        "skipped": skipped,
+        "uncovered": sorted(repository_functions() - covered) if not name_filter else [],
+    }
+
+
+def compare(base, new, threshold=0.15, min_ms=0.05):
+    regressions = []
+    print(f"{'scenario':<72} {'base ms':>10} {'new ms':>10} {'change':>8}")
+    for name in sorted(base["scenarios"].keys() & new["scenarios"].keys()):
+        before = base["scenarios"][name]["median_ms"]
+        after = new["scenarios"][name]["median_ms"]
+        change = (after - before) / before if before else 0.0
+        flag = ""
+        if change > threshold and after - before > min_ms:
+            flag = "  REGRESSION"
+            regressions.append(name)
+        print(f"{name:<72} {before:>10.3f} {after:>10.3f} {change:>+8.1%}{flag}")
+    for name in sorted(base["scenarios"].keys() - new["scenarios"].keys()):
+        print(f"{name:<72} missing from new report")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark app/repositories against a synthetic dataset.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    run_parser = commands.add_parser("run")
+    run_parser.add_argument("--scale", choices=SCALES, default="10k")
+    run_parser.add_argument("--seed", type=int, default=0)
+    run_parser.add_argument("--repeat", type=int, default=20)
+    run_parser.add_argument("--filter", dest="name_filter")
+    run_parser.add_argument("--reuse", action="store_true", help="keep the data already loaded for this scale and seed")
+    run_parser.add_argument("--no-async", dest="run_async_twins", action="store_false")
+    run_parser.add_argument("--output", default="benchmark-report.json")
+    compare_parser = commands.add_parser("compare")
+    compare_parser.add_argument("base")
+    compare_parser.add_argument("new")
+    compare_parser.add_argument("--threshold", type=float, default=0.15)
+    compare_parser.add_argument("--min-ms", type=float, default=0.05)
+    args = parser.parse_args(argv)
+
+    if args.command == "run":
+        report = run(args.scale, args.seed, args.repeat, args.name_filter, args.reuse, args.run_async_twins)
+        with open(args.output, "w") as fp:
+            json.dump(report, fp, indent=2)
+        for name in report["uncovered"]:
+            print(f"not covered: {name}")
+        for name, reason in report["skipped"].items():
+            print(f"skipped {name}: {reason}")
+        print(f"wrote {args.output}")
+        return 0
+
+    with open(args.base) as fp:
+        base = json.load(fp)
+    with open(args.new) as fp:
+        new = json.load(fp)
+    regressions = compare(base, new, args.threshold, args.min_ms)
+    print(f"{len(regressions)} regression(s) over {args.threshold:.0%}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,39 @@
+from contextlib import contextmanager
+import pytest
+from sqlalchemy import event
+# Before the models: it defaults DATABASE_URL to the test database.
+import app.core.test_db
+from app.models import Organization, Borrower
+
+pytest_plugins = ["app.core.pytest_plugin"]
+
+@pytest.fixture
+def organization(db_session):
+    org = Organization(name="Acme Lending")
+    db_session.add(org)
+    db_session.flush()
+    return org
+
+@pytest.fixture
+def borrower(db_session, organization):
+    borrower = Borrower(organization_id=organization.id, first_name="Ada", last_name="Lovelace", email="ada@example.com")
+    db_session.add(borrower)
+    db_session.flush()
+    return borrower
+
+@pytest.fixture
+def capture_statements(db_session):
+    """Context manager collecting (statement, parameters) sent by db_session."""
+    @contextmanager
+    def capture():
+        statements = []
+
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            statements.append((statement, parameters))
+        connection = db_session.connection()
+        event.listen(connection, "before_cursor_execute", before_cursor_execute)
+        try:
+            yield statements
+        finally:
+            event.remove(connection, "before_cursor_execute", before_cursor_execute)
+    return capture
@@ -0,0 +1,52 @@
+from app.models import Application, CommunicationLog, Document, User
+from app.models.enums import ApplicationStatus, MessageChannel, UserRole
+from app.repositories import application_repository
+
+def _application_with_children(session, organization, borrower, documents=5, logs=30):
+    officer = User(organization_id=organization.id, email="officer@example.com", password_hash="x", role=UserRole.LOAN_OFFICER)
+    session.add(officer)
+    session.flush()
+    application = Application(
+        organization_id=organization.id, borrower_id=borrower.id, loan_officer_id=officer.id,
+        application_status=ApplicationStatus.SUBMITTED,
+    )
+    session.add(application)
+    session.flush()
+    session.add_all(
+        Document(organization_id=organization.id, application_id=application.id, borrower_id=borrower.id, file_name=f"doc{i}.pdf")
+        for i in range(documents)
+    )
+    session.add_all(
+        CommunicationLog(organization_id=organization.id, application_id=application.id, message=f"message {i}", channel=MessageChannel.EMAIL)
+        for i in range(logs)
+    )
+    app_id = application.id
+    session.commit()
+    session.expunge_all()
+    return app_id
+
+def test_bundle_loads_in_a_fixed_number_of_statements(db_session, organization, borrower, capture_statements):
+    app_id = _application_with_children(db_session, organization, borrower)
+    with capture_statements() as statements:
+        bundle = application_repository.get_application_bundle(db_session, app_id)
+        # Touch everything a detail view renders; none of it may lazy-load.
+        assert bundle.application.borrower.first_name == "Ada"
+        assert bundle.application.loan_officer.email == "officer@example.com"
+        assert len(bundle.application.documents) == 5
+        assert all(document.file_name for document in bundle.application.documents)
+        assert len(bundle.recent_logs) == application_repository.RECENT_LOGS
+        assert all(log.message for log in bundle.recent_logs)
+        assert bundle.more_logs_cursor is not None
+    # The application with borrower and loan officer, its documents, and a
+    # page of logs.
+    assert len(statements) == 3
+
+def test_bundle_statements_do_not_grow_with_children(db_session, organization, borrower, capture_statements):
+    app_id = _application_with_children(db_session, organization, borrower, documents=40, logs=5)
+    with capture_statements() as statements:
+        bundle = application_repository.get_application_bundle(db_session, app_id)
+        assert len(bundle.application.documents) == 40
+    assert len(statements) == 3
+
+def test_bundle_for_missing_application(db_session):
+    assert application_repository.get_application_bundle(db_session, 12345) is None
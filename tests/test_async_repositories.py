@@ -0,0 +1,150 @@
+import asyncio
+from types import SimpleNamespace
+import pytest
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import create_async_engine
+from app.core.async_database import async_engine_options
+from app.core.config import Settings
+from app.core.pool_metrics import MeteredAsyncAdaptedQueuePool, pool_metrics
+from app.core.test_db import async_rollback_session, async_savepoint_engine
+from app.models import Application, AuditTrail, Borrower, CommunicationLog, Document, Organization, User
+from app.repositories import (
+    application_repository, audit_trail_repository, borrower_repository, communication_repository,
+    document_repository, organization_repository, user_repository,
+)
+
+@pytest.fixture
+def run_async(db_engine):
+    # Runs test(session) in an AsyncSession on aiosqlite (or asyncpg) whose
+    # writes are rolled back afterwards, configured like AsyncSessionLocal.
+    def run(test):
+        async def main():
+            engine = async_savepoint_engine(db_engine)
+            try:
+                async with async_rollback_session(engine, expire_on_commit=False) as session:
+                    return await test(session)
+            finally:
+                await engine.dispose()
+        return asyncio.run(main())
+    return run
+
+async def _parents(session):
+    org = await organization_repository.async_create_organization(session, Organization(name="Async Lending"))
+    borrower = await borrower_repository.async_create_borrower(
+        session, Borrower(organization_id=org.id, first_name="Ada", last_name="Lovelace")
+    )
+    application = await application_repository.async_create_application(
+        session, Application(organization_id=org.id, borrower_id=borrower.id)
+    )
+    return SimpleNamespace(org=org.id, borrower=borrower.id, application=application.id)
+
+# (repository, model, singular, plural, column values for the n-th row)
+ENTITIES = [
+    (organization_repository, Organization, "organization", "organizations",
+     lambda p, n: {"name": f"Org {n}"}),
+    (user_repository, User, "user", "users",
+     lambda p, n: {"organization_id": p.org, "email": f"async{n}-{p.org}@example.com", "password_hash": "x"}),
+    (borrower_repository, Borrower, "borrower", "borrowers",
+     lambda p, n: {"organization_id": p.org, "first_name": f"Borrower {n}"}),
+    (application_repository, Application, "application", "applications",
+     lambda p, n: {"organization_id": p.org, "borrower_id": p.borrower}),
+    (document_repository, Document, "document", "documents",
+     lambda p, n: {"organization_id": p.org, "application_id": p.application, "file_name": f"{n}.pdf"}),
+    (communication_repository, CommunicationLog, "log", "logs",
+     lambda p, n: {"organization_id": p.org, "application_id": p.application, "message": f"message {n}"}),
+    (audit_trail_repository, AuditTrail, "audit_entry", "audit_entries",
+     lambda p, n: {"organization_id": p.org, "entity_type": "borrowers", "entity_id": p.borrower, "action": "update"}),
+]
+
+async def _list_all(list_fn, session, *args):
+    ids, cursor = [], None
+    while True:
+        page = await list_fn(session, *args, cursor=cursor, page_size=2)
+        ids += [item.id for item in page.items]
+        if page.next_cursor is None:
+            return ids
+        cursor = page.next_cursor
+
+@pytest.mark.parametrize("repository, model, singular, plural, values", ENTITIES, ids=[e[2] for e in ENTITIES])
+def test_async_crud_and_lists(run_async, repository, model, singular, plural, values):
+    def fn(name):
+        return getattr(repository, f"async_{name}".format(s=singular, p=plural), None)
+    scope = () if model is Organization else None
+
+    async def test(session):
+        parents = await _parents(session)
+        args = scope if scope is not None else (parents.org,)
+        created = await fn("create_{s}")(session, model(**values(parents, 0)))
+        assert created.id is not None
+        get = fn("get_{s}_by_id")
+        if get is not None:
+            assert (await get(session, created.id)).id == created.id
+        bulk_ids = await fn("bulk_create_{p}")(session, [values(parents, n) for n in range(1, 4)], chunk_size=2)
+        assert len(bulk_ids) == 3
+        ids = [created.id, *bulk_ids]
+        assert set(await fn("get_{p}_by_ids")(session, ids)) == set(ids)
+        assert set(ids) <= set(await _list_all(fn("list_{p}"), session, *args))
+        field = "name" if model is Organization else "organization_id"
+        rows = await fn("get_{s}_rows_by_ids")(session, ids, (field,))
+        assert set(rows) == set(ids) and all(row._fields == ("id", field, "created_at") for row in rows.values())
+        page = await fn("list_{s}_rows")(session, *args, (field,), page_size=50)
+        assert set(ids) <= {row.id for row in page.items}
+
+        await fn("soft_delete_{s}")(session, created)
+        if get is not None:
+            assert await get(session, created.id) is None
+        assert await fn("soft_delete_{p}_by_ids")(session, bulk_ids) == 3
+        assert await fn("get_{p}_by_ids")(session, ids) == {}
+        assert not set(ids) & set(await _list_all(fn("list_{p}"), session, *args))
+    run_async(test)
+
+def test_async_bundle_and_cascade(run_async):
+    async def test(session):
+        parents = await _parents(session)
+        await document_repository.async_bulk_create_documents(
+            session, [{"organization_id": parents.org, "application_id": parents.application, "file_name": "id.pdf"}]
+        )
+        await communication_repository.async_bulk_create_logs(
+            session, [{"organization_id": parents.org, "application_id": parents.application, "message": "hello"}] * 2
+        )
+        bundle = await application_repository.async_get_application_bundle(session, parents.application)
+        assert (len(bundle.application.documents), len(bundle.recent_logs)) == (1, 2)
+        counts = await application_repository.async_soft_delete_application_cascade(session, [parents.application])
+        assert counts == {"documents": 1, "communication_logs": 2, "applications": 1}
+        assert await application_repository.async_get_application_bundle(session, parents.application) is None
+        assert (await document_repository.async_list_documents(session, parents.org)).items == []
+    run_async(test)
+
+def test_async_user_by_email(run_async):
+    async def test(session):
+        parents = await _parents(session)
+        user = await user_repository.async_create_user(
+            session, User(organization_id=parents.org, email="async@example.com", password_hash="x")
+        )
+        assert (await user_repository.async_get_user_by_email(session, "async@example.com")).id == user.id
+        assert await user_repository.async_get_user_by_email(session, "missing@example.com") is None
+    run_async(test)
+
+def test_async_engine_options_meter_the_pool():
+    options = async_engine_options(Settings(database_url="postgresql+psycopg2://db/app", async_database_url="postgresql+asyncpg://db/app"))
+    assert options["poolclass"] is MeteredAsyncAdaptedQueuePool
+    assert "poolclass" not in async_engine_options(Settings(database_url="sqlite:///app.db"))
+
+def test_async_pool_waits_and_timeouts_are_recorded(tmp_path):
+    async def main():
+        engine = create_async_engine(
+            f"sqlite+aiosqlite:///{tmp_path / 'pool.db'}",
+            poolclass=MeteredAsyncAdaptedQueuePool, pool_size=1, max_overflow=0, pool_timeout=0.05,
+        )
+        before = pool_metrics.snapshot()
+        try:
+            async with engine.connect():
+                with pytest.raises(PoolTimeoutError):
+                    async with engine.connect():
+                        pass
+        finally:
+            await engine.dispose()
+        return before, pool_metrics.snapshot()
+    before, after = asyncio.run(main())
+    assert after["timeouts"] == before["timeouts"] + 1
+    assert after["wait_seconds_max"] >= 0.05
@@ -0,0 +1,111 @@
+import threading
+import pytest
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.orm import sessionmaker
+from app.core.audit import AuditRecorder, ASYNC, DROP, INLINE
+from app.models import AuditTrail, Organization
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'audit.db'}")
+    Organization.__table__.create(engine)
+    AuditTrail.__table__.create(engine)
+    yield engine
+    engine.dispose()
+
+def _stalled(recorder):
+    # Holds the loader's worker in its first flush until released, so the
+    # queue fills up behind it.
+    started, release = threading.Event(), threading.Event()
+    flush = recorder.loader._flush
+
+    def stalled_flush(batch):
+        started.set()
+        release.wait(5)
+        flush(batch)
+    recorder.loader._flush = stalled_flush
+    return started, release
+
+def _failing(recorder, failures=1):
+    # The loader's next flushes fail, as on a dropped connection.
+    calls = []
+    flush = recorder.loader._flush
+
+    def failing_flush(batch):
+        calls.append(len(batch))
+        if len(calls) <= failures:
+            raise OSError("connection lost")
+        flush(batch)
+    recorder.loader._flush = failing_flush
+    return calls
+
+def _create(Session, count):
+    with Session() as session:
+        session.add_all(Organization(name=f"org {n}") for n in range(count))
+        session.commit()
+
+def _audit_rows(engine):
+    with engine.connect() as conn:
+        return conn.scalar(select(func.count()).select_from(AuditTrail))
+
+@pytest.mark.parametrize("overflow, written_before_release, written", [(INLINE, 3, 6), (DROP, 0, 3)])
+def test_full_queue_does_not_block_commit(engine, overflow, written_before_release, written):
+    Session = sessionmaker(engine)
+    recorder = AuditRecorder(engine, ASYNC, overflow, max_rows=1, max_pending=2).install(Session)
+    try:
+        started, release = _stalled(recorder)
+        _create(Session, 1)
+        assert started.wait(5)
+        # Two of these fit in the queue, the other three overflow.
+        _create(Session, 5)
+        assert not release.is_set()
+        assert recorder.overflows == 3
+        assert _audit_rows(engine) == written_before_release
+        release.set()
+    finally:
+        recorder.uninstall()
+    assert _audit_rows(engine) == written
+
+def test_failed_flush_is_retried(engine):
+    Session = sessionmaker(engine)
+    recorder = AuditRecorder(engine, ASYNC, max_rows=1, retry_delay=0).install(Session)
+    try:
+        calls = _failing(recorder)
+        _create(Session, 1)
+    finally:
+        recorder.uninstall()
+    assert calls == [1, 1]
+    assert recorder.overflows == 0
+    assert _audit_rows(engine) == 1
+
+@pytest.mark.parametrize("overflow, written", [(INLINE, 6), (DROP, 5)])
+def test_auditing_survives_a_failed_flush(engine, overflow, written):
+    Session = sessionmaker(engine)
+    recorder = AuditRecorder(engine, ASYNC, overflow, max_rows=1, retries=0).install(Session)
+    try:
+        _failing(recorder)
+        _create(Session, 1)
+        for _ in range(5):
+            _create(Session, 1)
+    finally:
+        recorder.uninstall()
+    # The failed batch goes through the overflow policy; later commits are
+    # audited as usual.
+    assert recorder.overflows == 1
+    assert recorder.loader is None
+    assert _audit_rows(engine) == written
+
+def test_unavailable_loader_falls_back_to_overflow(engine):
+    Session = sessionmaker(engine)
+    recorder = AuditRecorder(engine, ASYNC).install(Session)
+    try:
+        recorder.loader.close()
+        _create(Session, 3)
+        assert recorder.overflows == 3
+        assert _audit_rows(engine) == 3
+    finally:
+        recorder.uninstall()
+
+def test_unknown_overflow_policy(engine):
+    with pytest.raises(ValueError, match="overflow"):
+        AuditRecorder(engine, ASYNC, "block")
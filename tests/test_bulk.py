@@ -0,0 +1,49 @@
+import pytest
+from sqlalchemy import delete, func, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from app.models import Borrower, Organization
+from app.repositories.bulk import bulk_insert
+
+NAMES = ["Grace", "Ada", "Edsger", "Barbara", "Alan", "Frances", "Donald", "Radia"]
+
+def test_ids_follow_input_order_across_chunks(db_session, organization):
+    rows = [{"organization_id": organization.id, "first_name": name} for name in NAMES]
+    ids = bulk_insert(db_session, Borrower, rows, chunk_size=3)
+    names = dict(db_session.execute(select(Borrower.id, Borrower.first_name).where(Borrower.id.in_(ids))).all())
+    assert len(set(ids)) == len(NAMES)
+    assert [names[id] for id in ids] == NAMES
+
+def test_rows_can_be_a_generator(db_session, organization):
+    rows = ({"organization_id": organization.id, "first_name": name} for name in NAMES)
+    assert len(bulk_insert(db_session, Borrower, rows, chunk_size=5)) == len(NAMES)
+    assert bulk_insert(db_session, Borrower, iter(()), chunk_size=5) == []
+
+@pytest.fixture
+def committed_org(db_engine):
+    # A real commit, outside db_session's rolled-back transaction, so the test
+    # can check what another connection sees.
+    with Session(db_engine) as session:
+        org = Organization(name="Bulk")
+        session.add(org)
+        session.commit()
+        org_id = org.id
+    yield org_id
+    with Session(db_engine) as session:
+        session.execute(delete(Borrower).where(Borrower.organization_id == org_id))
+        session.execute(delete(Organization).where(Organization.id == org_id))
+        session.commit()
+
+def test_failed_chunk_keeps_earlier_chunks(db_engine, committed_org):
+    rows = [{"organization_id": committed_org, "first_name": name} for name in NAMES[:6]]
+    rows.append({"organization_id": None, "first_name": "Invalid"})
+    with Session(db_engine) as session:
+        with pytest.raises(IntegrityError):
+            bulk_insert(session, Borrower, rows, chunk_size=3)
+        session.rollback()
+    with Session(db_engine) as session:
+        written = session.scalars(
+            select(Borrower.first_name).where(Borrower.organization_id == committed_org).order_by(Borrower.id)
+        ).all()
+        assert written == NAMES[:6]
+        assert session.scalar(select(func.count()).select_from(Borrower).where(Borrower.first_name == "Invalid")) == 0
@@ -0,0 +1,60 @@
+from app.core.cache import InMemoryBackend, LRUCache
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+def test_least_recently_used_is_evicted():
+    cache = LRUCache(max_size=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert (cache.get("a"), cache.get("c")) == (1, 3)
+    assert cache.stats()["evictions"] == 1
+    assert len(cache) == 2
+
+def test_entries_expire_after_ttl():
+    clock = Clock()
+    cache = LRUCache(ttl=10, clock=clock)
+    cache.set("a", 1)
+    clock.now = 9.9
+    assert cache.get("a") == 1
+    clock.now = 10
+    assert cache.get("a", "gone") == "gone"
+    assert cache.stats()["expirations"] == 1
+    assert len(cache) == 0
+
+def test_counters():
+    cache = LRUCache(max_size=1)
+    cache.get("a")
+    cache.set("a", 1)
+    cache.get("a")
+    cache.get("a")
+    cache.set("b", 2)
+    assert cache.stats() == {"size": 1, "hits": 2, "misses": 1, "evictions": 1, "expirations": 0}
+
+def test_delete_and_clear():
+    cache = LRUCache()
+    for key in "abc":
+        cache.set(key, key)
+    cache.delete("a", "missing")
+    assert cache.get("a") is None and cache.get("b") == "b"
+    cache.clear()
+    assert len(cache) == 0
+
+def test_backend_copies_and_expires():
+    clock = Clock()
+    backend = InMemoryBackend(clock=clock)
+    row = {"id": 1}
+    backend.set("k", row, ttl=5)
+    row["id"] = 2
+    fetched = backend.get("k")
+    fetched["id"] = 3
+    assert backend.get("k") == {"id": 1}
+    clock.now = 5
+    assert backend.get("k") is None
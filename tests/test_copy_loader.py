@@ -0,0 +1,38 @@
+from datetime import datetime
+from sqlalchemy import select
+from app.models import AuditTrail, CommunicationLog
+from app.repositories import audit_trail_repository, communication_repository
+from app.repositories.copy_loader import default_columns
+
+HISTORICAL = datetime(2021, 3, 14, 9, 26, 53)
+
+def test_default_columns_keep_supplied_server_defaults():
+    assert "created_at" not in default_columns(CommunicationLog)
+    assert "created_at" not in default_columns(CommunicationLog, {"message": "hi"})
+    assert "created_at" in default_columns(CommunicationLog, {"message": "hi", "created_at": HISTORICAL})
+    assert "id" not in default_columns(CommunicationLog, {"id": 1})
+
+def test_copy_create_logs_keeps_historical_created_at(db_session, organization):
+    rows = [{"organization_id": organization.id, "message": f"message {n}", "created_at": HISTORICAL} for n in range(3)]
+    assert communication_repository.copy_create_logs(db_session, rows) == 3
+    created = db_session.scalars(select(CommunicationLog.created_at).where(CommunicationLog.organization_id == organization.id)).all()
+    assert created == [HISTORICAL] * 3
+
+def test_copy_create_logs_defaults_created_at(db_session, organization):
+    communication_repository.copy_create_logs(db_session, [{"organization_id": organization.id, "message": "now"}])
+    created = db_session.scalar(select(CommunicationLog.created_at).where(CommunicationLog.organization_id == organization.id))
+    assert created is not None and created > HISTORICAL
+
+def test_copy_create_audit_entries_keeps_historical_created_at(db_session, organization):
+    rows = [{
+        "organization_id": organization.id, "entity_type": "organizations", "entity_id": organization.id,
+        "action": "update", "created_at": HISTORICAL,
+    }]
+    assert audit_trail_repository.copy_create_audit_entries(db_session, rows) == 1
+    assert db_session.scalar(select(AuditTrail.created_at).where(AuditTrail.organization_id == organization.id)) == HISTORICAL
+
+def test_copy_create_logs_with_explicit_columns(db_session, organization):
+    rows = [{"organization_id": organization.id, "message": "kept", "ai_model": "ignored", "created_at": HISTORICAL}]
+    communication_repository.copy_create_logs(db_session, rows, columns=["organization_id", "message", "created_at"])
+    log = db_session.scalars(select(CommunicationLog).where(CommunicationLog.organization_id == organization.id)).one()
+    assert (log.message, log.ai_model, log.created_at) == ("kept", None, HISTORICAL)
@@ -0,0 +1,173 @@
+from contextlib import contextmanager
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from app.core.cache import InMemoryBackend
+from app.core.tenancy import TENANT_KEY
+from app.models import Organization, User
+from app.repositories import organization_repository, user_repository
+from app.repositories.identity_cache import IdentityCache, identity_cache
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    identity_cache.clear()
+    yield
+    identity_cache.clear()
+
+@pytest.fixture
+def engine(tmp_path):
+    # Real commits on a database of its own, so one session's uncommitted
+    # writes are invisible to the others.
+    engine = create_engine(f"sqlite:///{tmp_path / 'identity.db'}")
+    Organization.__table__.create(engine)
+    User.__table__.create(engine)
+    yield engine
+    engine.dispose()
+
+@pytest.fixture
+def Session(engine):
+    return sessionmaker(engine)
+
+@pytest.fixture
+def org_id(Session):
+    with Session() as session:
+        org = Organization(name="Before")
+        session.add(org)
+        session.commit()
+        return org.id
+
+@pytest.fixture
+def user_id(Session, org_id):
+    with Session() as session:
+        user = User(organization_id=org_id, email="old@example.com", password_hash="secret")
+        session.add(user)
+        session.commit()
+        return user.id
+
+@contextmanager
+def counting(engine):
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+def _name(Session, org_id):
+    with Session() as session:
+        return identity_cache.get_organization_by_id(session, org_id).name
+
+def test_rollback_invalidates_snapshot_cached_in_flight(db_session):
+    org = organization_repository.create_organization(db_session, Organization(name="Before"))
+    org.name = "After"
+    db_session.flush()
+    assert identity_cache.get_organization_by_id(db_session, org.id).name == "After"
+    db_session.rollback()
+    assert identity_cache.get_organization_by_id(db_session, org.id).name == "Before"
+
+def test_commit_invalidates(db_session):
+    org = organization_repository.create_organization(db_session, Organization(name="Before"))
+    assert identity_cache.get_organization_by_id(db_session, org.id).name == "Before"
+    org.name = "After"
+    db_session.commit()
+    assert identity_cache.get_organization_by_id(db_session, org.id).name == "After"
+
+def test_hit_skips_the_database(engine, Session, org_id):
+    assert _name(Session, org_id) == "Before"
+    with counting(engine) as statements:
+        assert _name(Session, org_id) == "Before"
+    assert statements == []
+    assert identity_cache.stats()["hits"] == 1
+
+def test_uncommitted_write_closed_without_commit_is_not_cached(Session, org_id):
+    writer = Session()
+    org = writer.get(Organization, org_id)
+    org.name = "Uncommitted"
+    writer.flush()
+    assert identity_cache.get_organization_by_id(writer, org_id).name == "Uncommitted"
+    writer.close()
+    assert _name(Session, org_id) == "Before"
+
+def test_writer_sees_its_own_writes_while_others_see_committed_rows(Session, org_id):
+    assert _name(Session, org_id) == "Before"
+    with Session() as writer:
+        writer.get(Organization, org_id).name = "After"
+        writer.flush()
+        assert identity_cache.get_organization_by_id(writer, org_id).name == "After"
+        # Another session re-caches the committed row in the meantime.
+        assert _name(Session, org_id) == "Before"
+        assert identity_cache.get_organization_by_id(writer, org_id).name == "After"
+        writer.commit()
+        assert _name(Session, org_id) == "After"
+        # The transaction is over, so the writer caches again.
+        assert identity_cache.get_organization_by_id(writer, org_id).name == "After"
+    assert identity_cache.stats()["hits"] >= 1
+
+def test_autoflushed_write_is_not_cached(Session, org_id):
+    with Session() as writer:
+        writer.get(Organization, org_id).name = "Pending"
+        # The lookup's query autoflushes the change first.
+        assert identity_cache.get_organization_by_id(writer, org_id).name == "Pending"
+    assert _name(Session, org_id) == "Before"
+
+def test_email_change_invalidates_both_emails(Session, user_id):
+    with Session() as session:
+        assert identity_cache.get_user_by_email(session, "old@example.com").id == user_id
+        assert identity_cache.get_user_by_email(session, "new@example.com") is None
+        session.get(User, user_id).email = "new@example.com"
+        session.commit()
+        assert identity_cache.get_user_by_email(session, "old@example.com") is None
+        assert identity_cache.get_user_by_email(session, "new@example.com").id == user_id
+
+def test_set_based_update_clears_the_cache(Session, user_id):
+    with Session() as session:
+        assert identity_cache.get_user_by_id(session, user_id).deleted_at is None
+        user_repository.soft_delete_users_by_ids(session, [user_id])
+        assert len(identity_cache.local) == 0
+        assert identity_cache.get_user_by_id(session, user_id) is None
+
+def test_credentials_are_never_cached(Session, user_id):
+    with Session() as session:
+        snapshot = identity_cache.get_user_by_id(session, user_id)
+    assert not hasattr(snapshot, "password_hash")
+
+def test_other_tenants_snapshots_are_hidden(Session, org_id, user_id):
+    assert _name(Session, org_id) == "Before"
+    with Session(info={TENANT_KEY: org_id + 1}) as session:
+        assert identity_cache.get_organization_by_id(session, org_id) is None
+        assert identity_cache.get_user_by_id(session, user_id) is None
+    with Session(info={TENANT_KEY: org_id}) as session:
+        assert identity_cache.get_organization_by_id(session, org_id).name == "Before"
+
+def test_least_recently_used_is_evicted(Session):
+    cache = IdentityCache(max_size=1, ttl=60)
+    with Session() as session:
+        session.add_all([Organization(name="first"), Organization(name="second")])
+        session.commit()
+        first, second = (org.id for org in session.query(Organization).order_by(Organization.id))
+        cache.get_organization_by_id(session, first)
+        cache.get_organization_by_id(session, second)
+        cache.get_organization_by_id(session, first)
+    assert cache.stats() == {"size": 1, "hits": 0, "misses": 3, "evictions": 2, "expirations": 0}
+
+def test_expired_snapshots_are_reloaded(engine, Session, org_id):
+    cache = IdentityCache(ttl=0)
+    with Session() as session:
+        cache.get_organization_by_id(session, org_id)
+        with counting(engine) as statements:
+            cache.get_organization_by_id(session, org_id)
+    assert len(statements) == 1
+    assert cache.stats()["expirations"] == 1
+
+def test_shared_backend_serves_other_processes(engine, Session, org_id):
+    backend = InMemoryBackend()
+    with Session() as session:
+        IdentityCache(backend=backend).get_organization_by_id(session, org_id)
+        other = IdentityCache(backend=backend)
+        with counting(engine) as statements:
+            assert other.get_organization_by_id(session, org_id).name == "Before"
+    assert statements == []
+    assert len(other.local) == 1
@@ -0,0 +1,104 @@
+import importlib.util
+import random
+from collections import defaultdict
+from datetime import datetime, timedelta
+from pathlib import Path
+import pytest
+from alembic.migration import MigrationContext
+from alembic.operations import Operations
+from sqlalchemy import bindparam, insert, select, text
+from app.models import Application, AuditTrail, Borrower, CommunicationLog, Document, Organization
+from app.repositories import (
+    application_repository,
+    audit_trail_repository,
+    borrower_repository,
+    communication_repository,
+    document_repository,
+)
+
+ORGANIZATIONS = 20
+PER_ORGANIZATION = 100
+
+@pytest.fixture
+def dataset(db_session):
+    # Enough rows across tenants, a tenth of them soft-deleted, that the
+    # planner has a real choice between the live indexes and a scan.
+    rng = random.Random(0)
+    epoch = datetime(2025, 1, 1)
+    db_session.execute(insert(Organization), [{"name": f"Org {i}"} for i in range(ORGANIZATIONS)])
+    org_ids = db_session.scalars(select(Organization.id).order_by(Organization.id)).all()
+
+    def rows(**columns):
+        for org_id in org_ids:
+            for i in range(PER_ORGANIZATION):
+                yield {
+                    "organization_id": org_id,
+                    "created_at": epoch + timedelta(minutes=rng.randrange(500_000)),
+                    "deleted_at": epoch if i % 10 == 0 else None,
+                    **{name: value(org_id, i) for name, value in columns.items()},
+                }
+
+    db_session.execute(insert(Borrower), list(rows(first_name=lambda org_id, i: f"b{i}")))
+    borrowers = _ids_by_org(db_session, Borrower)
+    db_session.execute(insert(Application), list(rows(borrower_id=lambda org_id, i: borrowers[org_id][i])))
+    applications = _ids_by_org(db_session, Application)
+    db_session.execute(insert(Document), list(rows(application_id=lambda org_id, i: applications[org_id][i])))
+    db_session.execute(insert(CommunicationLog), list(rows(application_id=lambda org_id, i: applications[org_id][i])))
+    db_session.execute(insert(AuditTrail), list(rows(entity_type=lambda org_id, i: "applications", entity_id=lambda org_id, i: i)))
+    db_session.execute(text("ANALYZE"))
+    return org_ids[len(org_ids) // 2]
+
+def _ids_by_org(db_session, model):
+    ids = defaultdict(list)
+    for org_id, row_id in db_session.execute(select(model.organization_id, model.id).order_by(model.id)):
+        ids[org_id].append(row_id)
+    return ids
+
+def _plan(db_session, statement, parameters):
+    if db_session.bind.dialect.name == "postgresql":
+        return "\n".join(db_session.connection().exec_driver_sql(f"EXPLAIN {statement}", parameters).scalars())
+    return "\n".join(row[-1] for row in db_session.connection().exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters))
+
+# The org-scoped live list queries and the index from the
+# live_row_composite_indexes migration each should use.
+CASES = {
+    "applications": (application_repository.list_applications, "ix_applications_org_created_live"),
+    "borrowers": (borrower_repository.list_borrowers, "ix_borrowers_org_created_live"),
+    "documents": (document_repository.list_documents, "ix_documents_org_created_live"),
+    "logs": (communication_repository.list_logs, "ix_communication_logs_org_created_live"),
+    "audit entries": (audit_trail_repository.list_audit_entries, "ix_audit_trails_org_created_live"),
+}
+
+@pytest.mark.parametrize("case", CASES)
+def test_live_list_queries_use_partial_index(db_session, dataset, capture_statements, case):
+    list_page, index = CASES[case]
+    with capture_statements() as statements:
+        first = list_page(db_session, dataset, page_size=2)
+        # Later pages add the keyset predicate; they must use the index too.
+        list_page(db_session, dataset, page_size=2, cursor=first.next_cursor)
+    assert first.next_cursor
+    assert len(statements) == 2
+    for statement, parameters in statements:
+        assert index in _plan(db_session, statement, parameters)
+
+VERSIONS = Path(__file__).parents[1] / "alembic" / "versions"
+
+@pytest.mark.parametrize("revision", ["4f1c2a7d9e30", "a83e5b0c6f12"])
+def test_migrations_build_partial_indexes_on_sqlite(db_session, revision):
+    if db_session.bind.dialect.name != "sqlite":
+        pytest.skip("compares against the SQLite schema create_all built")
+    spec = importlib.util.spec_from_file_location(revision, next(VERSIONS.glob(f"{revision}_*.py")))
+    migration = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(migration)
+    names = [name for name, _, _ in migration.LIVE_INDEXES]
+    indexes = text(
+        "SELECT name, sql FROM sqlite_master WHERE type = 'index' AND name IN :names ORDER BY name"
+    ).bindparams(bindparam("names", names, expanding=True))
+    installed = db_session.execute(indexes).all()
+    assert len(installed) == len(names)
+    with Operations.context(MigrationContext.configure(db_session.connection())):
+        migration.downgrade()
+        assert db_session.execute(indexes).all() == []
+        migration.upgrade()
+    # The same partial (WHERE deleted_at IS NULL) indexes the models declare.
+    assert db_session.execute(indexes).all() == installed
@@ -0,0 +1,54 @@
+import asyncio
+from app.core.test_db import async_rollback_session, async_savepoint_engine
+from app.models import Organization, User
+from app.repositories.loader import AsyncRequestLoader, RequestLoader
+
+def test_loads_are_batched(db_session):
+    orgs = [Organization(name=f"Org {i}") for i in range(3)]
+    db_session.add_all(orgs)
+    db_session.flush()
+    ids = [org.id for org in orgs]
+    missing = max(ids) + 1
+    loader = RequestLoader(db_session)
+    loader.want(Organization, ids[0], ids[1])
+    loaded = loader.get_many(Organization, [ids[2], missing])
+    assert loaded[missing] is None
+    assert [loader.get(Organization, i).name for i in ids] == ["Org 0", "Org 1", "Org 2"]
+    assert loader.queries == 1
+
+def test_async_dispatches_never_overlap(db_engine):
+    async def run():
+        engine = async_savepoint_engine(db_engine)
+        try:
+            async with async_rollback_session(engine) as session:
+                org = Organization(name="Org")
+                session.add(org)
+                await session.flush()
+                loader = AsyncRequestLoader(session)
+                execute = session.execute
+                in_flight = []
+                overlap = []
+                late = []
+
+                async def tracked(*args, **kw):
+                    in_flight.append(args)
+                    if not late:
+                        # Arrives while the first batch's query is awaited.
+                        late.append(loader.load(User, -1))
+                    await asyncio.sleep(0.01)
+                    try:
+                        return await execute(*args, **kw)
+                    finally:
+                        in_flight.pop()
+                        overlap.append(len(in_flight))
+
+                session.execute = tracked
+                orgs = await loader.load_many(Organization, [org.id, org.id + 1])
+                assert await late[0] is None
+                assert orgs[org.id].name == "Org" and orgs[org.id + 1] is None
+                assert loader.queries == 2
+                assert max(overlap) == 0
+        finally:
+            await engine.dispose()
+
+    asyncio.run(run())
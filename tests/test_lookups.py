@@ -0,0 +1,86 @@
+import asyncio
+from datetime import datetime, timedelta
+from sqlalchemy.orm import sessionmaker
+from app.core.tenancy import tenant_session
+from app.core.test_db import async_rollback_session, async_savepoint_engine
+from app.models import Borrower, CommunicationLog, Organization
+from app.repositories import borrower_repository, communication_repository, organization_repository
+from app.repositories.lookups import loaded_live
+
+def test_loaded_object_needs_no_sql(db_session, borrower, capture_statements):
+    borrower_id = borrower.id
+    db_session.expunge(borrower)
+    with capture_statements() as statements:
+        loaded = borrower_repository.get_borrower_by_id(db_session, borrower_id)
+        assert borrower_repository.get_borrower_by_id(db_session, borrower_id) is loaded
+        assert loaded_live(db_session, Borrower, borrower_id) is loaded
+    assert len(statements) == 1
+
+def test_unloaded_deleted_at_is_queried(db_session, organization, capture_statements):
+    # Flushed without a deleted_at value, so it isn't known to be live.
+    borrower = Borrower(organization_id=organization.id, first_name="Grace")
+    db_session.add(borrower)
+    db_session.flush()
+    assert loaded_live(db_session, Borrower, borrower.id) is None
+    with capture_statements() as statements:
+        assert borrower_repository.get_borrower_by_id(db_session, borrower.id) is borrower
+    assert len(statements) == 1
+
+def test_expired_object_is_queried(db_session, borrower, capture_statements):
+    borrower_id = borrower.id
+    db_session.expire(borrower)
+    assert loaded_live(db_session, Borrower, borrower_id) is None
+    with capture_statements() as statements:
+        assert borrower_repository.get_borrower_by_id(db_session, borrower_id) is borrower
+    assert len(statements) == 1
+
+def test_soft_deleted_object_is_skipped(db_session, borrower, capture_statements):
+    borrower.deleted_at = datetime(2030, 1, 1)
+    db_session.flush()
+    assert loaded_live(db_session, Borrower, borrower.id) is None
+    with capture_statements() as statements:
+        assert borrower_repository.get_borrower_by_id(db_session, borrower.id) is None
+    assert len(statements) == 1
+
+def test_deleted_object_is_skipped(db_session, borrower):
+    db_session.delete(borrower)
+    assert loaded_live(db_session, Borrower, borrower.id) is None
+
+def test_other_tenants_objects_are_skipped(db_session, organization, borrower, capture_statements):
+    other = Organization(name="Other")
+    db_session.add(other)
+    db_session.flush()
+    factory = sessionmaker(bind=db_session.connection(), join_transaction_mode="create_savepoint")
+    with tenant_session(other.id, factory=factory) as session:
+        # Loaded (deleted_at included) through an unscoped path; the tenant's
+        # reads still miss it.
+        db_session.refresh(borrower)
+        theirs = session.merge(borrower, load=False)
+        assert (theirs.organization_id, theirs.deleted_at) == (organization.id, None)
+        assert loaded_live(session, Borrower, borrower.id) is None
+        assert borrower_repository.get_borrower_by_id(session, borrower.id) is None
+        assert loaded_live(session, Organization, organization.id) is None
+        assert organization_repository.get_organization_by_id(session, other.id).id == other.id
+
+def test_expected_columns_must_match(db_session, organization):
+    log = CommunicationLog(organization_id=organization.id, message="hello", created_at=datetime(2031, 1, 1))
+    db_session.add(log)
+    db_session.flush()
+    assert communication_repository.get_log_by_id(db_session, log.id, created_at=log.created_at) is log
+    assert loaded_live(db_session, CommunicationLog, log.id, created_at=log.created_at + timedelta(days=1)) is None
+    assert communication_repository.get_log_by_id(db_session, log.id, created_at=log.created_at + timedelta(days=1)) is None
+
+def test_async_session(db_engine):
+    async def main():
+        engine = async_savepoint_engine(db_engine)
+        try:
+            async with async_rollback_session(engine, expire_on_commit=False) as session:
+                org = await organization_repository.async_create_organization(session, Organization(name="Async"))
+                assert loaded_live(session, Organization, org.id) is org
+                assert await organization_repository.async_get_organization_by_id(session, org.id) is org
+                org.deleted_at = datetime(2030, 1, 1)
+                await session.flush()
+                assert await organization_repository.async_get_organization_by_id(session, org.id) is None
+        finally:
+            await engine.dispose()
+    asyncio.run(main())
@@ -0,0 +1,70 @@
+import base64
+import json
+from datetime import datetime
+import pytest
+from app.models import Borrower
+from app.repositories import borrower_repository
+from app.repositories.pagination import decode_cursor, encode_cursor, iter_pages
+
+# Three rows share one timestamp and two another, so pages have to split
+# inside a tie.
+CREATED = [datetime(2031, 1, 1, 9)] * 3 + [datetime(2031, 1, 2, 9)] * 2 + [datetime(2031, 1, 3, 9), datetime(2030, 12, 31, 9)]
+
+@pytest.fixture
+def borrowers(db_session, organization):
+    rows = [
+        Borrower(organization_id=organization.id, first_name=f"Borrower {n}", created_at=created_at)
+        for n, created_at in enumerate(CREATED)
+    ]
+    db_session.add_all(rows)
+    db_session.flush()
+    return sorted(rows, key=lambda row: (row.created_at, row.id), reverse=True)
+
+def _encoded(value):
+    return base64.urlsafe_b64encode(json.dumps(value).encode()).decode().rstrip("=")
+
+def test_cursor_round_trip():
+    assert decode_cursor(encode_cursor(datetime(2031, 1, 1, 9, 30, 0, 1234), 42)) == (datetime(2031, 1, 1, 9, 30, 0, 1234), 42)
+    assert decode_cursor(encode_cursor(None, 7)) == (None, 7)
+
+@pytest.mark.parametrize("page_size", [1, 2, 3, 4])
+def test_traversal_through_ties(db_session, organization, borrowers, page_size):
+    pages = list(iter_pages(borrower_repository.list_borrowers, db_session, organization.id, page_size=page_size))
+    ids = [row.id for page in pages for row in page]
+    assert ids == [row.id for row in borrowers]
+    assert len(set(ids)) == len(ids)
+    assert all(len(page) == page_size for page in pages[:-1])
+
+@pytest.mark.parametrize("page_size, pages", [(7, 1), (50, 1), (6, 2)])
+def test_last_page_has_no_cursor(db_session, organization, borrowers, page_size, pages):
+    cursor, seen = None, 0
+    for _ in range(pages):
+        page = borrower_repository.list_borrowers(db_session, organization.id, cursor=cursor, page_size=page_size)
+        seen += len(page.items)
+        cursor = page.next_cursor
+    # An exact multiple of the page size ends on a full page rather than on
+    # an empty extra one.
+    assert (cursor, seen) == (None, len(borrowers))
+
+def test_cursor_past_the_end(db_session, organization, borrowers):
+    last = borrowers[-1]
+    page = borrower_repository.list_borrowers(db_session, organization.id, cursor=encode_cursor(last.created_at, last.id))
+    assert page == ([], None)
+
+@pytest.mark.parametrize("cursor", [
+    "",
+    "not a cursor!",
+    base64.urlsafe_b64encode(b"\xff\xfe\x00").decode(),
+    _encoded({"created_at": "2031-01-01", "id": 1}),
+    _encoded(["2031-01-01T09:00:00", "one"]),
+    _encoded(["yesterday", 1]),
+    _encoded(["2031-01-01T09:00:00"]),
+    _encoded(["2031-01-01T09:00:00", 1, 2]),
+    _encoded([20310101, 1]),
+    _encoded(5),
+])
+def test_invalid_cursor(db_session, organization, cursor):
+    with pytest.raises(ValueError, match="invalid page cursor"):
+        decode_cursor(cursor)
+    with pytest.raises(ValueError, match="invalid page cursor"):
+        borrower_repository.list_borrowers(db_session, organization.id, cursor=cursor)
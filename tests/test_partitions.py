@@ -0,0 +1,87 @@
+import importlib.util
+from datetime import date, datetime
+from pathlib import Path
+import pytest
+from alembic.autogenerate import compare_metadata
+from alembic.migration import MigrationContext
+from alembic.operations import Operations
+from sqlalchemy import text
+from app.core import partitions
+from app.core.database import Base
+from app.models import AuditTrail, CommunicationLog
+
+MIGRATION = Path(__file__).resolve().parents[1] / "alembic" / "versions" / "c5d7e1f08a24_partition_logs_and_audit_trails.py"
+
+@pytest.fixture
+def conn(db_session):
+    # The test schema is built from the models, which aren't partitioned;
+    # convert it with the migration, inside the test's transaction.
+    if db_session.bind.dialect.name != "postgresql":
+        pytest.skip("partitioning is PostgreSQL-only")
+    connection = db_session.connection()
+    spec = importlib.util.spec_from_file_location("partition_logs_and_audit_trails", MIGRATION)
+    migration = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(migration)
+    with Operations.context(MigrationContext.configure(connection)):
+        migration.upgrade()
+    return connection
+
+def _partition_of(conn, table, row_id):
+    return conn.execute(text(f"SELECT tableoid::regclass::text FROM {table} WHERE id = :id"), {"id": row_id}).scalar()
+
+def test_ensure_partitions_creates_upcoming_months(conn):
+    today = date(2031, 1, 15)
+    created = partitions.ensure_partitions(conn, "communication_logs", months_ahead=1, today=today)
+    assert created == ["communication_logs_y2031m01", "communication_logs_y2031m02"]
+    assert list(partitions.list_partitions(conn, "communication_logs"))[-2:] == [date(2031, 1, 1), date(2031, 2, 1)]
+    assert partitions.ensure_partitions(conn, "communication_logs", months_ahead=1, today=today) == []
+
+def test_inserts_are_routed_by_created_at(db_session, conn, organization):
+    partitions.ensure_partitions(conn, "communication_logs", months_ahead=1, today=date(2031, 1, 15))
+    logs = [
+        CommunicationLog(organization_id=organization.id, message="january", created_at=datetime(2031, 1, 31, 23, 59)),
+        CommunicationLog(organization_id=organization.id, message="february", created_at=datetime(2031, 2, 1)),
+        CommunicationLog(organization_id=organization.id, message="far future", created_at=datetime(2040, 6, 1)),
+        CommunicationLog(organization_id=organization.id, message="now"),
+    ]
+    db_session.add_all(logs)
+    db_session.flush()
+    this_month = partitions.partition_name("communication_logs", partitions.month_start(datetime.utcnow().date()))
+    assert [_partition_of(conn, "communication_logs", log.id) for log in logs] == [
+        "communication_logs_y2031m01",
+        "communication_logs_y2031m02",
+        "communication_logs_default",
+        this_month,
+    ]
+
+def test_audit_trails_are_partitioned(db_session, conn, organization):
+    partitions.ensure_partitions(conn, "audit_trails", months_ahead=0, today=date(2031, 3, 1))
+    entry = AuditTrail(organization_id=organization.id, entity_type="organizations", entity_id=organization.id,
+                       action="update", created_at=datetime(2031, 3, 9))
+    db_session.add(entry)
+    db_session.flush()
+    assert _partition_of(conn, "audit_trails", entry.id) == "audit_trails_y2031m03"
+
+def test_detach_moves_expired_months_to_archive(db_session, conn, organization):
+    partitions.ensure_partitions(conn, "communication_logs", months_ahead=0, today=date(2031, 1, 1))
+    log = CommunicationLog(organization_id=organization.id, message="old", created_at=datetime(2031, 1, 10))
+    db_session.add(log)
+    db_session.flush()
+    detached = partitions.detach_old_partitions(conn, "communication_logs", retain_months=1, today=date(2031, 3, 1))
+    assert "communication_logs_y2031m01" in detached
+    assert _partition_of(conn, "communication_logs", log.id) is None
+    archived = conn.execute(text("SELECT message FROM archive.communication_logs_y2031m01")).scalars().all()
+    assert archived == ["old"]
+
+def test_autogenerate_leaves_partitions_alone(conn):
+    partitions.ensure_partitions(conn, "communication_logs", months_ahead=1, today=date(2031, 1, 1))
+    context = MigrationContext.configure(conn, opts={"include_object": partitions.include_object})
+    tables = {diff[1].name for diff in compare_metadata(context, Base.metadata) if diff[0] in ("add_table", "remove_table")}
+    assert tables == set()
+
+def test_is_partition():
+    assert partitions.is_partition("communication_logs_y2031m01")
+    assert partitions.is_partition("audit_trails_default")
+    assert not partitions.is_partition("communication_logs")
+    assert not partitions.is_partition("borrowers_y2031m01")
+    assert not partitions.is_partition("borrowers_default")
@@ -0,0 +1,111 @@
+import importlib.util
+from datetime import datetime
+from decimal import Decimal
+from pathlib import Path
+import pytest
+from alembic.migration import MigrationContext
+from alembic.operations import Operations
+from sqlalchemy import delete, text, update
+from app.core import pipeline_summary, pipeline_summary_ddl
+from app.models import Application, Organization
+from app.models.enums import ApplicationStatus
+from app.repositories import application_repository, borrower_repository, pipeline_repository
+from app.repositories.pipeline_repository import StatusTotals
+
+SUBMITTED, APPROVED, DENIED = ApplicationStatus.SUBMITTED, ApplicationStatus.APPROVED, ApplicationStatus.DENIED
+
+SUMMARY_MIGRATION = next((Path(__file__).parents[1] / "alembic" / "versions").glob("f3b9d2a6c471_*.py"))
+
+@pytest.fixture
+def applications(db_session, organization, borrower):
+    rows = [
+        {"organization_id": organization.id, "borrower_id": borrower.id, "application_status": status, "loan_amount": Decimal(amount)}
+        for status, amount in [(SUBMITTED, "100000.00"), (SUBMITTED, "50000.50"), (APPROVED, "75000.00"), (None, "1000.00")]
+    ]
+    ids = application_repository.bulk_create_applications(db_session, rows)
+    return [db_session.get(Application, i) for i in ids]
+
+def _assert_consistent(db_session):
+    db_session.flush()
+    assert pipeline_summary.check(db_session.connection()) == []
+
+def test_inserts(db_session, organization, applications):
+    _assert_consistent(db_session)
+    application_repository.create_application(db_session, Application(
+        organization_id=organization.id, borrower_id=applications[0].borrower_id,
+        application_status=DENIED, loan_amount=Decimal("20000.00"),
+    ))
+    _assert_consistent(db_session)
+    assert pipeline_repository.get_pipeline_summary(db_session, organization.id) == {
+        None: StatusTotals(1, Decimal("1000.00")),
+        SUBMITTED: StatusTotals(2, Decimal("150000.50")),
+        APPROVED: StatusTotals(1, Decimal("75000.00")),
+        DENIED: StatusTotals(1, Decimal("20000.00")),
+    }
+
+def test_status_and_amount_changes(db_session, organization, applications):
+    applications[0].application_status = APPROVED
+    applications[1].loan_amount = Decimal("60000.00")
+    applications[3].application_status = SUBMITTED
+    db_session.commit()
+    _assert_consistent(db_session)
+    db_session.execute(update(Application).where(Application.organization_id == organization.id).values(application_status=DENIED))
+    _assert_consistent(db_session)
+    assert pipeline_repository.get_pipeline_summary(db_session, organization.id) == {
+        DENIED: StatusTotals(4, Decimal("236000.00")),
+    }
+
+def test_soft_and_hard_deletes(db_session, organization, borrower, applications):
+    application_repository.soft_delete_application(db_session, applications[0])
+    _assert_consistent(db_session)
+    application_repository.soft_delete_applications_by_ids(db_session, [applications[1].id])
+    _assert_consistent(db_session)
+    # Restoring a soft-deleted application counts it again.
+    db_session.execute(update(Application).where(Application.id == applications[1].id).values(deleted_at=None))
+    _assert_consistent(db_session)
+    db_session.execute(delete(Application).where(Application.id == applications[2].id))
+    _assert_consistent(db_session)
+    borrower_repository.soft_delete_borrower_cascade(db_session, [borrower.id])
+    _assert_consistent(db_session)
+    assert pipeline_repository.get_pipeline_summary(db_session, organization.id) == {}
+
+def test_organizations_are_kept_apart(db_session, organization, applications):
+    other = Organization(name="Other")
+    db_session.add(other)
+    db_session.flush()
+    applications[2].organization_id = other.id
+    db_session.commit()
+    _assert_consistent(db_session)
+    assert pipeline_repository.get_pipeline_summary(db_session, other.id) == {APPROVED: StatusTotals(1, Decimal("75000.00"))}
+    assert APPROVED not in pipeline_repository.get_pipeline_summary(db_session, organization.id)
+
+def test_check_reports_drift(db_session, organization, applications):
+    db_session.execute(update(Application.__table__).where(Application.id == applications[0].id).values(deleted_at=datetime(2030, 1, 1)))
+    summary = pipeline_summary.ApplicationStatusCount.__table__
+    db_session.execute(update(summary).where(summary.c.status == "approved").values(count=summary.c.count + 5))
+    drift = pipeline_summary.check(db_session.connection(), organization.id)
+    assert [(status, kept[0], fresh[0]) for _, status, kept, fresh in drift] == [("approved", 6, 1)]
+
+def test_unknown_ddl_version():
+    with pytest.raises(ValueError):
+        pipeline_summary_ddl.trigger_ddl("postgresql", version=99)
+
+def test_migration_installs_the_same_triggers(db_session, organization, borrower, applications):
+    if db_session.bind.dialect.name != "sqlite":
+        pytest.skip("the migration's version 1 function predates the enum column")
+    triggers = text("SELECT name, sql FROM sqlite_master WHERE type = 'trigger' AND tbl_name = 'applications' ORDER BY name")
+    installed = db_session.execute(triggers).all()
+    spec = importlib.util.spec_from_file_location("application_status_counts", SUMMARY_MIGRATION)
+    migration = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(migration)
+    with Operations.context(MigrationContext.configure(db_session.connection())):
+        migration.downgrade()
+        assert db_session.execute(triggers).all() == []
+        migration.upgrade()
+    assert db_session.execute(triggers).all() == installed
+    # Repopulated from the live rows, and kept current from then on.
+    _assert_consistent(db_session)
+    application_repository.bulk_create_applications(
+        db_session, [{"organization_id": organization.id, "borrower_id": borrower.id, "application_status": DENIED}]
+    )
+    _assert_consistent(db_session)
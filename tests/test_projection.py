@@ -0,0 +1,56 @@
+import re
+from datetime import datetime
+import pytest
+from app.models import Borrower
+from app.repositories import borrower_repository
+from app.repositories.pagination import iter_pages
+from app.repositories.projection import projection
+
+FIELDS = ["first_name", "email"]
+
+@pytest.fixture
+def borrowers(db_session, organization, borrower):
+    rows = [
+        Borrower(organization_id=organization.id, first_name=f"Borrower {n}", last_name="Private", phone="555 0100")
+        for n in range(5)
+    ]
+    gone = Borrower(organization_id=organization.id, first_name="Gone", deleted_at=datetime(2030, 1, 1))
+    db_session.add_all(rows + [gone])
+    db_session.commit()
+    return [borrower] + rows, gone
+
+def _selected_columns(statement):
+    columns = re.match(r"SELECT (.*?)\s+FROM ", statement, re.DOTALL).group(1)
+    return [column.strip().rsplit(".", 1)[-1] for column in columns.split(",")]
+
+def test_rows_hold_only_the_requested_columns(db_session, organization, borrowers, capture_statements):
+    org_id = organization.id
+    db_session.expunge_all()
+    with capture_statements() as statements:
+        page = borrower_repository.list_borrower_rows(db_session, org_id, FIELDS, page_size=2)
+        rows = borrower_repository.get_borrower_rows_by_ids(db_session, [row.id for row in page.items], FIELDS)
+    # id and created_at ride along for the cursor.
+    assert [_selected_columns(statement) for statement, _ in statements] == [["id", "first_name", "email", "created_at"]] * 2
+    assert all(row._fields == ("id", "first_name", "email", "created_at") for row in page.items)
+    assert all(not hasattr(row, "last_name") for row in rows.values())
+    assert not any(isinstance(obj, Borrower) for obj in db_session.identity_map.values())
+
+def test_rows_match_the_entities(db_session, organization, borrowers):
+    live, gone = borrowers
+    rows = borrower_repository.get_borrower_rows_by_ids(db_session, [row.id for row in live] + [gone.id], FIELDS)
+    assert {id: (row.first_name, row.email) for id, row in rows.items()} == {row.id: (row.first_name, row.email) for row in live}
+
+def test_pages_match_the_entity_list(db_session, organization, borrowers):
+    projected = iter_pages(borrower_repository.list_borrower_rows, db_session, organization.id, FIELDS, page_size=2)
+    listed = iter_pages(borrower_repository.list_borrowers, db_session, organization.id, page_size=2)
+    assert [[row.id for row in page] for page in projected] == [[row.id for row in page] for page in listed]
+
+def test_repeated_and_key_fields_are_not_duplicated():
+    assert projection(Borrower, ["email", "id", "email", "created_at"]).fields == ("id", "email", "created_at")
+
+def test_shapes_are_reused():
+    assert projection(Borrower, ["first_name"]) is projection(Borrower, ("first_name",))
+
+def test_unknown_column(db_session, organization):
+    with pytest.raises(ValueError, match="'documents'"):
+        borrower_repository.list_borrower_rows(db_session, organization.id, ["first_name", "documents"])
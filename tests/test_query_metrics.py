@@ -0,0 +1,105 @@
+import logging
+import pytest
+from sqlalchemy import create_engine, event, text
+from app.core.pool_metrics import pool_metrics
+from app.core.query_metrics import QueryMetrics, instrument
+from app.models import Application
+from app.repositories.application_repository import ApplicationBundle
+from app.repositories.pagination import Page
+
+def _recorded_rows(result):
+    metrics = QueryMetrics()
+
+    def get_result():
+        return result
+    instrument(get_result, metrics)()
+    return metrics.snapshot()["functions"]["test_query_metrics.get_result"]["rows"]
+
+def test_page_counts_its_items():
+    assert _recorded_rows(Page(list(range(20)), "cursor")) == 20
+    assert _recorded_rows(Page([], None)) == 0
+
+def test_bundle_counts_entity_and_children():
+    assert _recorded_rows(ApplicationBundle(Application(), [object()] * 5, "cursor")) == 6
+
+def test_plain_results():
+    assert _recorded_rows([1, 2, 3]) == 3
+    assert _recorded_rows((1, 2)) == 2
+    assert _recorded_rows(None) == 0
+    assert _recorded_rows(7) == 7
+    assert _recorded_rows({1: 2, 3: 4}) == 6
+    assert _recorded_rows({1: "a", 2: None}) == 2
+    assert _recorded_rows(Application()) == 1
+
+@pytest.fixture
+def metered():
+    engine = create_engine("sqlite://")
+    metrics = QueryMetrics()
+    metrics.attach(engine)
+    with engine.begin() as conn:
+        conn.exec_driver_sql("CREATE TABLE items (id INTEGER PRIMARY KEY, name TEXT)")
+        conn.exec_driver_sql("INSERT INTO items (name) VALUES ('a'), ('b'), ('c')")
+    metrics.reset()
+    yield engine, metrics
+    engine.dispose()
+
+def _statement_rows(metrics, prefix):
+    return {key: stats["rows"] for key, stats in metrics.snapshot()["statements"].items() if key.startswith(prefix)}
+
+def test_statement_rows_count_writes_only(metered):
+    engine, metrics = metered
+    with engine.begin() as conn:
+        assert len(conn.execute(text("SELECT id FROM items")).all()) == 3
+        conn.execute(text("UPDATE items SET name = 'x' WHERE id < 3"))
+        conn.execute(text("DELETE FROM items WHERE id = 3"))
+        conn.execute(text("INSERT INTO items (name) VALUES ('d') RETURNING id")).all()
+    assert _statement_rows(metrics, "SELECT") == {"SELECT id FROM items": 0}
+    assert _statement_rows(metrics, "UPDATE") == {"UPDATE items SET name = ? WHERE id < ?": 2}
+    assert _statement_rows(metrics, "DELETE") == {"DELETE FROM items WHERE id = ?": 1}
+    # rowcount isn't final before a RETURNING result is fetched.
+    assert _statement_rows(metrics, "INSERT") == {"INSERT INTO items (name) VALUES (...) RETURNING id": 0}
+
+@pytest.mark.parametrize("statement, prefix", [
+    ("SELECT * FROM items", "EXPLAIN (ANALYZE, BUFFERS) "),
+    ("  select\n* FROM items", "EXPLAIN (ANALYZE, BUFFERS) "),
+    ("WITH recent AS (SELECT id FROM items) SELECT * FROM recent", "EXPLAIN "),
+    ("WITH gone AS (DELETE FROM items RETURNING id) SELECT count(*) FROM gone", "EXPLAIN "),
+    ("UPDATE items SET name = 'x'", "EXPLAIN "),
+    ("selection_refresh()", "EXPLAIN "),
+])
+def test_analyze_is_only_used_for_plain_selects(statement, prefix):
+    assert QueryMetrics(explain="analyze")._postgresql_explain(statement) == prefix
+    assert QueryMetrics(explain="plan")._postgresql_explain(statement) == "EXPLAIN "
+
+def test_explained_writes_run_once(db_engine, caplog):
+    if db_engine.dialect.name != "postgresql":
+        pytest.skip("SQLite has no data-modifying WITH")
+    # Every statement is "slow", so each gets explained (analyzed, on
+    # PostgreSQL) on the caller's connection.
+    metrics = QueryMetrics(slow_query_ms=0, explain="analyze")
+    metrics.attach(db_engine)
+    try:
+        with caplog.at_level(logging.WARNING, "app.sql.slow"), db_engine.connect() as conn:
+            transaction = conn.begin()
+            conn.execute(text(
+                "WITH added AS (INSERT INTO organizations (name) VALUES ('explained') RETURNING id) "
+                "SELECT id FROM added"
+            )).all()
+            count = conn.execute(text("SELECT count(*) FROM organizations WHERE name = 'explained'")).scalar()
+            transaction.rollback()
+    finally:
+        event.remove(db_engine, "before_cursor_execute", metrics._before_cursor_execute)
+        event.remove(db_engine, "after_cursor_execute", metrics._after_cursor_execute)
+        event.remove(db_engine, "handle_error", metrics._handle_error)
+    assert count == 1
+    assert "EXPLAIN failed" not in caplog.text
+
+def test_pool_counters_are_prometheus_counters():
+    output = QueryMetrics().to_prometheus()
+    types = dict(line.split()[2:4] for line in output.splitlines() if line.startswith("# TYPE app_db_pool_"))
+    assert types["app_db_pool_checkouts_total"] == "counter"
+    assert types["app_db_pool_wait_seconds_total"] == "counter"
+    assert types["app_db_pool_timeouts_total"] == "counter"
+    assert types["app_db_pool_checked_out"] == "gauge"
+    assert types["app_db_pool_wait_seconds_max"] == "gauge"
+    assert f"app_db_pool_checkouts_total {pool_metrics.snapshot()['checkouts']}" in output
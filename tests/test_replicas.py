@@ -0,0 +1,157 @@
+import asyncio
+import threading
+import time
+import pytest
+from sqlalchemy import create_engine, select, text, update
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from app.core.replicas import ReplicaSet, RoutingSession
+from app.models import Organization
+
+def _database(tmp_path, name):
+    # Each database holds one organization named after it, so a query's
+    # answer says where it ran.
+    engine = create_engine(f"sqlite:///{tmp_path / name}.db")
+    Organization.__table__.create(engine)
+    with engine.begin() as conn:
+        conn.execute(Organization.__table__.insert().values(name=name))
+    return engine
+
+@pytest.fixture
+def primary(tmp_path):
+    engine = _database(tmp_path, "primary")
+    yield engine
+    engine.dispose()
+
+@pytest.fixture
+def replica(tmp_path):
+    engine = _database(tmp_path, "replica")
+    yield engine
+    engine.dispose()
+
+class Lag:
+    def __init__(self, seconds=0.0):
+        self.seconds = seconds
+        self.threads = []
+
+    def __call__(self, connection):
+        self.threads.append(threading.current_thread())
+        if isinstance(self.seconds, Exception):
+            raise self.seconds
+        return self.seconds
+
+def _session(primary, replicas):
+    return RoutingSession(bind=primary, replicas=replicas)
+
+NAME = select(Organization.name)
+
+def test_reads_go_to_a_replica(primary, replica):
+    with _session(primary, ReplicaSet([replica], probe=Lag())) as session:
+        assert session.scalar(NAME) == "replica"
+
+def test_writes_and_flushes_go_to_the_primary(primary, replica):
+    with _session(primary, ReplicaSet([replica], probe=Lag(), max_lag=60)) as session:
+        session.add(Organization(name="added"))
+        session.flush()
+        # The rest of a transaction that wrote stays on the primary.
+        assert session.scalars(NAME.order_by(Organization.id)).all() == ["primary", "added"]
+        session.execute(update(Organization).where(Organization.name == "added").values(name="renamed"))
+        session.commit()
+        # Reads stay on the primary for max_lag seconds after a write.
+        assert session.scalar(select(Organization.name).where(Organization.name == "renamed")) == "renamed"
+    with primary.connect() as conn:
+        assert conn.scalar(text("SELECT count(*) FROM organizations")) == 2
+    with replica.connect() as conn:
+        assert conn.scalar(text("SELECT count(*) FROM organizations")) == 1
+
+def test_reads_return_to_the_replica_after_the_write_window(primary, replica):
+    with _session(primary, ReplicaSet([replica], probe=Lag(), max_lag=0)) as session:
+        session.add(Organization(name="added"))
+        session.commit()
+        assert session.scalar(NAME) == "replica"
+
+def test_locking_textual_and_forced_reads_go_to_the_primary(primary, replica):
+    with _session(primary, ReplicaSet([replica], probe=Lag())) as session:
+        assert session.get_bind(clause=NAME.with_for_update()) is primary
+        assert session.scalar(text("SELECT name FROM organizations")) == "primary"
+        assert session.scalar(NAME, bind_arguments={"primary": True}) == "primary"
+
+def test_lagging_replica_falls_back_to_the_primary(primary, replica):
+    lag = Lag(10.0)
+    replicas = ReplicaSet([replica], probe=lag, max_lag=5, check_interval=0)
+    with _session(primary, replicas) as session:
+        assert session.scalar(NAME) == "primary"
+    assert replicas.status()[0]["healthy"] is False
+    lag.seconds = 1.0
+    with _session(primary, replicas) as session:
+        assert session.scalar(NAME) == "replica"
+
+def test_failing_probe_falls_back_to_the_primary(primary, replica):
+    with _session(primary, ReplicaSet([replica], probe=Lag(OSError("down")))) as session:
+        assert session.scalar(NAME) == "primary"
+
+def test_round_robin_skips_lagging_replicas(tmp_path, primary, replica):
+    second = _database(tmp_path, "second")
+    lags = {replica: 0.0, second: 0.0}
+    replicas = ReplicaSet([replica, second], probe=lambda conn: lags[conn.engine], check_interval=0)
+    assert [replicas.choose() for _ in range(4)] == [replica, second, replica, second]
+    lags[second] = 30.0
+    assert [replicas.choose() for _ in range(3)] == [replica, replica, replica]
+    second.dispose()
+
+def test_lag_is_cached_between_checks(primary, replica):
+    now = [0.0]
+    lag = Lag()
+    replicas = ReplicaSet([replica], probe=lag, check_interval=1.0, clock=lambda: now[0])
+    for _ in range(5):
+        replicas.choose()
+    assert len(lag.threads) == 1
+    now[0] = 1.5
+    replicas.choose()
+    assert len(lag.threads) == 2
+
+def test_background_probe_never_blocks_choose(primary, replica):
+    release = threading.Event()
+    lag = Lag()
+
+    def slow_probe(connection):
+        release.wait(5)
+        return lag(connection)
+
+    replicas = ReplicaSet([replica], probe=slow_probe, background=True)
+    # The first probe hasn't come back: no replica yet, and no waiting.
+    assert replicas.choose() is None
+    release.set()
+    while replicas.status()[0]["lag"] is None:
+        time.sleep(0.01)
+    assert replicas.choose() is replica
+    assert lag.threads[0] is not threading.main_thread()
+
+def test_async_get_bind_probes_off_the_event_loop(tmp_path, primary, replica):
+    release = threading.Event()
+    lag = Lag()
+
+    def slow_probe(connection):
+        release.wait(5)
+        return lag(connection)
+
+    async def run():
+        async_primary = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'primary'}.db")
+        async_replica = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'replica'}.db")
+        replicas = ReplicaSet([async_replica.sync_engine], probe=slow_probe, probe_engines=[replica], background=True)
+        try:
+            # The probe is still waiting, yet the query doesn't: it goes to
+            # the primary.
+            async with AsyncSession(async_primary, sync_session_class=RoutingSession, replicas=replicas) as session:
+                assert await session.scalar(NAME) == "primary"
+            release.set()
+            while replicas.status()[0]["lag"] is None:
+                await asyncio.sleep(0.01)
+            async with AsyncSession(async_primary, sync_session_class=RoutingSession, replicas=replicas) as session:
+                assert await session.scalar(NAME) == "replica"
+            assert threading.main_thread() not in lag.threads
+        finally:
+            release.set()
+            await async_primary.dispose()
+            await async_replica.dispose()
+
+    asyncio.run(run())
@@ -0,0 +1,118 @@
+import importlib.util
+from pathlib import Path
+import pytest
+from alembic.migration import MigrationContext
+from alembic.operations import Operations
+from sqlalchemy import text
+from app.core import search_ddl
+from app.core.search import search_terms
+from app.models import Borrower, CommunicationLog, Organization
+from app.repositories import search_repository
+
+PHONE_MIGRATION = Path(__file__).resolve().parents[1] / "alembic" / "versions" / "6e2f8a1c4b57_search_phone_digits.py"
+
+@pytest.fixture(autouse=True)
+def search_indexes(db_session):
+    if db_session.bind.dialect.name == "postgresql":
+        installed = db_session.scalar(text("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'"))
+        if not installed:
+            pytest.skip("pg_trgm is not installed")
+
+def _borrower(session, org, **values):
+    borrower = Borrower(organization_id=org.id, **values)
+    session.add(borrower)
+    session.flush()
+    return borrower
+
+@pytest.fixture
+def grace(db_session, organization):
+    return _borrower(db_session, organization, first_name="Grace", last_name="Hopper", email="grace@navy.example", phone="(555) 123-4567")
+
+@pytest.fixture
+def other_org(db_session):
+    org = Organization(name="Other Lending")
+    db_session.add(org)
+    db_session.flush()
+    return org
+
+def _found(session, org, q):
+    return [borrower.id for borrower in search_repository.search_borrowers(session, org.id, q).items]
+
+def test_search_terms():
+    assert search_terms("(555) 123-4567") == ["5551234567"]
+    assert search_terms("+1 555.123.4567") == ["15551234567"]
+    assert search_terms("  Grace  Hopper ") == ["Grace", "Hopper"]
+    assert search_terms("grace@navy.example.") == ["grace@navy.example"]
+    assert search_terms("") == []
+
+@pytest.mark.parametrize("q", ["grace", "Hopper", "grace hopper", "hop", "grace@navy.example", "grace@navy"])
+def test_finds_by_name_and_email(db_session, organization, grace, borrower, q):
+    assert _found(db_session, organization, q) == [grace.id]
+
+@pytest.mark.parametrize("q", ["(555) 123-4567", "5551234567", "555-123-4567", "555 123"])
+def test_finds_formatted_and_bare_phones(db_session, organization, grace, borrower, q):
+    assert _found(db_session, organization, q) == [grace.id]
+
+def test_follows_updates(db_session, organization, grace):
+    grace.phone = "555.987.6543"
+    grace.last_name = "Brewster"
+    db_session.flush()
+    assert _found(db_session, organization, "5559876543") == [grace.id]
+    assert _found(db_session, organization, "brewster") == [grace.id]
+    assert _found(db_session, organization, "5551234567") == []
+
+def test_scoped_to_the_organization(db_session, organization, other_org, grace):
+    twin = _borrower(db_session, other_org, first_name="Grace", last_name="Hopper", phone="555-123-4567")
+    assert _found(db_session, organization, "grace hopper") == [grace.id]
+    assert _found(db_session, other_org, "5551234567") == [twin.id]
+
+def test_skips_soft_deleted_borrowers(db_session, organization, grace):
+    grace.deleted_at = text("CURRENT_TIMESTAMP")
+    db_session.flush()
+    assert _found(db_session, organization, "grace") == []
+
+def test_empty_query_finds_nothing(db_session, organization, grace):
+    page = search_repository.search_borrowers(db_session, organization.id, "  ")
+    assert (page.items, page.next_cursor) == ([], None)
+
+def test_pages_through_matches(db_session, organization):
+    ids = {_borrower(db_session, organization, first_name="Alan", last_name=f"Turing{n}").id for n in range(5)}
+    page = search_repository.search_borrowers(db_session, organization.id, "alan", page_size=2)
+    seen = [borrower.id for borrower in page.items]
+    while page.next_cursor is not None:
+        page = search_repository.search_borrowers(db_session, organization.id, "alan", cursor=page.next_cursor, page_size=2)
+        seen += [borrower.id for borrower in page.items]
+    assert sorted(seen) == sorted(ids)
+
+def test_search_messages(db_session, organization, other_org, grace):
+    def log(org, message):
+        entry = CommunicationLog(organization_id=org.id, borrower_id=grace.id, message=message)
+        db_session.add(entry)
+        db_session.flush()
+        return entry.id
+    payment = log(organization, "Your payment was received")
+    log(organization, "Please upload your bank statement")
+    log(other_org, "Your payment is overdue")
+    found = search_repository.search_messages(db_session, organization.id, "payment").items
+    assert [entry.id for entry in found] == [payment]
+    assert search_repository.search_messages(db_session, organization.id, "payment", borrower_id=grace.id + 1).items == []
+
+def test_phone_digits_migration(db_session, organization, grace):
+    if db_session.bind.dialect.name != "sqlite":
+        pytest.skip("the migration only changes the SQLite FTS table")
+    schema = text("SELECT type, name, sql FROM sqlite_master WHERE name LIKE 'borrowers_fts%' ORDER BY name")
+    installed = db_session.execute(schema).all()
+    spec = importlib.util.spec_from_file_location("search_phone_digits", PHONE_MIGRATION)
+    migration = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(migration)
+    with Operations.context(MigrationContext.configure(db_session.connection())):
+        migration.downgrade()
+        assert _found(db_session, organization, "5551234567") == []
+        migration.upgrade()
+    assert _found(db_session, organization, "(555) 123-4567") == [grace.id]
+    # The same DDL create_all installed.
+    assert db_session.execute(schema).all() == installed
+
+def test_unknown_ddl_version():
+    with pytest.raises(ValueError):
+        search_ddl.search_ddl("sqlite", "borrowers", version=99)
@@ -0,0 +1,102 @@
+from datetime import datetime
+from types import SimpleNamespace
+import pytest
+from app.models import Application, Borrower, CommunicationLog, Document, User
+from app.repositories import (
+    application_repository, borrower_repository, communication_repository, document_repository,
+    organization_repository, user_repository,
+)
+
+def _ids(page):
+    return {row.id for row in page.items}
+
+def _application(session, organization, borrower, documents, logs):
+    application = Application(organization_id=organization.id, borrower_id=borrower.id)
+    session.add(application)
+    session.flush()
+    docs = [
+        Document(organization_id=organization.id, application_id=application.id, file_name=f"{n}.pdf")
+        for n in range(documents)
+    ]
+    entries = [
+        CommunicationLog(organization_id=organization.id, application_id=application.id, message=f"message {n}")
+        for n in range(logs)
+    ]
+    session.add_all(docs + entries)
+    session.flush()
+    return SimpleNamespace(id=application.id, documents={doc.id for doc in docs}, logs={log.id for log in entries})
+
+@pytest.fixture
+def applications(db_session, organization, borrower):
+    deleted = _application(db_session, organization, borrower, documents=3, logs=3)
+    kept = _application(db_session, organization, borrower, documents=1, logs=1)
+    # Deleted on its own earlier: hidden already, and not counted again.
+    db_session.get(CommunicationLog, min(deleted.logs)).deleted_at = datetime(2030, 1, 1)
+    db_session.commit()
+    return deleted, kept
+
+def test_application_cascade(db_session, organization, applications):
+    deleted, kept = applications
+    counts = application_repository.soft_delete_application_cascade(db_session, [deleted.id])
+    assert counts == {"documents": 3, "communication_logs": 2, "applications": 1}
+
+    assert _ids(application_repository.list_applications(db_session, organization.id)) == {kept.id}
+    assert _ids(document_repository.list_documents(db_session, organization.id)) == kept.documents
+    assert _ids(communication_repository.list_logs(db_session, organization.id)) == kept.logs
+    assert document_repository.list_documents(db_session, organization.id, application_id=deleted.id).items == []
+    assert communication_repository.list_logs(db_session, organization.id, application_id=deleted.id).items == []
+    assert application_repository.get_application_by_id(db_session, deleted.id) is None
+    assert application_repository.get_application_bundle(db_session, deleted.id) is None
+    assert document_repository.get_documents_by_ids(db_session, deleted.documents) == {}
+    assert communication_repository.get_logs_by_ids(db_session, deleted.logs) == {}
+
+def test_application_cascade_is_idempotent(db_session, applications):
+    deleted, _ = applications
+    application_repository.soft_delete_application_cascade(db_session, [deleted.id])
+    counts = application_repository.soft_delete_application_cascade(db_session, [deleted.id])
+    assert counts == {"documents": 0, "communication_logs": 0, "applications": 0}
+    assert application_repository.soft_delete_application_cascade(db_session, []) == {}
+
+def test_deleted_at_is_shared_by_the_cascade(db_session, applications):
+    deleted, _ = applications
+    application_repository.soft_delete_application_cascade(db_session, [deleted.id])
+    stamps = {db_session.get(Application, deleted.id).deleted_at}
+    stamps |= {db_session.get(Document, id).deleted_at for id in deleted.documents}
+    stamps |= {db_session.get(CommunicationLog, id).deleted_at for id in deleted.logs - {min(deleted.logs)}}
+    assert None not in stamps
+    # now() is fixed for the transaction on PostgreSQL; SQLite's
+    # CURRENT_TIMESTAMP is per statement.
+    if db_session.bind.dialect.name == "postgresql":
+        assert len(stamps) == 1
+
+def test_borrower_cascade(db_session, organization, borrower, applications):
+    deleted, kept = applications
+    other = Borrower(organization_id=organization.id, first_name="Grace")
+    db_session.add(other)
+    db_session.commit()
+    counts = borrower_repository.soft_delete_borrower_cascade(db_session, [borrower.id])
+    assert counts == {"documents": 4, "communication_logs": 3, "applications": 2, "borrowers": 1}
+    assert _ids(borrower_repository.list_borrowers(db_session, organization.id)) == {other.id}
+    assert application_repository.list_applications(db_session, organization.id).items == []
+    assert document_repository.list_documents(db_session, organization.id).items == []
+    assert communication_repository.list_logs(db_session, organization.id).items == []
+
+def test_organization_cascade(db_session, organization, applications):
+    db_session.add(User(organization_id=organization.id, email="officer@example.com", password_hash="x"))
+    db_session.commit()
+    counts = organization_repository.soft_delete_organization_cascade(db_session, [organization.id])
+    assert counts == {
+        "documents": 4, "communication_logs": 3, "applications": 2,
+        "borrowers": 1, "users": 1, "organizations": 1,
+    }
+    assert organization_repository.get_organization_by_id(db_session, organization.id) is None
+    assert organization.id not in _ids(organization_repository.list_organizations(db_session))
+    assert user_repository.get_user_by_email(db_session, "officer@example.com") is None
+
+def test_single_soft_delete_hides_the_row(db_session, organization, applications):
+    deleted, kept = applications
+    application_repository.soft_delete_application(db_session, db_session.get(Application, deleted.id))
+    assert _ids(application_repository.list_applications(db_session, organization.id)) == {kept.id}
+    assert application_repository.get_applications_by_ids(db_session, [deleted.id, kept.id]).keys() == {kept.id}
+    # Children are left alone; only the cascade reaches them.
+    assert len(document_repository.list_documents(db_session, organization.id, application_id=deleted.id).items) == 3
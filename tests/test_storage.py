@@ -0,0 +1,151 @@
+import asyncio
+import hashlib
+import mmap
+import os
+import pytest
+from sqlalchemy.orm import sessionmaker
+from app.core import storage as storage_module
+from app.core.storage import BlobNotFound, LocalStorage, get_storage
+from app.core.tenancy import tenant_session
+from app.models import Application, Borrower, Document, Organization
+from app.repositories import document_repository
+
+# Crosses the mmap granularity, so ranged reads start and end mid-mapping.
+DATA = bytes(range(256)) * (2 * mmap.ALLOCATIONGRANULARITY // 256 + 3)
+
+@pytest.fixture
+def storage(tmp_path):
+    return LocalStorage(str(tmp_path / "blobs"), chunk_size=1000)
+
+@pytest.fixture
+def blob(storage):
+    return storage.save(DATA)
+
+def _files(storage):
+    return sorted(
+        os.path.relpath(os.path.join(directory, name), storage.root)
+        for directory, _, names in os.walk(storage.root) for name in names
+    )
+
+def test_save_addresses_blobs_by_content(storage, blob):
+    digest = hashlib.sha256(DATA).hexdigest()
+    assert blob == (storage.provider, f"sha256/{digest[:2]}/{digest[2:4]}/{digest}", digest, len(DATA))
+    with storage.open(blob.url) as fh:
+        assert fh.read() == DATA
+    assert storage.size(blob.url) == len(DATA)
+
+def test_same_content_is_stored_once(storage, blob, tmp_path):
+    chunks = [DATA[n:n + 333] for n in range(0, len(DATA), 333)]
+    path = tmp_path / "upload"
+    path.write_bytes(DATA)
+    with open(path, "rb") as fh:
+        assert storage.save(fh) == blob
+    assert storage.save(chunks) == blob
+    assert _files(storage) == [blob.url]
+
+def test_async_save_streams_an_async_iterable(storage, blob):
+    async def body():
+        for n in range(0, len(DATA), 1000):
+            yield DATA[n:n + 1000]
+    assert asyncio.run(storage.async_save(body())) == blob
+    assert _files(storage) == [blob.url]
+
+def test_failed_upload_leaves_nothing_behind(storage):
+    def chunks():
+        yield b"partial"
+        raise ConnectionResetError("client went away")
+    with pytest.raises(ConnectionResetError):
+        storage.save(chunks())
+    assert _files(storage) == []
+
+RANGES = [
+    (0, None), (0, 0), (0, 1), (999, 1001), (mmap.ALLOCATIONGRANULARITY - 1, mmap.ALLOCATIONGRANULARITY + 1),
+    (mmap.ALLOCATIONGRANULARITY, 2 * mmap.ALLOCATIONGRANULARITY), (len(DATA) - 1, None), (len(DATA), None),
+    (10, len(DATA) + 100),
+]
+
+@pytest.mark.parametrize("start, end", RANGES)
+def test_ranged_reads(storage, blob, start, end):
+    expected = DATA[start:end]
+    assert storage.read_range(blob.url, start, end) == expected
+    chunks = list(storage.iter_range(blob.url, start, end))
+    assert b"".join(chunks) == expected
+    assert all(len(chunk) <= storage.chunk_size for chunk in chunks)
+
+@pytest.mark.parametrize("start, end", [(-1, None), (10, 5), (len(DATA) + 1, None)])
+def test_invalid_ranges(storage, blob, start, end):
+    with pytest.raises(ValueError):
+        storage.read_range(blob.url, start, end)
+
+@pytest.mark.parametrize("start, end", RANGES)
+def test_send_range(storage, blob, tmp_path, start, end):
+    with open(tmp_path / "out", "wb") as out:
+        assert storage.send_range(blob.url, out.fileno(), start, end) == len(DATA[start:end])
+    assert (tmp_path / "out").read_bytes() == DATA[start:end]
+
+def test_send_range_fallback_finishes_partial_writes(storage, blob, tmp_path, monkeypatch):
+    write = os.write
+
+    def no_sendfile(*args):
+        raise OSError("sendfile not supported here")
+    monkeypatch.setattr(storage_module.os, "sendfile", no_sendfile)
+    # Like a pipe that only takes a few bytes at a time.
+    monkeypatch.setattr(storage_module.os, "write", lambda fd, data: write(fd, bytes(data[:7])))
+    with open(tmp_path / "out", "wb") as out:
+        assert storage.send_range(blob.url, out.fileno(), 5, 2500) == 2495
+    assert (tmp_path / "out").read_bytes() == DATA[5:2500]
+
+def test_missing_blob(storage):
+    with pytest.raises(BlobNotFound):
+        storage.read_range("sha256/00/00/" + "0" * 64)
+
+def test_urls_stay_under_the_root(storage):
+    with pytest.raises(ValueError, match="escapes"):
+        storage.path("../outside")
+
+def test_unknown_provider():
+    with pytest.raises(ValueError, match="unknown storage provider"):
+        get_storage("ftp")
+
+@pytest.fixture
+def application(db_session, borrower):
+    application = Application(organization_id=borrower.organization_id, borrower_id=borrower.id)
+    db_session.add(application)
+    db_session.flush()
+    return application
+
+def _document(session, storage, application, content=DATA):
+    doc = Document(organization_id=application.organization_id, application_id=application.id, file_name="statement.pdf")
+    return document_repository.store_document(session, doc, content, storage=storage)
+
+def test_delete_keeps_blobs_other_documents_share(db_session, storage, application):
+    first = _document(db_session, storage, application)
+    second = _document(db_session, storage, application)
+    assert first.storage_url == second.storage_url
+    document_repository.soft_delete_document(db_session, first)
+    assert storage.delete(db_session, first.storage_url) is False
+    db_session.delete(first)
+    db_session.commit()
+    # Soft-deleted documents still count; they can be restored.
+    document_repository.soft_delete_document(db_session, second)
+    assert storage.delete(db_session, second.storage_url) is False
+    assert storage.exists(second.storage_url)
+    db_session.delete(second)
+    db_session.commit()
+    assert storage.delete(db_session, second.storage_url) is True
+    assert not storage.exists(second.storage_url)
+    assert storage.delete(db_session, second.storage_url) is False
+
+def test_delete_counts_other_tenants_documents(db_session, storage, application):
+    other = Organization(name="Other Lending")
+    db_session.add(other)
+    db_session.flush()
+    their_borrower = Borrower(organization_id=other.id, first_name="Alan")
+    their_application = Application(organization_id=other.id, borrower=their_borrower)
+    db_session.add(their_application)
+    db_session.flush()
+    theirs = _document(db_session, storage, their_application)
+    factory = sessionmaker(bind=db_session.connection(), join_transaction_mode="create_savepoint")
+    with tenant_session(application.organization_id, factory=factory) as session:
+        assert storage.delete(session, theirs.storage_url) is False
+    assert storage.exists(theirs.storage_url)
@@ -0,0 +1,131 @@
+from datetime import datetime
+import pytest
+from sqlalchemy import select, update
+from sqlalchemy.orm import sessionmaker
+from app.core.tenancy import TENANT_KEY, current_tenant, tenant_session
+from app.models import Application, Borrower, CommunicationLog, Document, Organization
+from app.repositories import (
+    application_repository, borrower_repository, communication_repository, search_repository,
+)
+
+FIELDS = ("first_name", "last_name")
+
+def _tenant(org, **values):
+    borrower = Borrower(organization_id=org.id, first_name="Grace", last_name="Hopper", **values)
+    application = Application(organization_id=org.id, borrower=borrower)
+    log = CommunicationLog(organization_id=org.id, borrower=borrower, application=application, message="payment received")
+    document = Document(organization_id=org.id, borrower=borrower, application=application, file_name="id.pdf")
+    return borrower, application, log, document
+
+@pytest.fixture
+def orgs(db_session):
+    mine, theirs = Organization(name="Mine"), Organization(name="Theirs")
+    db_session.add_all([mine, theirs])
+    db_session.flush()
+    rows = {org.id: _tenant(org) for org in (mine, theirs)}
+    db_session.add_all(row for org_rows in rows.values() for row in org_rows)
+    db_session.flush()
+    return mine, theirs, rows
+
+@pytest.fixture
+def open_tenant(db_session):
+    # Tenant sessions on the test's connection, so they see its rows and
+    # their commits only release a savepoint.
+    factory = sessionmaker(bind=db_session.connection(), join_transaction_mode="create_savepoint")
+    sessions = []
+
+    def open_tenant(org_id):
+        session = tenant_session(org_id, factory=factory)
+        sessions.append(session)
+        return session
+    yield open_tenant
+    for session in sessions:
+        session.close()
+
+@pytest.fixture
+def scoped(orgs, open_tenant):
+    mine, theirs, rows = orgs
+    return open_tenant(mine.id), rows[mine.id], rows[theirs.id], theirs
+
+def test_tenant_session_is_scoped(open_tenant, orgs):
+    session = open_tenant(orgs[0].id)
+    assert current_tenant(session) == orgs[0].id
+
+def test_get_hides_other_tenants(scoped):
+    session, (borrower, application, log, document), (their_borrower, their_application, their_log, their_document), theirs = scoped
+    assert borrower_repository.get_borrower_by_id(session, borrower.id).id == borrower.id
+    assert borrower_repository.get_borrower_by_id(session, their_borrower.id) is None
+    assert application_repository.get_application_by_id(session, their_application.id) is None
+    assert application_repository.get_application_bundle(session, their_application.id) is None
+    assert session.get(Document, their_document.id) is None
+    assert session.get(Organization, theirs.id) is None
+
+def test_lists_hide_other_tenants(scoped):
+    session, mine, theirs_rows, theirs = scoped
+    assert borrower_repository.list_borrowers(session, theirs.id).items == []
+    assert application_repository.list_applications(session, theirs.id).items == []
+    assert communication_repository.list_logs(session, theirs.id).items == []
+    # Even a query that names no organization at all.
+    assert session.scalars(select(Borrower.id)).all() == [mine[0].id]
+
+def test_projections_hide_other_tenants(scoped):
+    session, (borrower, *_), (their_borrower, *_), theirs = scoped
+    rows = borrower_repository.get_borrower_rows_by_ids(session, [borrower.id, their_borrower.id], FIELDS)
+    assert list(rows) == [borrower.id]
+    assert borrower_repository.list_borrower_rows(session, theirs.id, FIELDS).items == []
+
+def test_by_ids_hide_other_tenants(scoped):
+    session, (borrower, application, *_), (their_borrower, their_application, *_), theirs = scoped
+    assert list(borrower_repository.get_borrowers_by_ids(session, [borrower.id, their_borrower.id])) == [borrower.id]
+    assert list(application_repository.get_applications_by_ids(session, [application.id, their_application.id])) == [application.id]
+
+def test_search_hides_other_tenants(scoped):
+    session, mine, theirs_rows, theirs = scoped
+    assert search_repository.search_messages(session, theirs.id, "payment").items == []
+    assert [log.id for log in search_repository.search_messages(session, mine[0].organization_id, "payment").items] == [mine[2].id]
+
+def test_flush_refuses_rows_for_other_tenants(scoped):
+    session, mine, theirs_rows, theirs = scoped
+    session.add(Borrower(organization_id=theirs.id, first_name="Mallory"))
+    with pytest.raises(ValueError, match="scoped to"):
+        session.flush()
+
+def test_flush_refuses_moving_a_row_to_another_tenant(scoped):
+    session, (borrower, *_), theirs_rows, theirs = scoped
+    loaded = session.get(Borrower, borrower.id)
+    loaded.organization_id = theirs.id
+    with pytest.raises(ValueError, match="scoped to"):
+        session.flush()
+
+def test_new_rows_get_the_sessions_tenant(scoped):
+    session, (borrower, *_), *_ = scoped
+    new = Borrower(first_name="Katherine")
+    session.add(new)
+    session.flush()
+    assert new.organization_id == borrower.organization_id
+
+def test_bulk_writes_only_touch_the_tenant(db_session, scoped):
+    session, (borrower, *_), (their_borrower, *_), theirs = scoped
+    session.execute(update(Borrower).values(last_name="Renamed"))
+    assert borrower_repository.soft_delete_borrowers_by_ids(session, [their_borrower.id]) == 0
+    db_session.expire_all()
+    assert db_session.get(Borrower, their_borrower.id).last_name == "Hopper"
+    assert db_session.get(Borrower, their_borrower.id).deleted_at is None
+    assert db_session.get(Borrower, borrower.id).last_name == "Renamed"
+
+def test_include_deleted_stays_within_the_tenant(db_session, scoped):
+    session, (borrower, *_), (their_borrower, *_), theirs = scoped
+    now = datetime(2026, 1, 1)
+    db_session.execute(update(Borrower).values(deleted_at=now))
+    assert session.scalars(select(Borrower.id)).all() == []
+    with_deleted = session.scalars(select(Borrower.id).execution_options(include_deleted=True)).all()
+    assert with_deleted == [borrower.id]
+
+def test_only_an_unscoped_session_sees_every_tenant(db_session, orgs):
+    # Crossing tenants means opening a session without a tenant on purpose;
+    # a tenant session has no option that lifts its filter.
+    mine, theirs, rows = orgs
+    assert current_tenant(db_session) is None
+    ids = {rows[mine.id][0].id, rows[theirs.id][0].id}
+    assert set(db_session.scalars(select(Borrower.id).where(Borrower.id.in_(ids)))) == ids
+    assert TENANT_KEY not in db_session.info